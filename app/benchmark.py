@@ -0,0 +1,253 @@
+"""Замеры производительности муравьиного алгоритма на синтетических и тестовых графах.
+
+Прогон набора (результаты — JSON, пригодный для сравнения между запусками):
+    python -m app.benchmark run --size small medium --output bench.json
+Сравнение двух прогонов (код возврата 1, если найдена регрессия):
+    python -m app.benchmark compare baseline.json bench.json --threshold 0.1
+
+Для каждого графа фиксированы зёрна генератора, выбора вершин и алгоритма, поэтому
+длины найденных путей между прогонами совпадают, а различаются только время и память.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.cli import collect_graph_files, non_negative, positive
+from app.model.aco_solver import ACOSolver
+from app.model.csr_graph import CSRGraph
+from app.model.graph_generators import grid_graph, random_geometric_graph, scale_free_graph
+from app.model.graph_loader import load_edge_list
+from app.model.layout import bfs_distances
+from app.model.pheromone_update import STRATEGIES
+from app.model.shortest_paths import shortest_path_trees
+
+RESULTS_VERSION = 1
+SAMPLES_DIR = "Graph's_files"
+
+# Параметры генераторов по размерам: примерно 10^3, 10^5 и 10^6 рёбер
+SIZES = {
+    'small': {'grid': 23, 'geometric': 250, 'scale-free': 250},
+    'medium': {'grid': 224, 'geometric': 25000, 'scale-free': 25000},
+    'large': {'grid': 708, 'geometric': 250000, 'scale-free': 250000},
+}
+GENERATORS = {
+    'grid': grid_graph,
+    'geometric': random_geometric_graph,
+    'scale-free': scale_free_graph,
+}
+
+# Метрики, по которым сравниваются прогоны: True — чем больше, тем лучше
+COMPARED_METRICS = {
+    'ants_per_second': True,
+    'iterations_per_second': True,
+    'peak_memory': False,
+}
+
+
+def benchmark_cases(sizes, samples_dir=SAMPLES_DIR, seed=0):
+    """Список случаев (имя, функция, возвращающая массивы рёбер u, v, weights)."""
+    cases = []
+    if samples_dir and os.path.isdir(samples_dir):
+        for file_name in collect_graph_files([samples_dir]):
+            cases.append(('file:' + os.path.basename(file_name),
+                          lambda file_name=file_name: load_edge_list(file_name, use_cache=False)[:3]))
+    for size in sizes:
+        for kind, generator in GENERATORS.items():
+            parameter = SIZES[size][kind]
+            cases.append((f'{kind}-{size}', lambda generator=generator, parameter=parameter:
+                          generator(parameter, seed=seed)))
+    return cases
+
+
+def choose_endpoints(csr, hops, seed=0):
+    """Выбирает начальную вершину и достижимую конечную на расстоянии hops рёбер (или на наибольшем).
+
+    Возвращает (начало, конец, длина кратчайшего пути по Дейкстре) в индексах вершин.
+    """
+    rng = np.random.default_rng(seed)
+    start = int(rng.integers(csr.num_nodes))
+    distances, _ = shortest_path_trees(csr, [start])
+    reachable = np.isfinite(distances[0])
+    levels = bfs_distances(csr, start)
+    level = min(hops, int(levels[reachable].max()))
+    end = int(rng.choice(np.flatnonzero(reachable & (levels == level))))
+    return start, end, float(distances[0, end])
+
+
+def run_case(name, make_edges, args):
+    """Строит граф случая, запускает на нём алгоритм args.repeat раз и собирает метрики."""
+    started = time.perf_counter()
+    csr = CSRGraph.from_edges(*make_edges())
+    build_time = time.perf_counter() - started
+    start, end, optimum = choose_endpoints(csr, args.hops, args.seed)
+    start_node, end_node = int(csr.nodes[start]), int(csr.nodes[end])
+
+    def solve():
+        solver = ACOSolver(csr, args.alpha, args.beta, args.evaporation_rate, args.pheromone_intensity, args.ants,
+                           num_iterations=args.iterations, num_workers=args.workers, seed=args.seed,
+                           strategy=args.strategy, num_candidates=args.candidates,
+                           local_search_ants=args.local_search, max_backtracks=args.backtracks)
+        return solver.run(start_node, [end_node])
+
+    # Время — лучшее из повторов; длины путей во всех повторах одинаковы
+    runs = [solve() for _ in range(args.repeat)]
+    fastest = min(runs, key=lambda run: run['elapsed'])
+    elapsed = fastest['elapsed']
+    result = runs[0]
+    # Пиковая память — в отдельном запуске: трассировка выделений сильно замедляет код.
+    # Учитываются только выделения основного процесса.
+    tracemalloc.start()
+    solve()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best_length = result['best_length']
+    return {
+        'name': name,
+        'num_nodes': csr.num_nodes,
+        'num_edges': csr.num_edges,
+        'start_node': start_node,
+        'end_node': end_node,
+        'build_time': build_time,
+        'elapsed': elapsed,
+        'iterations': result['iterations'],
+        'iterations_per_second': result['iterations'] / elapsed,
+        'ants_per_second': result['iterations'] * args.ants / elapsed,
+        'stage_times': fastest['stage_times'],
+        'peak_memory': peak_memory,
+        'optimum': optimum,
+        'best_length': best_length,
+        'quality_gap': best_length / optimum - 1 if best_length is not None and optimum > 0 else None,
+    }
+
+
+def environment():
+    """Сведения о машине и версиях, от которых зависят абсолютные значения метрик."""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_benchmarks(args):
+    parameters = {name: getattr(args, name) for name in
+                  ('alpha', 'beta', 'evaporation_rate', 'pheromone_intensity', 'ants', 'iterations', 'workers',
+                   'seed', 'hops', 'strategy', 'candidates', 'local_search', 'backtracks')}
+    cases = []
+    for name, make_edges in benchmark_cases(args.size, args.samples, args.seed):
+        if args.cases and not any(pattern in name for pattern in args.cases):
+            continue
+        case = run_case(name, make_edges, args)
+        gap = case['quality_gap']
+        print(f"{name}: {case['num_edges']} рёбер, {case['ants_per_second']:.0f} муравьёв/с, "
+              f"{case['peak_memory'] / 2 ** 20:.1f} МБ, отклонение от оптимума "
+              f"{'путь не найден' if gap is None else f'{gap:.1%}'}", file=sys.stderr)
+        cases.append(case)
+    return {
+        'version': RESULTS_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'parameters': parameters,
+        'cases': cases,
+    }
+
+
+def compare_results(baseline, current, threshold):
+    """Сравнивает два прогона по общим случаям.
+
+    Возвращает список строк отчёта и признак регрессии: метрика ухудшилась больше
+    чем на долю threshold или выросло отклонение найденного пути от оптимума.
+    """
+    lines = []
+    regression = False
+    if baseline.get('parameters') != current.get('parameters'):
+        lines.append("Внимание: параметры прогонов различаются, сравнение может быть некорректным.")
+    previous = {case['name']: case for case in baseline['cases']}
+    for case in current['cases']:
+        old = previous.get(case['name'])
+        if old is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if not old[metric]:
+                continue
+            change = case[metric] / old[metric] - 1
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = '  РЕГРЕССИЯ'
+                regression = True
+            lines.append(f"{case['name']:<24} {metric:<22} {old[metric]:>14.1f} -> {case[metric]:>14.1f} "
+                         f"({change:+.1%}){flag}")
+        old_gap, gap = old['quality_gap'], case['quality_gap']
+        if old_gap is not None and (gap is None or gap > old_gap + 1e-9):
+            regression = True
+            lines.append(f"{case['name']:<24} {'quality_gap':<22} {old_gap:>14.4f} -> "
+                         f"{'нет пути' if gap is None else f'{gap:.4f}':>14}  РЕГРЕССИЯ")
+    return lines, regression
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Замеры производительности муравьиного алгоритма.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="прогнать набор графов и сохранить результаты")
+    run.add_argument('--size', nargs='+', choices=list(SIZES), default=['small'],
+                     help="размеры синтетических графов")
+    run.add_argument('--samples', default=SAMPLES_DIR, help="каталог с файлами графов (пустая строка — без них)")
+    run.add_argument('--cases', nargs='+', help="запускать только случаи, в имени которых есть эти подстроки")
+    run.add_argument('--hops', type=positive(int), default=30, help="расстояние в рёбрах до конечной вершины")
+    run.add_argument('--alpha', type=positive(float), default=1.0, help="вес феромонов")
+    run.add_argument('--beta', type=positive(float), default=2.0, help="вес расстояния")
+    run.add_argument('--evaporation-rate', type=positive(float), default=0.5, help="коэффициент испарения")
+    run.add_argument('--pheromone-intensity', type=positive(float), default=1.0, help="интенсивность феромонов")
+    run.add_argument('--ants', type=positive(int), default=100, help="количество муравьёв")
+    run.add_argument('--iterations', type=positive(int), default=10, help="количество итераций")
+    run.add_argument('--strategy', choices=list(STRATEGIES), default='as', help="стратегия обновления феромона")
+    run.add_argument('--candidates', type=positive(int), help="размер списков кандидатов")
+    run.add_argument('--local-search', type=non_negative, default=0, help="сколько лучших муравьёв улучшать локальным поиском")
+    run.add_argument('--backtracks', type=non_negative, default=0, help="сколько раз муравей может отступить из тупика")
+    run.add_argument('--workers', type=positive(int), default=1, help="количество процессов")
+    run.add_argument('--seed', type=int, default=0, help="зерно генераторов графов и алгоритма")
+    run.add_argument('--repeat', type=positive(int), default=1, help="число повторов (берётся лучшее время)")
+    run.add_argument('--output', help="файл для результатов JSON (по умолчанию stdout)")
+
+    compare = commands.add_parser('compare', help="сравнить два файла результатов")
+    compare.add_argument('baseline', help="результаты эталонного прогона")
+    compare.add_argument('current', help="результаты нового прогона")
+    compare.add_argument('--threshold', type=positive(float), default=0.1,
+                         help="допустимое ухудшение метрик (доля)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'compare':
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        with open(args.current, encoding='utf-8') as file:
+            current = json.load(file)
+        lines, regression = compare_results(baseline, current, args.threshold)
+        print('\n'.join(lines))
+        return 1 if regression else 0
+
+    text = json.dumps(run_benchmarks(args), ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""Пакетный запуск муравьиного алгоритма из командной строки без графического интерфейса.
+
+Пример:
+    python -m app.cli "Graph's_files" --end 9 --seed 1 --output results.json
+С --changes после решения применяются изменения рёбер из файла и маршрут
+перестраивается тёплым стартом (результат — в поле rerouted). С --islands N запускается
+островная модель (app.model.island_model): N колоний в --workers процессах. С --trace таймеры
+этапов и счётчики всех запусков сохраняются трассой Chrome (chrome://tracing,
+ui.perfetto.dev), с --profile в неё добавляются семплы профилировщика, а самые
+горячие функции выводятся в stderr. С --snapshots DIR феромон и лучший путь каждой
+--snapshot-every-й итерации записываются журналом (app.model.snapshot_log) в подкаталог
+DIR для каждого файла графа.
+"""
+import argparse
+import json
+import os
+import sys
+
+from app.model.csr_graph import CSRGraph
+from app.model.graph_loader import load_edge_list, read_edge_changes
+from app.model.instrumentation import Instrumentation
+from app.model.island_model import MIGRATIONS, IslandModel
+from app.model.pheromone_update import STRATEGIES, make_strategy
+from app.model.snapshot_log import SnapshotLog
+from app.model.solve_cache import SolveCache, default_cache_directory
+from app.model.tour_solver import create_solver
+
+
+def collect_graph_files(paths):
+    """Раскрывает каталоги в отсортированные списки файлов графов (*.txt)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(name for name in os.listdir(path) if name.endswith('.txt'))
+            files.extend(os.path.join(path, name) for name in names if os.path.isfile(os.path.join(path, name)))
+        else:
+            files.append(path)
+    return files
+
+
+def solve_file(file_name, args, cache=None, instrumentation=None):
+    """Загружает граф из файла и запускает на нём алгоритм с параметрами из командной строки.
+
+    С cache (SolveCache) повторный запуск с тем же графом и параметрами берётся из кэша.
+    В instrumentation (Instrumentation) записываются загрузка графа и этапы решателя.
+    С args.snapshots запуск идёт мимо кэша результатов: история нужна от настоящего запуска.
+    С args.changes результат из кэша тоже не берётся (тёплому старту после изменений нужны
+    феромон и эвристика настоящего запуска), но сохраняется в кэш.
+    """
+    instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+    with instrumentation.phase('load', 'io', file=file_name):
+        u, v, weights, _ = load_edge_list(file_name, use_cache=not args.no_cache)
+        csr = CSRGraph.from_edges(u, v, weights)
+    start_node = args.start if args.start is not None else int(csr.nodes[0])
+    parameters = dict(alpha=args.alpha, beta=args.beta, evaporation_rate=args.evaporation_rate,
+                      pheromone_intensity=args.pheromone_intensity, num_ants=args.ants,
+                      num_iterations=args.iterations, batch_ants=not args.sequential, num_workers=args.workers,
+                      seed=args.seed, stagnation_window=args.stagnation, min_branching=args.min_branching,
+                      time_limit=args.time_limit, target_length=args.target, num_candidates=args.candidates,
+                      strategy=make_strategy(args.strategy, exploitation=args.q0),
+                      local_search_ants=args.local_search, max_backtracks=args.backtracks, cache=cache,
+                      instrumentation=instrumentation)
+    if args.islands > 1:
+        solver = IslandModel(csr, args.end, args.closed, args.islands, args.migration_interval, args.migration,
+                             args.blend_rate, **parameters)
+    else:
+        solver = create_solver(csr, args.end, args.closed, **parameters)
+    if args.snapshots:
+        directory = os.path.join(args.snapshots, os.path.splitext(os.path.basename(file_name))[0])
+        with SnapshotLog.create(directory, csr, args.snapshot_every) as snapshot_log:
+            solver.snapshot_log = snapshot_log
+            result = solver.run(start_node, args.end)
+            solver.snapshot_log = None
+        result['snapshots'] = {'directory': directory, 'count': len(snapshot_log)}
+    elif cache is not None and args.changes:
+        result = solver.run(start_node, args.end)
+        cache.store(solver, start_node, args.end, result)
+        result = {**result, 'cached': False}
+    elif cache is not None:
+        result = cache.run(solver, start_node, args.end)
+    else:
+        result = solver.run(start_node, args.end)
+    if not args.telemetry:
+        del result['telemetry']
+    if args.changes:
+        solver.graph_changed(csr.apply_changes(*read_edge_changes(args.changes)))
+        result['rerouted'] = solver.run(start_node, args.end, warm=True)
+        if not args.telemetry:
+            del result['rerouted']['telemetry']
+    return {'file': file_name, 'start_node': start_node, 'end_nodes': args.end, **result}
+
+
+def positive(cast):
+    """Тип аргумента argparse: положительное число."""
+    def parse(text):
+        value = cast(text)
+        if value <= 0:
+            raise argparse.ArgumentTypeError("Все параметры должны быть положительными числами.")
+        return value
+    return parse
+
+
+def non_negative(text):
+    """Тип аргумента argparse: неотрицательное целое число."""
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError("Значение не может быть отрицательным.")
+    return value
+
+
+def fraction(text):
+    """Тип аргумента argparse: доля из (0, 1]."""
+    value = float(text)
+    if not 0 < value <= 1:
+        raise argparse.ArgumentTypeError("Доля должна быть в интервале (0, 1].")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Поиск оптимального маршрута муравьиным алгоритмом.")
+    parser.add_argument('graphs', nargs='+', help="файлы графов или каталоги с ними (*.txt)")
+    parser.add_argument('--start', type=int, help="начальная вершина (по умолчанию наименьшая)")
+    parser.add_argument('--end', type=int, nargs='+', required=True,
+                        help="конечные вершины; если их несколько, строится маршрут через все")
+    parser.add_argument('--closed', action='store_true', help="маршрут с возвратом в начальную вершину")
+    parser.add_argument('--alpha', type=positive(float), default=2.0, help="вес феромонов")
+    parser.add_argument('--beta', type=positive(float), default=1.0, help="вес расстояния")
+    parser.add_argument('--evaporation-rate', type=positive(float),
+                        help="коэффициент испарения (по умолчанию свой у каждой стратегии: "
+                             + ", ".join(f"{name} — {strategy.default_evaporation_rate:g}"
+                                         for name, strategy in STRATEGIES.items()) + ")")
+    parser.add_argument('--pheromone-intensity', type=positive(float), default=1.0, help="интенсивность феромонов")
+    parser.add_argument('--ants', type=positive(int), default=10, help="количество муравьёв")
+    parser.add_argument('--iterations', type=positive(int), default=20, help="количество итераций")
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='as',
+                        help="стратегия обновления феромона: as, elitist, rank, mmas (MAX-MIN), acs")
+    parser.add_argument('--q0', type=float, help="вероятность жадного выбора ребра (по умолчанию 0.9 для acs, иначе 0)")
+    parser.add_argument('--candidates', type=positive(int), help="размер списков кандидатов (ближайших соседей)")
+    parser.add_argument('--local-search', type=non_negative, default=0,
+                        help="сколько лучших муравьёв итерации улучшать локальным поиском")
+    parser.add_argument('--backtracks', type=non_negative, default=0, help="сколько раз муравей может отступить из тупика")
+    parser.add_argument('--stagnation', type=positive(int),
+                        help="остановиться, если лучший путь не улучшался столько итераций")
+    parser.add_argument('--min-branching', type=positive(float),
+                        help="остановиться, когда средний коэффициент ветвления феромона опустится до значения")
+    parser.add_argument('--time-limit', type=positive(float), help="ограничение времени работы в секундах")
+    parser.add_argument('--target', type=positive(float), help="остановиться, найдя путь не длиннее")
+    parser.add_argument('--changes', help="файл изменений рёбер («u v вес» или «u v -»): после решения "
+                                           "применить их и перестроить маршрут тёплым стартом")
+    parser.add_argument('--telemetry', action='store_true', help="включить в результат статистику каждой итерации")
+    parser.add_argument('--workers', type=positive(int), default=1, help="количество процессов")
+    parser.add_argument('--islands', type=positive(int), default=1,
+                        help="число колоний островной модели с разными alpha, beta и испарением")
+    parser.add_argument('--migration-interval', type=positive(int), default=10,
+                        help="через сколько итераций колонии обмениваются решениями")
+    parser.add_argument('--migration', choices=MIGRATIONS, default='best',
+                        help="обмен лучшими путями или смешивание феромона соседних колоний")
+    parser.add_argument('--blend-rate', type=fraction, default=0.1,
+                        help="доля феромона соседней колонии при смешивании")
+    parser.add_argument('--seed', type=int, help="зерно генератора случайных чисел")
+    parser.add_argument('--sequential', action='store_true', help="строить пути муравьёв по одному")
+    parser.add_argument('--no-cache', action='store_true', help="не использовать кэш графов и кэш результатов")
+    parser.add_argument('--cache-dir', default=default_cache_directory(),
+                        help="каталог кэша результатов (по умолчанию %(default)s)")
+    parser.add_argument('--trace', help="сохранить таймеры этапов и счётчики трассой Chrome (JSON)")
+    parser.add_argument('--profile', action='store_true',
+                        help="включить семплирующий профилировщик и вывести горячие функции в stderr")
+    parser.add_argument('--snapshots', help="каталог для журналов снимков феромона и лучшего пути по итерациям")
+    parser.add_argument('--snapshot-every', type=positive(int), default=1, help="записывать каждую N-ю итерацию")
+    parser.add_argument('--output', help="файл для результатов JSON (по умолчанию stdout)")
+    return parser
+
+
+def parse_arguments(parser, argv=None):
+    """Разбирает аргументы; коэффициент испарения по умолчанию и его проверка — по стратегии."""
+    args = parser.parse_args(argv)
+    strategy = STRATEGIES[args.strategy]
+    if args.evaporation_rate is None:
+        args.evaporation_rate = strategy.default_evaporation_rate
+    try:
+        strategy.check_evaporation_rate(args.evaporation_rate)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def main(argv=None):
+    args = parse_arguments(build_parser(), argv)
+    cache = SolveCache(args.cache_dir) if not args.no_cache else None
+    instrumentation = Instrumentation()
+    if args.profile:
+        instrumentation.start_profiler()
+    results = []
+    for file_name in collect_graph_files(args.graphs):
+        try:
+            results.append(solve_file(file_name, args, cache, instrumentation))
+        except (OSError, ValueError, KeyError) as e:
+            # Ошибка в одном файле не прерывает обработку остальных
+            message = e.args[0] if isinstance(e, KeyError) else str(e)
+            results.append({'file': file_name, 'error': message})
+    instrumentation.stop_profiler()
+    if args.profile:
+        for frame, share in instrumentation.summary()['profile']:
+            print(f"{share:6.1%}  {frame}", file=sys.stderr)
+    if args.trace:
+        instrumentation.export_chrome_trace(args.trace)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+    return 1 if any('error' in result for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,54 @@
+import math
 import sys
 import time
-import networkx as nx
-import pyqtgraph as pg
 import numpy as np
+from app.model.csr_graph import CSRGraph
+from app.model.graph_loader import load_edge_list, read_edge_changes
 from app.model.graph_model import GraphModel
+from app.model.layout import SPRING_LAYOUT_MAX_NODES, compute_layout
+from app.model.pheromone_update import STRATEGIES
 from PyQt5.QtWidgets import QApplication, QMessageBox, QFileDialog
-from PyQt5.QtCore import QObject,QTimer
+from PyQt5.QtCore import QObject, QThread, QTimer
+from app.controller.layout_worker import LayoutWorker
+from app.controller.solver_worker import SolverWorker
+
+
+# Пояснения к причинам остановки решателя (ACOSolver.stop_reason)
+STOP_MESSAGES = {
+    'iterations': "Выполнены все итерации.",
+    'stagnation': "Остановлено: лучший путь перестал улучшаться.",
+    'branching': "Остановлено: феромон сошёлся к одному маршруту.",
+    'time_limit': "Остановлено по ограничению времени.",
+    'target': "Найден путь требуемой длины.",
+}
+
+# Проверки значений полей: (проверка, требование для сообщения об ошибке)
+POSITIVE_NUMBER = (lambda value: 0 < value < math.inf, "положительным числом")
+POSITIVE_INTEGER = (lambda value: value > 0, "положительным целым числом")
+NON_NEGATIVE_INTEGER = (lambda value: value >= 0, "неотрицательным целым числом")
+# Числовые параметры окна: атрибут модели -> (поле ввода окна, название, приведение, проверка,
+# можно ли оставить поле пустым — тогда параметр равен None)
+PARAMETER_FIELDS = {
+    'evaporation_rate': ('evaporation_rate_input', "Коэффициент испарения", float, POSITIVE_NUMBER, False),
+    'pheromone_intensity': ('pheromone_intensity_input', "Интенсивность феромонов", float, POSITIVE_NUMBER, False),
+    'alpha': ('alpha_input', "Вес феромонов", float, POSITIVE_NUMBER, False),
+    'beta': ('beta_input', "Вес расстояния", float, POSITIVE_NUMBER, False),
+    'num_ants': ('num_ants_input', "Количество муравьёв", int, POSITIVE_INTEGER, False),
+    'num_iterations': ('num_iterations_input', "Максимум итераций", int, POSITIVE_INTEGER, False),
+    'stagnation_window': ('stagnation_window_input', "Остановка без улучшения", int, POSITIVE_INTEGER, True),
+    'time_limit': ('time_limit_input', "Ограничение времени", float, POSITIVE_NUMBER, True),
+    'num_candidates': ('num_candidates_input', "Кандидатов на шаге", int, POSITIVE_INTEGER, True),
+    'local_search_ants': ('local_search_input', "Локальный поиск", int, NON_NEGATIVE_INTEGER, False),
+    'max_backtracks': ('max_backtracks_input', "Возвратов из тупика", int, NON_NEGATIVE_INTEGER, False),
+    # С заданным зерном запуски воспроизводимы, и повторный запуск берётся из кэша
+    'seed': ('seed_input', "Зерно генератора", int, NON_NEGATIVE_INTEGER, True),
+    'num_workers': ('num_workers_input', "Количество процессов", int, POSITIVE_INTEGER, False),
+    'num_islands': ('num_islands_input', "Колоний", int, POSITIVE_INTEGER, False),
+    'migration_interval': ('migration_interval_input', "Обмен между колониями", int, POSITIVE_INTEGER, False),
+    'max_fps': ('max_fps_input', "Частота обновления", float, POSITIVE_NUMBER, False),
+    'edge_label_limit': ('edge_label_limit_input', "Подписи рёбер", int, NON_NEGATIVE_INTEGER, False),
+    'node_label_limit': ('node_label_limit_input', "Подписи вершин", int, NON_NEGATIVE_INTEGER, False),
+}
 
 
 class Controller(QObject):
@@ -21,6 +64,12 @@ class Controller(QObject):
         self.elapsed_time = 0  # Начальное время в миллисекундах
         self.running = False  # Состояние работы алгоритма
         self.start_time = None  # Время старта алгоритма
+        self.solver_thread = None  # Фоновый поток решателя
+        self.worker = None
+        self.paused_elapsed = 0  # Время работы до паузы в секундах
+        self.layout_thread = None  # Фоновый поток расчёта раскладки
+        self.layout_worker = None
+        self.layout_cache = None
 
     def show_error_message(self, title, message):
         """Показывает окно с ошибкой."""
@@ -38,32 +87,30 @@ class Controller(QObject):
     def load_graph(self):
         """Загружает граф из файла и проверяет правильность формата."""
         try:
+            if self.running:
+                raise ValueError("Остановите алгоритм перед загрузкой другого графа.")
             file_name, _ = QFileDialog.getOpenFileName(self.model.view, 'Открыть файл графа', '',
                                                        'Text Files (*.txt);;All Files (*)')
 
             if file_name:
-                G = nx.Graph()
-                with open(file_name, 'r') as file:
-                    for line in file:
-                        # Попробуем разделить строку на 3 компонента и проверить их на корректность
-                        parts = line.split()
-                        if len(parts) != 3:
-                            raise ValueError(
-                                f"Неверное количество элементов в строке: {line.strip()}. Ожидается 3 целочисленных элемента в каждой строке.")
-
-                        try:
-                            u, v, weight = map(int, parts)
-                        except ValueError:
-                            raise ValueError(f"Некорректные данные в строке: {line.strip()}. Ожидаются целые числа.")
-
-                        # Добавляем ребро в граф с весом и феромоном
-                        G.add_edge(u, v, weight=weight, pheromone=1.0)
-
-                # Получаем вершины и сортируем их по возрастанию
-                sorted_nodes = sorted(G.nodes)
-                self.model.graph = G
+                u, v, weights, cache = load_edge_list(file_name)
+                csr = CSRGraph.from_edges(u, v, weights)
+                self.stop_layout()
+                positions = cache.load_positions(csr.nodes) if cache is not None else None
+                if positions is None and csr.num_nodes <= SPRING_LAYOUT_MAX_NODES:
+                    positions = next(compute_layout(csr, file_name))  # Небольшой граф раскладываем сразу
+                    if cache is not None:
+                        cache.save_positions(csr.nodes, positions)
+                elif positions is None:
+                    # Большой граф раскладывается в фоне, пока показываем временные координаты
+                    positions = np.random.default_rng(0).uniform(-1, 1, (csr.num_nodes, 2))
+                    self.start_layout(csr, file_name, cache)
+
+                # Вершины в CSR-графе уже отсортированы по возрастанию
+                sorted_nodes = csr.nodes.tolist()
+                self.model.set_graph(csr, positions)
+                self.model.view.set_history_length(0)
                 self.model.start_node = sorted_nodes[0]  # Пример начальной точки
-                self.model.positions = nx.spring_layout(G)  # Генерация позиций узлов
                 self.model.graph_to_view(sorted_nodes)
                 self.set_parameters()
                 # Отображаем статус в статус-баре
@@ -76,6 +123,56 @@ class Controller(QObject):
             self.model.view.status_bar.showMessage(f"Ошибка загрузки графа: {e}")
             self.show_error_message("Ошибка загрузки", f"Не удалось загрузить граф: {str(e)}")
 
+    def start_layout(self, csr, file_name, cache):
+        """Запускает расчёт раскладки в фоновом потоке."""
+        self.layout_cache = cache
+        self.layout_worker = LayoutWorker(csr, file_name)
+        self.layout_thread = QThread(self)
+        self.layout_worker.moveToThread(self.layout_thread)
+        self.layout_thread.started.connect(self.layout_worker.run)
+        self.layout_worker.progress.connect(self.on_layout_progress)
+        self.layout_worker.finished.connect(self.on_layout_finished)
+        self.layout_worker.failed.connect(self.on_layout_failed)
+        for signal in (self.layout_worker.finished, self.layout_worker.failed):
+            signal.connect(self.layout_thread.quit)
+        self.layout_thread.finished.connect(self.layout_worker.deleteLater)
+        self.layout_thread.finished.connect(self.layout_thread.deleteLater)
+        self.layout_thread.start()
+
+    def stop_layout(self, wait=False):
+        """Прерывает расчёт раскладки предыдущего графа."""
+        if self.layout_worker is not None:
+            self.layout_worker.stop()
+            self.layout_thread.quit()  # Цикл событий потока завершится, как только расчёт прервётся
+            if wait:
+                self.layout_thread.wait()
+            self.layout_worker = None
+            self.layout_thread = None
+
+    def on_layout_progress(self, csr, positions):
+        """Промежуточные координаты: перерисовываем граф, если он всё ещё загружен."""
+        if csr is self.model.csr:
+            self.model.positions = positions
+            self.model.view.set_positions(positions)
+
+    def on_layout_finished(self, csr, positions):
+        """Окончательные координаты сохраняются в кэш графа."""
+        if csr is self.model.csr:
+            self.on_layout_progress(csr, positions)
+            if self.layout_cache is not None:
+                self.layout_cache.save_positions(csr.nodes, positions)
+            self.layout_worker = None
+            self.layout_thread = None
+            self.model.view.status_bar.showMessage("Раскладка графа рассчитана.")
+
+    def on_layout_failed(self, csr, message):
+        """Ошибка раскладки; ошибки прерванных расчётов для прежних графов не показываются."""
+        if csr is not self.model.csr:
+            return
+        self.layout_worker = None
+        self.layout_thread = None
+        self.show_error_message("Ошибка", f"Не удалось рассчитать раскладку графа: {message}")
+
     def get_start_node(self):
         current_text = self.model.view.start_node_combo.currentText()
         return int(current_text) if current_text else None
@@ -101,11 +198,11 @@ class Controller(QObject):
 
             # Проверка, что все введенные вершины существуют в графе
             for node in end_nodes:
-                if node not in self.model.graph.nodes:
+                if not self.model.csr.has_node(node):
                     raise ValueError(f"Вершина {node} не существует в графе.")
 
             # Проверка на выбор всех точек, кроме начальной
-            total_nodes = len(self.model.graph.nodes)
+            total_nodes = self.model.csr.num_nodes
             if len(end_nodes) >= total_nodes:
                 raise ValueError(f"Можно выбрать не более {total_nodes - 1} конечных точек.")
 
@@ -125,26 +222,51 @@ class Controller(QObject):
             # Если возникла ошибка, показываем сообщение в статус-баре
             self.model.view.status_bar.showMessage(f"Ошибка: {str(e)}")
 
-    def set_parameters(self):
-        """Обработчик для задания параметров."""
+    def update_strategy(self):
+        """Смена стратегии: коэффициент испарения по умолчанию заменяется на подходящий ей.
+
+        Значение, введённое пользователем, остаётся, если стратегия его допускает.
+        """
+        strategy = STRATEGIES[self.model.view.strategy_combo.currentData()]
+        defaults = {other.default_evaporation_rate for other in STRATEGIES.values()}
         try:
-            # Получаем параметры из view
-            evaporation_rate = float(self.model.view.evaporation_rate_input.text())
-            pheromone_intensity = float(self.model.view.pheromone_intensity_input.text())
-            alpha = float(self.model.view.alpha_input.text())
-            beta = float(self.model.view.beta_input.text())
-            num_ants = int(self.model.view.num_ants_input.text())
+            rate = float(self.model.view.evaporation_rate_input.text())
+            if rate not in defaults:
+                strategy.check_evaporation_rate(rate)
+                return
+        except ValueError:
+            pass
+        self.model.view.evaporation_rate_input.setText(f"{strategy.default_evaporation_rate:g}")
 
-            # Проверка на корректность значений
-            if evaporation_rate <= 0 or pheromone_intensity <= 0 or alpha <= 0 or beta <= 0 or num_ants <= 0:
-                raise ValueError("Все параметры должны быть положительными числами.")
+    def set_parameters(self):
+        """Обработчик для задания параметров: поля PARAMETER_FIELDS, списки и флажки окна."""
+        try:
+            view = self.model.view
+            values = {}
+            for name, (field, title, cast, (check, requirement), optional) in PARAMETER_FIELDS.items():
+                text = getattr(view, field).text().strip()
+                if not text and optional:
+                    values[name] = None  # Пустое поле — параметр (например, критерий остановки) не используется
+                    continue
+                try:
+                    value = cast(text)
+                except ValueError:
+                    value = None
+                if value is None or not check(value):
+                    raise ValueError(f"{title} — значение должно быть {requirement}.")
+                values[name] = value
+            strategy = view.strategy_combo.currentData()
+            STRATEGIES[strategy].check_evaporation_rate(values['evaporation_rate'])
 
             # Передаем параметры в модель
-            self.model.evaporation_rate = evaporation_rate
-            self.model.pheromone_intensity = pheromone_intensity
-            self.model.alpha = alpha
-            self.model.beta = beta
-            self.model.num_ants = num_ants
+            for name, value in values.items():
+                setattr(self.model, name, value)
+            self.model.strategy = strategy
+            self.model.migration = view.migration_combo.currentData()
+            self.model.closed_tour = view.closed_tour_checkbox.isChecked()
+            self.model.profiling = view.profile_checkbox.isChecked()
+            self.model.record_history = view.history_checkbox.isChecked()
+            view.update_labels()
 
             # Выводим сообщение в статус-бар
             self.model.view.status_bar.showMessage("Параметры алгоритма успешно заданы.")
@@ -170,21 +292,202 @@ class Controller(QObject):
             time_str = f"{minutes:02}:{seconds:02}:{milliseconds:03}"
             self.model.view.time_label.setText(time_str)
 
-    def start_algorithm(self):
-        """Запуск алгоритма и старта таймера."""
-        if not self.running:
+    def start_algorithm(self, warm=False):
+        """Запуск алгоритма в фоновом потоке и старта таймера.
+
+        warm — перестроение после изменения рёбер: тёплый старт с феромона предыдущего запуска,
+        если его решатель подходит, иначе обычный запуск; кэш при перестроении не используется.
+        Если такой же запуск уже выполнялся, результат сразу берётся из кэша (кроме запуска
+        с записью истории: снимки даёт только настоящий запуск).
+        """
+        if not self.running and self.model.check_ready():
+            self.model.start_history()
+            self.model.view.set_history_length(0)
+            self.model.view.update_canvas(path=[])
+            rerouting = warm
+            previous = self.model.solver
+            solver = self.model.create_solver(warm)
+            warm = warm and solver is previous  # Тёплый старт — только с решателем прошлого запуска
+            cached = None
+            if not rerouting and not self.model.record_history:
+                cached = self.model.cache.lookup(solver, self.model.start_node, self.model.end_nodes)
+            if cached is not None:
+                # Решатель не запускался: тёплому старту после изменения рёбер он не годится
+                self.model.solver = None
+                self.on_solver_finished({**cached, 'cancelled': False})
+                return
             self.running = True
             self.start_time = time.time()  # Фиксируем время старта
             self.timer.start(10)  # Обновляем каждую десятую миллисекунду
-            self.model.run_aco()
-            self.model.view.status_bar.showMessage("Алгоритм запущен.")
+            # Статистика и трасса собираются заново для каждого запуска
+            self.model.instrumentation.reset()
+            if self.model.profiling:
+                self.model.instrumentation.start_profiler()
+
+            self.worker = SolverWorker(solver, self.model.start_node, self.model.end_nodes, self.model.max_fps, warm)
+            self.solver_thread = QThread(self)
+            self.worker.moveToThread(self.solver_thread)
+            self.solver_thread.started.connect(self.worker.run)
+            self.worker.progress.connect(self.on_solver_progress)
+            self.worker.finished.connect(self.on_solver_finished)
+            self.worker.failed.connect(self.on_solver_failed)
+            self.worker.finished.connect(self.solver_thread.quit)
+            self.worker.failed.connect(self.solver_thread.quit)
+            self.solver_thread.finished.connect(self.worker.deleteLater)
+            self.solver_thread.finished.connect(self.solver_thread.deleteLater)
+            self.solver_thread.start()
+            self.model.view.pause_button.setText('Пауза')
+            self.model.view.status_bar.showMessage("Маршрут перестраивается." if warm else "Алгоритм запущен.")
+
+    def apply_edge_changes(self):
+        """Применяет изменения рёбер из файла к загруженному графу без перезагрузки.
+
+        Феромон и раскладка сохраняются; если маршрут уже строился, он перестраивается
+        тёплым стартом с накопленного феромона.
+        """
+        try:
+            if self.model.csr is None:
+                raise ValueError("Граф не загружен.")
+            if self.running:
+                raise ValueError("Остановите алгоритм перед изменением графа.")
+            file_name, _ = QFileDialog.getOpenFileName(self.model.view, 'Открыть файл изменений рёбер', '',
+                                                       'Text Files (*.txt);;All Files (*)')
+            if not file_name:
+                raise ValueError("Не выбран файл изменений.")
+            changes = self.model.apply_edge_changes(*read_edge_changes(file_name))
+            self.model.view.set_history_length(0)
+            if changes.edge_map is not None:
+                self.model.view.build_scene()  # Рёбра добавлены или удалены: координаты вершин прежние
+            else:
+                self.model.sync_view()
+                self.model.view.update_labels()  # Подписи весов
+            added = int(np.isinf(changes.old_weight).sum())
+            removed = int(np.isinf(changes.new_weight).sum())
+            message = (f"Изменения применены: обновлено {len(changes.u) - added - removed}, добавлено {added}, "
+                       f"удалено {removed} рёбер.")
+            self.model.view.status_bar.showMessage(message)
+            # Маршрут перестраивается, если уже строился (в том числе взят из кэша)
+            routed = self.model.solver is not None or self.model.best_path
+            if routed and self.model.start_node is not None and self.model.end_nodes:
+                self.start_algorithm(warm=True)
+        except Exception as e:
+            self.model.view.status_bar.showMessage(f"Ошибка: {e}")
+            self.show_error_message("Ошибка", f"Не удалось применить изменения рёбер: {e}")
+
+    def on_solver_progress(self, iteration, best_length, pheromone):
+        """Отрисовка промежуточного состояния, присланного решателем (если граф всё ещё загружен)."""
+        if self.worker is None or self.worker.solver.csr is not self.model.csr:
+            return
+        self.model.sync_view(pheromone)
+        self.model.view.status_bar.showMessage(f"Итерация {iteration}, лучшая длина: {best_length}")
+        self.model.view.update_stats(self.model.instrumentation.summary())
+        self.worker.frame_done()
+
+    def on_solver_finished(self, result):
+        """Итоговая визуализация лучшего пути после завершения решателя."""
+        worker = self.worker
+        if worker is not None and not result['cancelled'] and not result['warm_start']:
+            self.model.cache.store(worker.solver, worker.start_node, worker.end_nodes,
+                                   {key: value for key, value in result.items() if key != 'cancelled'})
+        self.finish_algorithm()
+        self.show_history()
+        self.model.best_path = result['best_path']
+        self.model.best_length = result['best_length'] if result['best_length'] is not None else math.inf
+        if self.model.best_path:
+            self.model.sync_view(path=np.searchsorted(self.model.csr.nodes, self.model.best_path))
+            self.model.view.status_bar.showMessage(
+                f"Лучший путь: {self.model.best_path}, длина: {self.model.best_length}. "
+                f"{STOP_MESSAGES.get(result['stop_reason'], '')}"
+                f"{' Результат взят из кэша.' if result.get('cached') else ''}".strip())
+        elif result['cancelled']:
+            self.model.view.status_bar.showMessage("Алгоритм остановлен.")
+        else:
+            self.model.view.status_bar.showMessage("Путь не найден: все муравьи зашли в тупик.")
+        if not result.get('cached'):
+            self.model.view.update_stats(self.model.instrumentation.summary())
+
+    def on_solver_failed(self, message):
+        self.finish_algorithm()
+        self.show_history()
+        self.show_error_message("Ошибка", f"Ошибка при работе алгоритма: {message}")
+
+    def finish_algorithm(self):
+        """Остановка таймера и освобождение фонового потока."""
+        self.running = False
+        self.timer.stop()
+        self.model.instrumentation.stop_profiler()
+        self.worker = None
+        self.solver_thread = None
+
+    def show_history(self):
+        """Открывает журнал снимков завершённого запуска для просмотра ползунком."""
+        try:
+            history = self.model.finish_history()
+        except ValueError as e:
+            history = None
+            self.show_error_message("Ошибка", f"Не удалось открыть историю запуска: {e}")
+        self.model.view.set_history_length(len(history) if history is not None else 0)
+
+    def show_snapshot(self, number):
+        """Показывает снимок number из истории последнего запуска: феромон и лучший путь."""
+        history = self.model.history
+        if history is None or self.running or not 0 <= number < len(history):
+            return
+        snapshot = history.snapshot(number)
+        self.model.sync_view(snapshot.pheromone, snapshot.best_path if snapshot.best_path is not None else [])
+        length = snapshot.best_length if snapshot.best_length is not None else "путь не найден"
+        self.model.view.history_label.setText(f"Итерация {snapshot.iteration} из {history.index[-1]['iteration']}, "
+                                              f"лучшая длина: {length}")
+
+    def export_trace(self):
+        """Сохраняет таймеры, счётчики и семплы последнего запуска трассой Chrome (JSON)."""
+        try:
+            file_name, _ = QFileDialog.getSaveFileName(self.model.view, 'Сохранить трассу', 'trace.json',
+                                                       'Chrome Trace (*.json);;All Files (*)')
+            if not file_name:
+                return
+            self.model.instrumentation.export_chrome_trace(file_name)
+            self.model.view.status_bar.showMessage(
+                f"Трасса сохранена в {file_name}. Откройте её в chrome://tracing или ui.perfetto.dev.")
+        except OSError as e:
+            self.model.view.status_bar.showMessage(f"Ошибка: {e}")
+            self.show_error_message("Ошибка", f"Не удалось сохранить трассу: {e}")
+
+    def pause_algorithm(self):
+        """Приостанавливает или продолжает работу алгоритма."""
+        if not self.running:
+            return
+        if self.worker.is_paused():
+            self.start_time = time.time() - self.paused_elapsed  # Время на паузе не учитываем
+            self.timer.start(10)
+            self.worker.resume()
+            self.model.view.pause_button.setText('Пауза')
+            self.model.view.status_bar.showMessage("Алгоритм продолжен.")
+        else:
+            self.worker.pause()
+            self.timer.stop()
+            self.paused_elapsed = time.time() - self.start_time
+            self.model.view.pause_button.setText('Продолжить')
+            self.model.view.status_bar.showMessage("Алгоритм приостановлен.")
 
     def stop_algorithm(self):
+        """Запрашивает остановку решателя; результат придёт через on_solver_finished."""
         if self.running:
-            self.running = False
+            self.worker.stop()
             self.timer.stop()
+            self.model.view.pause_button.setText('Пауза')
             self.model.view.status_bar.showMessage("Алгоритм остановлен.")
 
+    def shutdown(self):
+        """Останавливает решатель и раскладку и дожидается завершения фоновых потоков при выходе."""
+        self.stop_layout(wait=True)
+        if self.running:
+            thread = self.solver_thread
+            self.worker.stop()
+            self.finish_algorithm()
+            thread.quit()
+            thread.wait()
+
     def reset_graph(self):
         """Сброс состояния алгоритма, таймера и начальных/конечных точек."""
         self.stop_algorithm()
@@ -195,10 +498,11 @@ class Controller(QObject):
         self.model.view.start_node_combo.setCurrentIndex(0)
         self.model.view.end_nodes_input.clear()
         self.model.view.status_bar.showMessage("Работа сброшена.")
-        self.model.view.update_canvas()
+        self.model.view.update_canvas(path=[])
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     controller = Controller()
+    app.aboutToQuit.connect(controller.shutdown)
     controller.run()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,34 @@
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+from app.model.layout import compute_layout
+
+
+class LayoutWorker(QObject):
+    """Рассчитывает раскладку графа в фоновом потоке, отправляя промежуточные координаты."""
+
+    progress = pyqtSignal(object, object)  # Граф, координаты вершин (n x 2)
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(object, str)  # Граф, сообщение об ошибке
+
+    def __init__(self, csr, file_name=None):
+        super().__init__()
+        self.csr = csr
+        self.file_name = file_name
+        self._stop_requested = threading.Event()
+
+    @pyqtSlot()
+    def run(self):
+        positions = None
+        try:
+            for positions in compute_layout(self.csr, self.file_name):
+                if self._stop_requested.is_set():
+                    return
+                self.progress.emit(self.csr, positions)
+        except Exception as e:
+            self.failed.emit(self.csr, str(e))
+            return
+        self.finished.emit(self.csr, positions)
+
+    def stop(self):
+        """Прерывает расчёт после очередной порции итераций."""
+        self._stop_requested.set()
@@ -0,0 +1,72 @@
+import threading
+import time
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+
+class SolverWorker(QObject):
+    """Выполняет решатель в фоновом потоке (QThread) и сообщает о ходе работы сигналами.
+
+    Сигнал progress отправляется не чаще max_fps раз в секунду и только после того,
+    как интерфейс подтвердил отрисовку предыдущего кадра (frame_done), поэтому медленная
+    перерисовка не тормозит решатель и не копит очередь событий.
+    """
+
+    progress = pyqtSignal(int, float, object)  # Итерация, лучшая длина, снимок феромонов
+    finished = pyqtSignal(object)  # Результат решателя (словарь)
+    failed = pyqtSignal(str)
+
+    def __init__(self, solver, start_node, end_nodes, max_fps=30, warm=False):
+        super().__init__()
+        self.solver = solver
+        self.start_node = start_node
+        self.end_nodes = end_nodes
+        self.warm = warm  # Тёплый старт: продолжить с феромона предыдущего запуска
+        self.min_frame_interval = 1.0 / max_fps
+        self._stop_requested = threading.Event()
+        self._running = threading.Event()  # Сброшено, пока решатель на паузе
+        self._running.set()
+        self._frame_pending = threading.Event()  # Кадр отправлен, но ещё не отрисован
+
+    @pyqtSlot()
+    def run(self):
+        """Основной цикл решателя; выполняется в фоновом потоке."""
+        solver = self.solver
+        try:
+            solver.start(self.start_node, self.end_nodes, self.warm)
+            last_frame = 0.0
+            while not solver.is_done():
+                self._running.wait()
+                if self._stop_requested.is_set():
+                    break
+                solver.step()
+
+                now = time.perf_counter()
+                if now - last_frame >= self.min_frame_interval and not self._frame_pending.is_set():
+                    last_frame = now
+                    self._frame_pending.set()
+                    self.progress.emit(solver.iteration, solver.best_length, solver.csr.pheromone.copy())
+            result = solver.finish()
+        except Exception as e:
+            solver.finish()
+            self.failed.emit(str(e))
+            return
+        result['cancelled'] = self._stop_requested.is_set()
+        self.finished.emit(result)
+
+    def frame_done(self):
+        """Интерфейс отрисовал последний кадр и готов принять следующий."""
+        self._frame_pending.clear()
+
+    def stop(self):
+        """Кооперативная остановка: решатель завершится после текущей итерации."""
+        self._stop_requested.set()
+        self._running.set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def is_paused(self):
+        return not self._running.is_set()
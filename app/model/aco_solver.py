@@ -0,0 +1,406 @@
+import math
+import time
+
+import numpy as np
+
+from app.model.local_search import shortcut_path
+from app.model.parallel_colony import ParallelColony
+from app.model.pheromone_update import make_strategy
+
+BRANCHING_LAMBDA = 0.05  # Порог λ-коэффициента ветвления: доля диапазона феромона на рёбрах вершины
+STAGES = ('construction', 'local_search', 'update')  # Этапы итерации, время которых замеряется отдельно
+
+
+class ACOSolver:
+    """Муравьиный алгоритм поиска кратчайшего пути между двумя вершинами CSR-графа.
+
+    Запуск целиком — run(), по шагам — start() / step() / finish(), пока is_done() ложно.
+    Причина остановки — в stop_reason, статистика итераций — в telemetry.
+    """
+
+    def __init__(self, csr, alpha, beta, evaporation_rate, pheromone_intensity, num_ants,
+                 num_iterations=20, min_pheromone=0.1, batch_ants=True, num_workers=1, seed=None,
+                 stagnation_window=None, min_branching=None, time_limit=None, target_length=None,
+                 strategy='as', num_candidates=None, local_search_ants=0, max_backtracks=0, cache=None,
+                 instrumentation=None, snapshot_log=None):
+        self.csr = csr
+        self.alpha = alpha
+        self.beta = beta
+        self.evaporation_rate = evaporation_rate
+        self.pheromone_intensity = pheromone_intensity
+        self.num_ants = num_ants
+        self.num_iterations = num_iterations
+        self.min_pheromone = min_pheromone
+        self.batch_ants = batch_ants  # Все муравьи итерации строят пути одновременно
+        self.num_workers = num_workers  # Количество процессов для построения путей
+        self.seed = seed
+        self.stagnation_window = stagnation_window  # Итераций без улучшения до остановки
+        self.min_branching = min_branching  # Коэффициент ветвления, при котором поиск сошёлся
+        self.time_limit = time_limit  # Ограничение времени работы в секундах
+        self.target_length = target_length  # Достаточная длина пути
+        # Стратегия обновления феромона: имя из pheromone_update.STRATEGIES или объект стратегии
+        self.strategy = make_strategy(strategy) if isinstance(strategy, str) else strategy
+        self.num_candidates = num_candidates  # Размер списков кандидатов (None — все соседи)
+        self.candidates = None
+        self.mean_choices = None  # Среднее число вариантов выбора на шаге (для границ MAX-MIN)
+        self.local_search_ants = local_search_ants  # Сколько лучших муравьёв итерации улучшать
+        self.max_backtracks = max_backtracks  # Сколько раз муравей может отступить из тупика
+        self.stage_times = dict.fromkeys(STAGES, 0.0)
+        self.cache = cache  # SolveCache для производных данных графа (эвристики) или None
+        self.instrumentation = instrumentation  # Instrumentation для таймеров и счётчиков или None
+        self.snapshot_log = snapshot_log  # SnapshotLog для истории феромона и лучшего пути или None
+        self.rng = np.random.default_rng()
+        self.iteration = 0
+        self.best_path = None
+        self.best_length = math.inf
+        self.convergence = []
+        self.telemetry = []
+        self.stop_reason = None
+        self.warm_start = False  # Запуск продолжил феромон предыдущего
+        self._last_improvement = 0
+        self._start = None
+        self._end = None
+        self._colony = None
+        self._seed_sequence = None
+        self._attractiveness = None
+        self._started_at = None
+
+    def initialize_pheromones(self):
+        """Инициализация феромонов для всех рёбер графа."""
+        self.csr.reset_pheromones(1.0)
+        if self.cache is not None:
+            self.cache.set_heuristic(self.csr, self.beta)
+        else:
+            self.csr.set_heuristic(self.beta)
+
+    def start(self, start_node, end_nodes, warm=False):
+        """Подготовка к запуску: сброс феромонов, лучшего пути и генератора случайных чисел.
+
+        При тёплом старте (warm) феромон, эвристика, списки кандидатов и состояние стратегии
+        предыдущего запуска сохраняются — так после небольших изменений графа (graph_changed)
+        маршрут перестраивается за малую долю итераций холодного запуска. Лучший путь
+        прошлого запуска с теми же концами, если все его рёбра сохранились, становится
+        начальным рекордом с длиной по новым весам.
+        """
+        started = time.perf_counter()
+        start, end = self.csr.node_index(start_node), self.csr.node_index(next(iter(end_nodes)))
+        warm = warm and self.csr.eta_beta is not None
+        previous = self.best_path if warm and (start, end) == (self._start, self._end) else None
+        self._start, self._end = start, end
+        if not warm:
+            self.initialize_pheromones()
+        elif self.csr.beta != self.beta:
+            self.csr.set_heuristic(self.beta)
+        if self.num_candidates is None:
+            self.candidates = None
+        elif not warm or self.candidates is None or self.candidates.k != self.num_candidates:
+            self.candidates = self.csr.candidate_lists(self.num_candidates)
+        adjacency = self.candidates if self.candidates is not None else self.csr
+        self.mean_choices = max(np.diff(adjacency.indptr).mean() - 1, 1.0) if self.csr.num_nodes else 1.0
+        self.reset_run(warm)
+        if previous is not None:
+            edges = self.csr.path_edges(previous)
+            if (edges >= 0).all():
+                self.best_path = previous
+                self.best_length = float(self.csr.edge_weight[edges].sum())
+        self._colony = ParallelColony(self.csr, self.num_workers, self.candidates, self.strategy.uses_local_update)
+        self.instrument_start(started)
+
+    def graph_changed(self, changes):
+        """Обновляет кэши решателя после CSRGraph.apply_changes; феромон не сбрасывается.
+
+        Если менялись только веса, списки кандидатов пересчитываются у затронутых вершин,
+        иначе строятся заново. Вызывается между запусками; следующий запуск с warm=True
+        продолжит с текущего феромона.
+        """
+        if self.candidates is not None:
+            if changes.edge_map is None:
+                self.csr.refresh_candidate_lists(self.candidates, changes.nodes)
+            else:
+                self.candidates = self.csr.candidate_lists(self.candidates.k)
+
+    def migrants(self):
+        """Лучший путь, его длина и феромон колонии — для обмена между колониями (IslandModel)."""
+        return self.best_path, self.best_length, self.csr.pheromone
+
+    def accept_migrants(self, best_path, best_length, pheromone=None, blend_rate=0.0):
+        """Принимает решение и феромон соседней колонии (IslandModel).
+
+        Феромон смешивается с присланным в доле blend_rate. Присланный путь, если он короче
+        своего лучшего, становится лучшим путём колонии и получает порцию феромона, как путь муравья.
+        """
+        if pheromone is not None:
+            self.csr.pheromone *= 1 - blend_rate
+            self.csr.pheromone += blend_rate * pheromone
+        if best_path is not None and best_length < self.best_length:
+            self.best_path = np.asarray(best_path)
+            self.best_length = float(best_length)
+            self.csr.pheromone[self.csr.path_edges(self.best_path)] += self.pheromone_intensity / best_length
+
+    def reset_run(self, warm=False):
+        """Сброс генератора случайных чисел, лучшего пути и статистики перед запуском."""
+        self._seed_sequence = np.random.SeedSequence(self.seed)
+        self.rng = np.random.default_rng(self._seed_sequence)
+        self.iteration = 0
+        self.best_path = None
+        self.best_length = math.inf
+        self.convergence = []
+        self.telemetry = []
+        self.stop_reason = None
+        self.warm_start = warm
+        self._last_improvement = 0
+        self.stage_times = dict.fromkeys(STAGES, 0.0)
+        self._started_at = time.perf_counter()
+        self.strategy.start(self, warm)
+
+    def step(self):
+        """Одна итерация: построение путей всеми муравьями, локальный поиск и обновление феромонов."""
+        started = time.perf_counter()
+        counters = {} if self.instrumentation is not None else None
+        self._attractiveness = self.csr.pheromone ** self.alpha * self.csr.eta_beta
+        local_update = self.strategy.local_update(self, self.csr.pheromone, self.csr.eta_beta)
+        if self.batch_ants:
+            all_paths = self._colony.construct_paths(self._attractiveness, self._start, self._end, self.num_ants,
+                                                     self._seed_sequence, self.iteration,
+                                                     self.strategy.exploitation, local_update, self.max_backtracks,
+                                                     counters)
+        else:
+            if local_update is not None:
+                local_update = local_update.private_copy()
+            all_paths = [self.generate_ant_path(self._start, self._end, local_update, counters)
+                         for _ in range(self.num_ants)]
+        if local_update is not None:
+            # Локальные обновления делались в копиях — применяем их к общему феромону
+            traversed = np.concatenate([self.csr.path_edges(path) for path, _ in all_paths])
+            self.strategy.after_construction(self, self.csr.pheromone, traversed)
+        constructed = time.perf_counter()
+
+        if self.local_search_ants > 0:
+            all_paths = self.improve_paths(all_paths)
+        searched = time.perf_counter()
+
+        # Определение лучшего пути в этой итерации
+        lengths = np.array([path_length for _, path_length in all_paths], dtype=np.float64)
+        best = int(np.argmin(lengths))
+        if lengths[best] < self.best_length:
+            self.best_length = float(lengths[best])
+            self.best_path = all_paths[best][0]
+
+        # Обновление феромонов
+        self.update_pheromones(all_paths)
+        stage_times = (constructed - started, searched - constructed, time.perf_counter() - searched)
+        self.instrument_iteration(started, stage_times, counters)
+        self.record_iteration(lengths, stage_times)
+
+    def improve_paths(self, all_paths):
+        """Сокращает объезды (local_search.shortcut_path) у local_search_ants лучших путей итерации."""
+        all_paths = list(all_paths)
+        lengths = np.array([path_length for _, path_length in all_paths], dtype=np.float64)
+        for ant in np.argsort(lengths, kind='stable')[:self.local_search_ants]:
+            if not np.isfinite(lengths[ant]):
+                break
+            path = shortcut_path(self.csr, all_paths[ant][0])
+            all_paths[ant] = (path, self.csr.path_length(path))
+        return all_paths
+
+    def instrument_start(self, started):
+        """Отмечает в instrumentation подготовку к запуску, начавшуюся в started, и рабочий поток."""
+        if self.instrumentation is not None:
+            self.instrumentation.track_current_thread()
+            self.instrumentation.add_phase('start', started, time.perf_counter() - started)
+
+    def instrument_iteration(self, started, stage_times, counters=None):
+        """Передаёт в instrumentation этапы итерации (по порядку STAGES с момента started) и счётчики."""
+        if self.instrumentation is None:
+            return
+        for stage, elapsed in zip(STAGES, stage_times):
+            self.instrumentation.add_phase(stage, started, elapsed, iteration=self.iteration + 1)
+            started += elapsed
+        self.instrumentation.add_counters({'iterations': 1, **(counters or {})})
+
+    def record_iteration(self, lengths, stage_times=(0.0, 0.0, 0.0)):
+        """Завершает итерацию: счётчик, кривая сходимости и телеметрия по длинам путей муравьёв.
+
+        stage_times — время этапов итерации в порядке STAGES.
+        """
+        for stage, elapsed in zip(STAGES, stage_times):
+            self.stage_times[stage] += elapsed
+        if not self.convergence or self.best_length < self.convergence[-1]:
+            self._last_improvement = self.iteration + 1
+        self.iteration += 1
+        self.convergence.append(self.best_length)
+        completed = lengths[np.isfinite(lengths)]
+        self.telemetry.append({
+            'iteration': self.iteration,
+            'best_length': _finite_or_none(self.best_length),
+            'iteration_best': float(completed.min()) if len(completed) else None,
+            'mean_length': float(completed.mean()) if len(completed) else None,
+            'completed': len(completed) / len(lengths) if len(lengths) else 0.0,
+            'branching': self.branching_factor(),
+            'elapsed': time.perf_counter() - self._started_at,
+            **{stage + '_time': elapsed for stage, elapsed in zip(STAGES, stage_times)},
+        })
+        if self.snapshot_log is not None:
+            self.snapshot_log.record(self.iteration, self.csr.pheromone, self.best_path, self.best_length)
+
+    def branching_factor(self):
+        """Средний λ-коэффициент ветвления на вершинах лучшего пути (None, пока путь не найден).
+
+        Для вершины это число инцидентных рёбер, феромон на которых не ниже
+        min + λ (max - min) по её рёбрам. Когда муравьи идут одним маршрутом, у внутренних
+        вершин пути остаются два таких ребра (входящее и исходящее), у концов — одно.
+        """
+        if self.best_path is None:
+            return None
+        nodes = np.asarray(self.best_path)
+        first = self.csr.indptr[nodes]
+        degree = self.csr.indptr[nodes + 1] - first
+        offsets = np.cumsum(degree) - degree
+        half = np.arange(degree.sum()) - np.repeat(offsets - first, degree)
+        pheromone = self.csr.pheromone[self.csr.half_edge_ids[half]]
+        low = np.minimum.reduceat(pheromone, offsets)
+        high = np.maximum.reduceat(pheromone, offsets)
+        threshold = np.repeat(low + BRANCHING_LAMBDA * (high - low), degree)
+        return float(np.add.reduceat((pheromone >= threshold).astype(np.int64), offsets).mean())
+
+    def is_done(self):
+        """Проверяет условия остановки после очередной итерации и запоминает причину в stop_reason."""
+        branching = self.telemetry[-1]['branching'] if self.telemetry else None
+        if self.iteration >= self.num_iterations:
+            self.stop_reason = 'iterations'
+        elif self.stagnation_window is not None and self.iteration - self._last_improvement >= self.stagnation_window:
+            self.stop_reason = 'stagnation'
+        elif self.min_branching is not None and branching is not None and branching <= self.min_branching:
+            self.stop_reason = 'branching'
+        elif self.time_limit is not None and time.perf_counter() - self._started_at >= self.time_limit:
+            self.stop_reason = 'time_limit'
+        elif self.target_length is not None and self.best_length <= self.target_length:
+            self.stop_reason = 'target'
+        return self.stop_reason is not None
+
+    def finish(self):
+        """Завершение запуска: усиление феромона на лучшем пути и освобождение ресурсов."""
+        if self._colony is not None:
+            self._colony.close()
+            self._colony = None
+        if self.best_path is not None:
+            self.csr.pheromone[self.csr.path_edges(self.best_path)] += 2 * self.pheromone_intensity / self.best_length
+        return self.result()
+
+    def run(self, start_node, end_nodes, callback=None, warm=False):
+        """Полный запуск алгоритма; callback(solver) вызывается после каждой итерации."""
+        self.start(start_node, end_nodes, warm)
+        try:
+            while not self.is_done():
+                self.step()
+                if callback is not None:
+                    callback(self)
+        finally:
+            result = self.finish()
+        return result
+
+    def result(self):
+        """Результат запуска в виде словаря, пригодного для сериализации в JSON."""
+        return {
+            'best_path': self.csr.nodes[self.best_path].tolist() if self.best_path is not None else None,
+            'best_length': self.best_length if self.best_path is not None else None,
+            'iterations': self.iteration,
+            'convergence': [_finite_or_none(length) for length in self.convergence],
+            'stop_reason': self.stop_reason,
+            'warm_start': self.warm_start,
+            'telemetry': self.telemetry,
+            'stage_times': self.stage_times,
+            'elapsed': time.perf_counter() - self._started_at if self._started_at is not None else 0.0,
+        }
+
+    def generate_ant_path(self, start, end, local_update=None, counters=None):
+        """Генерация пути для одного муравья (в индексах вершин CSR-графа).
+
+        counters — словарь счётчиков построения, как в ant_batch.construct_paths.
+        """
+        current_node = start
+        path = [current_node]
+        visited = np.zeros(self.csr.num_nodes, dtype=bool)
+        visited[current_node] = True
+        path_length = 0.0
+        costs = []
+        retreats = 0
+        counters = counters if counters is not None else {}
+        for name in ('steps', 'edges_scored', 'dead_ends', 'backtracks', 'lost_ants', 'probability_time'):
+            counters.setdefault(name, 0)
+
+        while current_node != end:
+            scoring_started = time.perf_counter()
+            neighbors, edge_ids, probabilities = self.calculate_probabilities(current_node, visited)
+            counters['probability_time'] += time.perf_counter() - scoring_started
+            counters['edges_scored'] += len(neighbors)
+
+            if probabilities is None:  # Если нет доступных узлов, тупик
+                counters['dead_ends'] += 1
+                if retreats >= self.max_backtracks or len(path) == 1:
+                    counters['lost_ants'] += 1
+                    return path, float('inf')
+                retreats += 1
+                counters['backtracks'] += 1
+                # Шаг назад: тупиковая вершина остаётся посещённой и больше не выбирается
+                path.pop()
+                path_length -= costs.pop()
+                current_node = path[-1]
+                continue
+
+            exploitation = self.strategy.exploitation
+            if exploitation > 0 and self.rng.random() < exploitation:
+                choice = int(np.argmax(np.diff(probabilities, prepend=0.0)))
+            else:
+                choice = int(np.searchsorted(probabilities, self.rng.random(), side='right'))
+                choice = min(choice, len(neighbors) - 1)
+            if local_update is not None:
+                local_update.apply(self._attractiveness, edge_ids[choice:choice + 1])
+            next_node = int(neighbors[choice])
+            counters['steps'] += 1
+            costs.append(self.csr.edge_weight[edge_ids[choice]])
+            path_length += costs[-1]
+            path.append(next_node)
+            visited[next_node] = True
+            current_node = next_node
+
+        return path, path_length
+
+    def calculate_probabilities(self, current_node, visited):
+        """Рассчитывает накопленные вероятности перехода к соседним узлам.
+
+        Возвращает (соседи, номера рёбер, накопленные вероятности) либо
+        вероятности None, если все соседи уже посещены. Со списками кандидатов
+        сначала рассматриваются только они, а все соседи — если кандидаты посещены.
+        """
+        if self.candidates is not None:
+            first, last = self.candidates.indptr[current_node], self.candidates.indptr[current_node + 1]
+            neighbors, edge_ids = self.candidates.indices[first:last], self.candidates.half_edge_ids[first:last]
+            probabilities = self._cumulative_probabilities(neighbors, edge_ids, visited)
+            if probabilities is not None:
+                return neighbors, edge_ids, probabilities
+        neighbors, edge_ids = self.csr.neighbors(current_node)
+        return neighbors, edge_ids, self._cumulative_probabilities(neighbors, edge_ids, visited)
+
+    def _cumulative_probabilities(self, neighbors, edge_ids, visited):
+        weights = self._attractiveness[edge_ids]
+        weights[visited[neighbors]] = 0
+
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1] if len(cumulative) else 0
+        if total == 0:
+            return None
+        return cumulative / total
+
+    def update_pheromones(self, all_paths):
+        """Обновляет феромоны по пройденным путям (в индексах вершин) согласно стратегии."""
+        completed = [(path, path_length) for path, path_length in all_paths if path_length != float('inf')]
+        paths = [self.csr.path_edges(path) for path, _ in completed]
+        lengths = np.array([path_length for _, path_length in completed], dtype=np.float64)
+        best_edges = self.csr.path_edges(self.best_path) if self.best_path is not None else None
+        self.strategy.update(self, self.csr.pheromone, paths, lengths, best_edges, self.best_length)
+
+
+def _finite_or_none(value):
+    """Бесконечная длина (путь не найден) сериализуется в JSON как null."""
+    return float(value) if math.isfinite(value) else None
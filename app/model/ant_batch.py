@@ -0,0 +1,260 @@
+import time
+
+import numpy as np
+
+
+def mark_visited(visited, ants, nodes):
+    """Отмечает вершины nodes посещёнными в битовых масках муравьёв ants."""
+    visited[ants, nodes >> 3] |= (1 << (nodes & 7)).astype(np.uint8)
+
+
+def is_visited(visited, ants, nodes):
+    """Проверяет по битовым маскам, посещали ли муравьи ants вершины nodes."""
+    return ((visited[ants, nodes >> 3] >> (nodes & 7)) & 1).astype(bool)
+
+
+def roulette(weights, owner, offsets, totals, rng):
+    """Рулеточный выбор по одному элементу в каждом сегменте массива weights.
+
+    Сегмент k — это элементы, у которых owner == k, начиная с offsets[k].
+    Сегменты с нулевой суммой (totals[k] == 0) должны быть отброшены заранее.
+    Возвращает позиции выбранных элементов в weights.
+    """
+    # Нормируем каждый сегмент к единице, чтобы сохранить точность общей накопленной суммы
+    normalized = weights / totals[owner]
+    cumulative = np.cumsum(normalized)
+    before = np.where(offsets > 0, cumulative[offsets - 1], 0.0)
+    chosen = np.searchsorted(cumulative, before + rng.random(len(offsets)), side='right')
+    ends = np.append(offsets[1:], len(weights)) - 1
+    chosen = np.minimum(chosen, ends)
+    # Из-за округления выбор может попасть на элемент с нулевым весом — сдвигаемся к последнему ненулевому
+    last_positive = np.maximum.accumulate(np.where(weights > 0, np.arange(len(weights)), -1))
+    return last_positive[chosen]
+
+
+def exploit(weights, owner, offsets):
+    """Позиции элементов с наибольшим весом в каждом сегменте (первый из равных)."""
+    largest = np.maximum.reduceat(weights, offsets)
+    positions = np.where(weights == largest[owner], np.arange(len(weights)), len(weights))
+    return np.minimum.reduceat(positions, offsets)
+
+
+class LocalUpdate:
+    """Локальное обновление феромона Ant Colony System во время построения путей.
+
+    Пройденное муравьём ребро сразу теряет часть феромона: tau = (1 - decay) * tau + decay * initial,
+    что подталкивает следующих муравьёв к другим рёбрам. Привлекательность ребра
+    пересчитывается вместе с феромоном.
+    """
+
+    def __init__(self, pheromone, eta_beta, alpha, decay, initial):
+        self.pheromone = pheromone
+        self.eta_beta = eta_beta
+        self.alpha = alpha
+        self.decay = decay
+        self.initial = initial
+
+    def private_copy(self):
+        """Копия с собственным массивом феромонов: построение путей не меняет общее состояние."""
+        return LocalUpdate(self.pheromone.copy(), self.eta_beta, self.alpha, self.decay, self.initial)
+
+    def apply(self, attractiveness, edges):
+        self.pheromone[edges] = (1 - self.decay) * self.pheromone[edges] + self.decay * self.initial
+        attractiveness[edges] = self.pheromone[edges] ** self.alpha * self.eta_beta[edges]
+
+
+def _frontier(adjacency, nodes):
+    """Все полурёбра из вершин nodes: (номер вершины в nodes, число полурёбер у каждой, номера полурёбер)."""
+    first = adjacency.indptr[nodes]
+    degree = adjacency.indptr[nodes + 1] - first
+    owner = np.repeat(np.arange(len(nodes)), degree)
+    offsets = np.cumsum(degree) - degree
+    half = np.arange(len(owner)) - offsets[owner] + first[owner]
+    return owner, degree, half
+
+
+def construct_paths(csr, attractiveness, start, end, num_ants, rng, candidates=None, exploitation=0.0,
+                    local_update=None, max_backtracks=0, counters=None):
+    """Строит пути всех муравьёв итерации одновременно.
+
+    На каждом шаге все ещё идущие муравьи вместе рассматривают рёбра из своих текущих вершин:
+    привлекательность рёбер (attractiveness — массив pheromone^alpha * eta^beta по номерам рёбер)
+    обнуляется для уже посещённых вершин, после чего каждый муравей выбирает следующее ребро
+    рулеткой. Посещённые вершины хранятся битовой матрицей размера num_ants x ceil(n / 8).
+
+    candidates — списки кандидатов (CSRGraph.candidate_lists): муравей оценивает только
+    ближайших соседей и переходит ко всем соседям, лишь если кандидаты уже посещены.
+    exploitation — вероятность q0 выбрать ребро с наибольшей привлекательностью вместо рулетки
+    (правило ACS). local_update (LocalUpdate) применяется к рёбрам после каждого шага;
+    входные массивы при этом не меняются — обновление ведётся в копиях.
+
+    При max_backtracks > 0 муравей, зашедший в тупик, возвращается на предыдущую вершину пути
+    и продолжает поиск оттуда (не больше max_backtracks раз); тупиковая вершина остаётся
+    отмеченной посещённой и больше не выбирается. Пути муравьёв хранятся в матрице
+    num_ants x (наибольшая длина пути), которая расширяется по мере необходимости.
+
+    В словарь counters, если он передан, прибавляются счётчики для профилирования:
+    steps — сделанные шаги, edges_scored — оценённые рёбра, dead_ends — попадания в тупик,
+    backtracks — возвраты, lost_ants — муравьи, не дошедшие до цели, probability_time —
+    время расчёта вероятностей и выбора рёбер в секундах.
+
+    Возвращает список (путь в индексах вершин, длина); у муравьёв, зашедших в тупик
+    и исчерпавших возвраты, длина равна float('inf').
+    """
+    if local_update is not None:
+        attractiveness = attractiveness.copy()
+        local_update = local_update.private_copy()
+    adjacency = candidates if candidates is not None else csr
+    visited = np.zeros((num_ants, (csr.num_nodes + 7) // 8), dtype=np.uint8)
+    current = np.full(num_ants, start, dtype=np.int64)
+    lost = np.zeros(num_ants, dtype=bool)
+    retreats = np.zeros(num_ants, dtype=np.int64)
+    steps = np.zeros(num_ants, dtype=np.int64)
+    ants = np.arange(num_ants)
+    mark_visited(visited, ants, current)
+    # Вершины путей и веса рёбер, по которым муравьи в них пришли
+    path_nodes = np.zeros((num_ants, 16), dtype=np.int64)
+    path_costs = np.zeros((num_ants, 16))
+    path_nodes[:, 0] = start
+    moves = scored = dead_ends = backtracks = 0
+    probability_time = 0.0
+
+    active = ants if start != end else ants[:0]
+    while len(active):
+        scoring_started = time.perf_counter()
+        nodes = current[active]
+
+        # Фронт: все полурёбра (или только кандидаты) из текущих вершин активных муравьёв
+        owner, degree, half = _frontier(adjacency, nodes)
+        neighbors = adjacency.indices[half].astype(np.int64)
+        edges = adjacency.half_edge_ids[half]
+        step_lengths = adjacency.half_weights[half]
+        weights = attractiveness[edges]
+        weights[is_visited(visited, active[owner], neighbors)] = 0
+        totals = np.bincount(owner, weights=weights, minlength=len(active))
+
+        blocked = totals == 0
+        if candidates is not None and blocked.any():
+            # Все кандидаты посещены — эти муравьи выбирают среди всех соседей
+            extra_owner, _, extra_half = _frontier(csr, nodes[blocked])
+            extra_owner = np.flatnonzero(blocked)[extra_owner]
+            extra_neighbors = csr.indices[extra_half].astype(np.int64)
+            extra_weights = attractiveness[csr.half_edge_ids[extra_half]]
+            extra_weights[is_visited(visited, active[extra_owner], extra_neighbors)] = 0
+            kept = ~blocked[owner]
+            owner = np.concatenate([owner[kept], extra_owner])
+            order = np.argsort(owner, kind='stable')
+            owner = owner[order]
+            neighbors = np.concatenate([neighbors[kept], extra_neighbors])[order]
+            edges = np.concatenate([edges[kept], csr.half_edge_ids[extra_half]])[order]
+            step_lengths = np.concatenate([step_lengths[kept], csr.half_weights[extra_half]])[order]
+            weights = np.concatenate([weights[kept], extra_weights])[order]
+            degree = np.bincount(owner, minlength=len(active))
+            totals = np.bincount(owner, weights=weights, minlength=len(active))
+        scored += len(weights)
+
+        stuck = totals == 0
+        returned = active[:0]
+        if stuck.any():  # Тупик: муравей не может продолжить путь
+            if max_backtracks:
+                # Шаг назад по пути; из начальной вершины отступать некуда
+                returned = active[stuck & (steps[active] > 0) & (retreats[active] < max_backtracks)]
+                retreats[returned] += 1
+                steps[returned] -= 1
+                current[returned] = path_nodes[returned, steps[returned]]
+                backtracks += len(returned)
+            dead_ends += int(stuck.sum())
+            lost[active[stuck]] = True
+            lost[returned] = False
+            keep = ~stuck
+            keep_elements = keep[owner]
+            owner = np.cumsum(keep)[owner[keep_elements]] - 1
+            active, degree, totals = active[keep], degree[keep], totals[keep]
+            neighbors, weights = neighbors[keep_elements], weights[keep_elements]
+            edges, step_lengths = edges[keep_elements], step_lengths[keep_elements]
+            if not len(active):
+                active = returned
+                probability_time += time.perf_counter() - scoring_started
+                continue
+        offsets = np.cumsum(degree) - degree
+
+        if exploitation > 0:
+            greedy = rng.random(len(active)) < exploitation
+        chosen = roulette(weights, owner, offsets, totals, rng)
+        if exploitation > 0 and greedy.any():
+            chosen[greedy] = exploit(weights, owner, offsets)[greedy]
+        probability_time += time.perf_counter() - scoring_started
+        if local_update is not None:
+            local_update.apply(attractiveness, edges[chosen])
+        moves += len(active)
+        next_nodes = neighbors[chosen]
+        current[active] = next_nodes
+        steps[active] += 1
+        if steps.max() >= path_nodes.shape[1]:
+            path_nodes = np.concatenate([path_nodes, np.zeros_like(path_nodes)], axis=1)
+            path_costs = np.concatenate([path_costs, np.zeros_like(path_costs)], axis=1)
+        path_nodes[active, steps[active]] = next_nodes
+        path_costs[active, steps[active]] = step_lengths[chosen]
+        mark_visited(visited, active, next_nodes)
+        active = active[next_nodes != end]
+        if len(returned):
+            active = np.sort(np.concatenate([active, returned]))
+
+    # Длины путей — накопленные суммы весов в порядке прохождения рёбер
+    lengths = np.cumsum(path_costs, axis=1)[ants, steps]
+    lengths[lost] = np.inf
+    if counters is not None:
+        for name, value in (('steps', moves), ('edges_scored', scored), ('dead_ends', dead_ends),
+                            ('backtracks', backtracks), ('lost_ants', int(lost.sum())),
+                            ('probability_time', probability_time)):
+            counters[name] = counters.get(name, 0) + value
+    return [(path_nodes[ant, :steps[ant] + 1], lengths[ant]) for ant in range(num_ants)]
+
+
+def construct_tours(attractiveness, distances, num_ants, rng, closed=False, exploitation=0.0, local_update=None):
+    """Строит маршруты всех муравьёв по полному графу терминалов одновременно.
+
+    Муравьи выходят из терминала 0 и обходят все остальные; attractiveness и distances —
+    матрицы k x k. При closed маршрут возвращается в терминал 0. exploitation и
+    local_update — как в construct_paths (номера рёбер — индексы в развёрнутой матрице).
+    Возвращает (маршруты — массив num_ants x (k + closed) номеров терминалов, их длины).
+    """
+    k = len(distances)
+    if local_update is not None:
+        attractiveness = attractiveness.copy()
+        local_update = local_update.private_copy()
+    tours = np.zeros((num_ants, k + int(closed)), dtype=np.int64)
+    visited = np.zeros((num_ants, k), dtype=bool)
+    visited[:, 0] = True
+    rows = np.arange(num_ants)
+    columns = np.arange(k)
+
+    for step in range(1, k):
+        weights = attractiveness[tours[:, step - 1]]
+        weights[visited] = 0
+        totals = weights.sum(axis=1)
+        # Если привлекательность всех оставшихся терминалов исчезающе мала, выбираем среди них равновероятно
+        vanished = totals == 0
+        if vanished.any():
+            weights[vanished] = ~visited[vanished]
+            totals[vanished] = weights[vanished].sum(axis=1)
+
+        if exploitation > 0:
+            greedy = rng.random(num_ants) < exploitation
+        cumulative = np.cumsum(weights, axis=1)
+        target = rng.random(num_ants) * totals
+        choice = np.minimum((cumulative <= target[:, None]).sum(axis=1), k - 1)
+        # Из-за округления выбор может попасть на терминал с нулевым весом — сдвигаемся к последнему ненулевому
+        last_positive = np.maximum.accumulate(np.where(weights > 0, columns, -1), axis=1)
+        choice = last_positive[rows, choice]
+        if exploitation > 0:
+            choice = np.where(greedy, weights.argmax(axis=1), choice)
+        tours[:, step] = choice
+        visited[rows, choice] = True
+        if local_update is not None:
+            previous = tours[:, step - 1]
+            flat_attractiveness = attractiveness.reshape(-1)
+            local_update.apply(flat_attractiveness, np.concatenate([previous * k + choice, choice * k + previous]))
+
+    lengths = distances[tours[:, :-1], tours[:, 1:]].sum(axis=1)
+    return tours, lengths
@@ -0,0 +1,336 @@
+import copy
+import hashlib
+from types import SimpleNamespace
+
+import numpy as np
+
+# Феромон хранится в float32: вдвое меньше памяти, а точности хватает для выбора рёбер
+PHEROMONE_DTYPE = np.float32
+# Массивы, полностью задающие граф и его смежность (феромон и эвристика к ним не относятся)
+STRUCTURE_FIELDS = ('nodes', 'edge_u', 'edge_v', 'edge_weight', 'indptr', 'indices', 'half_edge_ids',
+                    'half_weights', '_half_keys')
+
+
+class CSRGraph:
+    """Компактное представление неориентированного графа в формате CSR.
+
+    Вершины перенумерованы в индексы 0..n-1 в порядке возрастания исходных номеров.
+    Каждое ребро хранится один раз в массивах edge_u/edge_v/edge_weight/pheromone/eta_beta,
+    а списки смежности — в виде полурёбер: соседи вершины i лежат в
+    indices[indptr[i]:indptr[i + 1]] (по возрастанию), а half_edge_ids сопоставляет
+    полуребру номер ребра.
+    """
+
+    def __init__(self, nodes, edge_u, edge_v, edge_weight):
+        self.nodes = np.asarray(nodes, dtype=np.int64)
+        self.edge_u = np.asarray(edge_u, dtype=np.int32)
+        self.edge_v = np.asarray(edge_v, dtype=np.int32)
+        self.edge_weight = np.asarray(edge_weight, dtype=np.float64)
+        self.num_nodes = len(self.nodes)
+        self.num_edges = len(self.edge_u)
+        self.pheromone = np.ones(self.num_edges, dtype=PHEROMONE_DTYPE)
+        self.beta = None
+        self.eta_beta = None
+        self._content_hash = None
+        self._build_adjacency()
+
+    @classmethod
+    def from_edges(cls, u, v, weights):
+        """Строит граф из массивов исходных номеров вершин и весов.
+
+        Повторные рёбра (в любом направлении) заменяются последним вхождением,
+        как при добавлении в nx.Graph.
+        """
+        u = np.asarray(u, dtype=np.int64)
+        v = np.asarray(v, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        # Перенумерация вершин через одну сортировку всех концов рёбер
+        ends = np.concatenate([u, v])
+        order = np.argsort(ends, kind='stable')
+        sorted_ends = ends[order]
+        is_new = np.empty(len(ends), dtype=bool)
+        is_new[:1] = True
+        np.not_equal(sorted_ends[1:], sorted_ends[:-1], out=is_new[1:])
+        nodes = sorted_ends[is_new]
+        index = np.empty(len(ends), dtype=np.int64)
+        index[order] = np.cumsum(is_new) - 1
+        ui, vi = index[:len(u)], index[len(u):]
+        lo = np.minimum(ui, vi)
+        hi = np.maximum(ui, vi)
+
+        # Оставляем последнее вхождение каждого ребра
+        keys = lo * len(nodes) + hi
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        is_last = np.empty(len(keys), dtype=bool)
+        is_last[-1:] = True
+        np.not_equal(sorted_keys[:-1], sorted_keys[1:], out=is_last[:-1])
+        keep = order[is_last]
+        return cls(nodes, lo[keep], hi[keep], weights[keep])
+
+    @classmethod
+    def from_structure(cls, arrays):
+        """Граф из массивов structure_arrays() (например, из разделяемой памяти) без перестройки
+        смежности; массивы не копируются."""
+        graph = cls.__new__(cls)
+        for field in STRUCTURE_FIELDS:
+            setattr(graph, field, arrays[field])
+        graph.num_nodes = len(graph.nodes)
+        graph.num_edges = len(graph.edge_u)
+        graph.pheromone = np.ones(graph.num_edges, dtype=PHEROMONE_DTYPE)
+        graph.beta = None
+        graph.eta_beta = None
+        graph._content_hash = None
+        return graph
+
+    def structure_arrays(self):
+        """Массивы STRUCTURE_FIELDS по именам."""
+        return {field: getattr(self, field) for field in STRUCTURE_FIELDS}
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """Строит граф из nx.Graph с атрибутом 'weight' у рёбер."""
+        nodes = np.array(sorted(graph.nodes), dtype=np.int64)
+        edges = list(graph.edges(data='weight'))
+        u = np.array([e[0] for e in edges], dtype=np.int64)
+        v = np.array([e[1] for e in edges], dtype=np.int64)
+        weights = np.array([e[2] for e in edges], dtype=np.float64)
+        ui = np.searchsorted(nodes, u)
+        vi = np.searchsorted(nodes, v)
+        return cls(nodes, np.minimum(ui, vi), np.maximum(ui, vi), weights)
+
+    def to_networkx(self):
+        """Экспортирует граф (веса и феромоны) в nx.Graph для представления."""
+        import networkx as nx
+
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes.tolist())
+        graph.add_edges_from(
+            (u, v, {'weight': w, 'pheromone': p})
+            for u, v, w, p in zip(self.nodes[self.edge_u].tolist(), self.nodes[self.edge_v].tolist(),
+                                  self.edge_weight.tolist(), self.pheromone.tolist())
+        )
+        return graph
+
+    def content_hash(self):
+        """Хэш вершин, рёбер и весов графа (для ключей кэша); пересчитывается после apply_changes."""
+        if self._content_hash is None:
+            hasher = hashlib.blake2b(digest_size=20)
+            for array in (self.nodes, self.edge_u, self.edge_v, self.edge_weight):
+                hasher.update(np.ascontiguousarray(array).data)
+            self._content_hash = hasher.hexdigest()
+        return self._content_hash
+
+    def _build_adjacency(self):
+        """Строит списки смежности из массивов рёбер (петли в смежность не попадают)."""
+        n = self.num_nodes
+        ids = np.flatnonzero(self.edge_u != self.edge_v).astype(np.int32)
+        u, v = self.edge_u[ids], self.edge_v[ids]
+        src = np.concatenate([u, v])
+        dst = np.concatenate([v, u])
+        ids = np.concatenate([ids, ids])
+
+        # Ключи полурёбер после сортировки монотонно возрастают, что позволяет искать ребро по паре вершин
+        keys = src.astype(np.int64) * n + dst
+        order = np.argsort(keys)
+        self._half_keys = keys[order]
+        self.indices = dst[order].astype(np.int32)
+        self.half_edge_ids = ids[order].astype(np.int32)
+        self.half_weights = self.edge_weight[self.half_edge_ids]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+
+    def candidate_lists(self, k):
+        """Списки кандидатов: у каждой вершины не больше k самых коротких инцидентных рёбер.
+
+        Возвращает объект с теми же массивами смежности (indptr, indices, half_edge_ids,
+        half_weights), что и у графа, поэтому построение путей работает с ним без изменений.
+        """
+        degree = np.diff(self.indptr)
+        owner = np.repeat(np.arange(self.num_nodes), degree)
+        # Внутри каждой вершины полурёбра упорядочиваются по весу
+        order = np.lexsort((self.half_weights, owner))
+        keep = order[np.arange(len(order)) - self.indptr[owner] < k]
+        indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.minimum(degree, k), out=indptr[1:])
+        return SimpleNamespace(num_nodes=self.num_nodes, k=k, indptr=indptr, indices=self.indices[keep],
+                               half_edge_ids=self.half_edge_ids[keep], half_weights=self.half_weights[keep])
+
+    def refresh_candidate_lists(self, candidates, nodes):
+        """Пересчитывает списки кандидатов (candidate_lists) только у вершин nodes.
+
+        Годится, когда менялись лишь веса рёбер: степени вершин, а значит и разметка
+        массивов кандидатов, остаются прежними, поэтому строки переписываются на месте.
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        degree = self.indptr[nodes + 1] - self.indptr[nodes]
+        owner = np.repeat(np.arange(len(nodes)), degree)
+        half = np.arange(degree.sum()) - np.repeat(np.cumsum(degree) - degree - self.indptr[nodes], degree)
+        order = np.lexsort((self.half_weights[half], owner))
+        rank = np.arange(len(order)) - (np.cumsum(degree) - degree)[owner]
+        keep = rank < candidates.k
+        target = candidates.indptr[nodes][owner[keep]] + rank[keep]
+        half = half[order[keep]]
+        candidates.indices[target] = self.indices[half]
+        candidates.half_edge_ids[target] = self.half_edge_ids[half]
+        candidates.half_weights[target] = self.half_weights[half]
+
+    def set_heuristic(self, beta):
+        """Пересчитывает эвристику eta^beta для всех рёбер (eta = 1 / вес)."""
+        self.beta = beta
+        self.eta_beta = _heuristic(self.edge_weight, beta)
+
+    def apply_changes(self, u, v, weights, removed_u=(), removed_v=()):
+        """Применяет пакет изменений рёбер, сохраняя феромон и нумерацию вершин.
+
+        Рёбра (u[i], v[i]) получают вес weights[i]; отсутствующие в графе добавляются.
+        Рёбра (removed_u[i], removed_v[i]) удаляются. Вершины задаются исходными номерами
+        и должны существовать: новые вершины появляются только при загрузке графа.
+        Если менялись только веса, массивы и эвристика обновляются на месте у затронутых
+        рёбер; при добавлении или удалении рёбер перестраиваются списки смежности
+        (без раскладки), а феромон и эвристика остальных рёбер переносятся.
+
+        Феромон на изменённых рёбрах и на всех рёбрах их концов выравнивается до
+        среднего уровня по графу: старый след рядом с изменением больше не указывает
+        на лучший путь, и муравьи заново исследуют окрестность.
+
+        Возвращает объект с массивами изменённых рёбер (u, v — индексы вершин,
+        old_weight и new_weight, inf у добавленных и удалённых), затронутыми вершинами
+        nodes и edge_map — новым номером каждого старого ребра (-1 у удалённых;
+        None, если рёбра не добавлялись и не удалялись).
+        """
+        ui, vi = self._indices_of(u), self._indices_of(v)
+        weights = np.asarray(weights, dtype=np.float64)
+        ri, rv = self._indices_of(removed_u), self._indices_of(removed_v)
+        if len(weights) != len(ui) or len(ri) != len(rv):
+            raise ValueError("Длины массивов изменений рёбер не совпадают.")
+        if (weights < 0).any():
+            raise ValueError("Вес ребра не может быть отрицательным.")
+        # Петли не входят в списки смежности и в пути муравьёв, поэтому не учитываются
+        loop = ui == vi
+        ui, vi, weights = ui[~loop], vi[~loop], weights[~loop]
+        ri, rv = ri[ri != rv], rv[ri != rv]
+
+        removed = np.unique(self.edge_ids(ri, rv))
+        if len(removed) and removed[0] < 0:
+            missing = int(np.flatnonzero(self.edge_ids(ri, rv) < 0)[0])
+            raise ValueError(f"Ребра {self.nodes[ri[missing]]}-{self.nodes[rv[missing]]} нет в графе.")
+        ids = self.edge_ids(ui, vi)
+        if np.isin(ids, removed).any():
+            raise ValueError("Одно и то же ребро нельзя одновременно изменить и удалить.")
+
+        # Повторные изменения одного ребра: как и в from_edges, действует последнее
+        keys = np.minimum(ui, vi) * self.num_nodes + np.maximum(ui, vi)
+        _, last = np.unique(keys[::-1], return_index=True)
+        last = np.sort(len(keys) - 1 - last)
+        ui, vi, weights, ids = ui[last], vi[last], weights[last], ids[last]
+        updated, added = ids >= 0, ids < 0
+        added_u, added_v = np.minimum(ui, vi)[added], np.maximum(ui, vi)[added]
+
+        level = self.pheromone.mean() if self.num_edges else 1.0
+        changes = SimpleNamespace(
+            u=np.concatenate([self.edge_u[ids[updated]], added_u, self.edge_u[removed]]),
+            v=np.concatenate([self.edge_v[ids[updated]], added_v, self.edge_v[removed]]),
+            old_weight=np.concatenate([self.edge_weight[ids[updated]], np.full(len(added_u), np.inf),
+                                       self.edge_weight[removed]]),
+            new_weight=np.concatenate([weights[updated], weights[added], np.full(len(removed), np.inf)]),
+            edge_map=None,
+        )
+        changes.nodes = np.unique(np.concatenate([changes.u, changes.v]).astype(np.int64))
+
+        self._content_hash = None
+        self.edge_weight[ids[updated]] = weights[updated]
+        if self.eta_beta is not None:
+            self.eta_beta[ids[updated]] = _heuristic(weights[updated], self.beta)
+        if len(added_u) or len(removed):
+            keep = np.ones(self.num_edges, dtype=bool)
+            keep[removed] = False
+            changes.edge_map = np.where(keep, np.cumsum(keep) - 1, -1)
+            self._replace_edges(keep, added_u, added_v, weights[added], level)
+        else:
+            u, v = changes.u.astype(np.int64), changes.v.astype(np.int64)
+            half = np.searchsorted(self._half_keys, np.concatenate([u * self.num_nodes + v, v * self.num_nodes + u]))
+            self.half_weights[half] = self.edge_weight[self.half_edge_ids[half]]
+
+        # Выравнивание феромона в окрестности изменений
+        first = self.indptr[changes.nodes]
+        degree = self.indptr[changes.nodes + 1] - first
+        half = np.arange(degree.sum()) - np.repeat(np.cumsum(degree) - degree - first, degree)
+        self.pheromone[self.half_edge_ids[half]] = level
+        return changes
+
+    def _indices_of(self, nodes):
+        """Индексы вершин по исходным номерам; ValueError, если какой-то вершины нет в графе."""
+        nodes = np.asarray(nodes, dtype=np.int64).reshape(-1)
+        index = np.minimum(np.searchsorted(self.nodes, nodes), max(self.num_nodes - 1, 0))
+        missing = self.nodes[index] != nodes if self.num_nodes else np.ones(len(nodes), dtype=bool)
+        if missing.any():
+            raise ValueError(f"Вершина {nodes[missing][0]} не существует в графе; "
+                             f"новые вершины добавляются только загрузкой графа.")
+        return index
+
+    def _replace_edges(self, keep, u, v, weights, pheromone):
+        """Оставляет рёбра с keep, дописывает новые (u, v, weights) и перестраивает смежность."""
+        self.edge_u = np.concatenate([self.edge_u[keep], u]).astype(np.int32)
+        self.edge_v = np.concatenate([self.edge_v[keep], v]).astype(np.int32)
+        self.edge_weight = np.concatenate([self.edge_weight[keep], weights])
+        self.pheromone = np.concatenate([self.pheromone[keep], np.full(len(u), pheromone, dtype=PHEROMONE_DTYPE)])
+        if self.eta_beta is not None:
+            self.eta_beta = np.concatenate([self.eta_beta[keep], _heuristic(weights, self.beta)])
+        self.num_edges = len(self.edge_u)
+        self._build_adjacency()
+
+    def colony_copy(self):
+        """Копия графа для отдельной колонии: массивы структуры и весов общие, феромон свой.
+
+        Эвристика (set_heuristic) тоже станет своей — она заменяется новым массивом.
+        Изменения графа (apply_changes) к копиям не применяются.
+        """
+        graph = copy.copy(self)
+        graph.pheromone = self.pheromone.copy()
+        return graph
+
+    def reset_pheromones(self, value=1.0):
+        """Задаёт одинаковый уровень феромона на всех рёбрах."""
+        self.pheromone.fill(value)
+
+    def has_node(self, node):
+        i = np.searchsorted(self.nodes, node)
+        return i < self.num_nodes and self.nodes[i] == node
+
+    def node_index(self, node):
+        """Возвращает индекс вершины по её исходному номеру."""
+        if not self.has_node(node):
+            raise KeyError(f"Вершина {node} не существует в графе.")
+        return int(np.searchsorted(self.nodes, node))
+
+    def neighbors(self, i):
+        """Возвращает (соседи, номера рёбер) вершины с индексом i."""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.half_edge_ids[start:end]
+
+    def edge_ids(self, u, v):
+        """Возвращает номера рёбер для массивов индексов концов; -1, если ребра нет."""
+        keys = np.asarray(u, dtype=np.int64) * self.num_nodes + np.asarray(v, dtype=np.int64)
+        if not len(self._half_keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._half_keys, keys), len(self._half_keys) - 1)
+        return np.where(self._half_keys[pos] == keys, self.half_edge_ids[pos], -1)
+
+    def path_edges(self, path):
+        """Номера рёбер вдоль пути, заданного индексами вершин."""
+        path = np.asarray(path, dtype=np.int64)
+        return self.edge_ids(path[:-1], path[1:])
+
+    def path_length(self, path):
+        """Длина пути, заданного индексами вершин."""
+        return float(self.edge_weight[self.path_edges(path)].sum())
+
+
+def _heuristic(weights, beta):
+    """eta^beta для массива весов (eta = 1 / вес)."""
+    eta = np.full(len(weights), 1e-10)  # Защита от деления на 0
+    positive = weights > 0
+    eta[positive] = 1.0 / weights[positive]
+    return eta ** beta
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+CACHE_SUFFIX = '.acocache'
+CACHE_VERSION = 1
+HASH_BLOCK_BYTES = 16 * 1024 * 1024
+
+
+def file_hash(file_name):
+    """Хэш содержимого файла (blake2b), читается порциями."""
+    hasher = hashlib.blake2b()
+    with open(file_name, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_BYTES), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class GraphCache:
+    """Двоичный кэш графа в каталоге рядом с исходным файлом (<файл>.acocache).
+
+    Хранит рёбра (edges.bin — int64, по три числа на ребро), координаты вершин
+    (positions.npy вместе с nodes.npy) и meta.json с хэшем содержимого исходного файла.
+    Все массивы открываются через отображение в память. Кэш считается актуальным,
+    пока хэш файла совпадает с сохранённым; размер и время изменения файла
+    проверяются первыми, чтобы не читать файл при каждой загрузке.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.directory = file_name + CACHE_SUFFIX
+        self.meta = None
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self):
+        try:
+            with open(self.path('meta.json'), 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('version') == CACHE_VERSION else None
+
+    def _write_meta(self, meta):
+        temp_name = self.path('meta.json.tmp')
+        with open(temp_name, 'w', encoding='utf-8') as file:
+            json.dump(meta, file)
+        os.replace(temp_name, self.path('meta.json'))
+        self.meta = meta
+
+    def _file_stamp(self):
+        stat = os.stat(self.file_name)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def is_valid(self):
+        """Проверяет, соответствует ли кэш текущему содержимому файла."""
+        meta = self._read_meta()
+        if meta is None:
+            return False
+        stamp = self._file_stamp()
+        if all(meta.get(key) == value for key, value in stamp.items()):
+            self.meta = meta
+            return True
+        if meta.get('size') != stamp['size'] or meta.get('hash') != file_hash(self.file_name):
+            return False
+        # Файл перезаписан тем же содержимым — обновляем отметку времени
+        try:
+            self._write_meta({**meta, **stamp})
+        except OSError:
+            self.meta = meta
+        return True
+
+    def content_hash(self):
+        """Хэш исходного файла, с которым согласован кэш."""
+        return self.meta['hash'] if self.meta is not None else None
+
+    def load_edges(self):
+        """Возвращает массивы (u, v, вес), отображённые в память."""
+        num_edges = self.meta['num_edges']
+        if num_edges == 0:
+            edges = np.zeros((0, 3), dtype=np.int64)
+        else:
+            edges = np.memmap(self.path('edges.bin'), dtype=np.int64, mode='r', shape=(num_edges, 3))
+        return edges[:, 0], edges[:, 1], edges[:, 2]
+
+    def open_writer(self):
+        """Начинает запись рёбер в кэш; возвращает None, если каталог кэша недоступен."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            return _EdgeWriter(self)
+        except OSError:
+            return None
+
+    def load_positions(self, nodes):
+        """Координаты вершин (массив n x 2) или None, если они не сохранены для этих вершин."""
+        try:
+            cached_nodes = np.load(self.path('nodes.npy'), mmap_mode='r')
+            positions = np.load(self.path('positions.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if len(cached_nodes) != len(nodes) or not np.array_equal(cached_nodes, nodes):
+            return None
+        return np.array(positions)
+
+    def save_positions(self, nodes, positions):
+        """Сохраняет координаты вершин; ошибки записи не мешают работе."""
+        try:
+            np.save(self.path('nodes.npy'), np.asarray(nodes))
+            np.save(self.path('positions.npy'), np.asarray(positions, dtype=np.float64))
+        except OSError:
+            pass
+
+
+class _EdgeWriter:
+    """Потоковая запись рёбер в edges.bin с фиксацией meta.json в конце."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.temp_name = cache.path('edges.bin.tmp')
+        if os.path.exists(cache.path('meta.json')):
+            os.remove(cache.path('meta.json'))  # Кэш недействителен, пока запись не завершена
+        self.file = open(self.temp_name, 'wb')
+        self.num_edges = 0
+
+    def write(self, edges):
+        np.ascontiguousarray(edges, dtype=np.int64).tofile(self.file)
+        self.num_edges += len(edges)
+
+    def commit(self, content_hash):
+        self.file.close()
+        os.replace(self.temp_name, self.cache.path('edges.bin'))
+        # Прежние координаты относятся к старому содержимому файла
+        for name in ('nodes.npy', 'positions.npy'):
+            if os.path.exists(self.cache.path(name)):
+                os.remove(self.cache.path(name))
+        self.cache._write_meta({'version': CACHE_VERSION, 'hash': content_hash, 'num_edges': self.num_edges,
+                                **self.cache._file_stamp()})
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.temp_name)
@@ -0,0 +1,100 @@
+"""Синтетические графы для замеров производительности.
+
+Каждый генератор детерминирован при заданном seed и возвращает массивы
+(u, v, weights) в том же виде, что и load_edge_list, — их можно сразу
+передать в CSRGraph.from_edges. Веса рёбер — целые числа, как в файлах графов.
+"""
+import numpy as np
+
+
+def grid_graph(side, seed=None, max_weight=100):
+    """Квадратная решётка side x side со случайными весами 1..max_weight."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(side * side, dtype=np.int64).reshape(side, side)
+    u = np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()])
+    v = np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()])
+    return u, v, rng.integers(1, max_weight + 1, len(u))
+
+
+def random_geometric_graph(num_nodes, average_degree=8, seed=None, scale=1000):
+    """Случайный геометрический граф: точки в единичном квадрате, рёбра между точками ближе радиуса r.
+
+    Радиус подбирается под среднюю степень, вес ребра — расстояние, умноженное
+    на scale и округлённое вверх. Пары ищутся по сетке с ячейкой r: сравниваются
+    только точки из соседних ячеек, поэтому построение стоит O(n + m).
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.random((num_nodes, 2))
+    radius = np.sqrt(average_degree / (np.pi * num_nodes))
+    cells_per_side = max(int(1.0 / radius), 1)
+    cells = np.minimum((points * cells_per_side).astype(np.int64), cells_per_side - 1)
+    cell_ids = cells[:, 0] * cells_per_side + cells[:, 1]
+    order = np.argsort(cell_ids, kind='stable')
+    counts = np.bincount(cell_ids, minlength=cells_per_side * cells_per_side)
+    starts = np.cumsum(counts) - counts
+
+    us, vs = [], []
+    # Каждая пара соседних ячеек рассматривается один раз: сама ячейка и четыре соседа «вперёд»
+    for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+        x, y = np.divmod(np.arange(cells_per_side * cells_per_side), cells_per_side)
+        inside = (x + dx < cells_per_side) & (y + dy >= 0) & (y + dy < cells_per_side)
+        a = (x * cells_per_side + y)[inside]
+        b = ((x + dx) * cells_per_side + y + dy)[inside]
+        pairs = counts[a] * counts[b]
+        # Все пары точек (i из ячейки a, j из ячейки b) без циклов Python
+        pair_cell = np.repeat(np.arange(len(a)), pairs)
+        within = np.arange(len(pair_cell)) - np.repeat(np.cumsum(pairs) - pairs, pairs)
+        i = order[starts[a[pair_cell]] + within // counts[b[pair_cell]]]
+        j = order[starts[b[pair_cell]] + within % counts[b[pair_cell]]]
+        keep = (i < j) if (dx, dy) == (0, 0) else np.ones(len(i), dtype=bool)
+        i, j = i[keep], j[keep]
+        close = ((points[i] - points[j]) ** 2).sum(axis=1) <= radius * radius
+        us.append(i[close])
+        vs.append(j[close])
+
+    u, v = np.concatenate(us), np.concatenate(vs)
+    distance = np.sqrt(((points[u] - points[v]) ** 2).sum(axis=1))
+    return u, v, np.maximum(np.ceil(distance * scale), 1).astype(np.int64)
+
+
+def scale_free_graph(num_nodes, edges_per_node=4, seed=None, max_weight=100):
+    """Безмасштабный граф с предпочтительным присоединением (модель Барабаши–Альберт).
+
+    Каждая новая вершина соединяется с edges_per_node уже существующими,
+    выбранными с вероятностью, пропорциональной степени. Выбор «случайный конец
+    случайного уже построенного ребра» эквивалентен выбору по степени и
+    векторизуется: второй конец ребра k копирует случайный конец с меньшим номером,
+    цепочки копирований разрешаются перескоками по указателям. Кратные рёбра и
+    петли, которые изредка возникают, отбрасываются при построении CSRGraph.
+    """
+    rng = np.random.default_rng(seed)
+    m = edges_per_node
+    num_new = max(num_nodes - m - 1, 0)
+    # Затравка — полный граф на m + 1 вершинах
+    seed_u, seed_v = np.triu_indices(m + 1, k=1)
+    seed_ends = np.column_stack([seed_u, seed_v]).ravel()
+
+    # ends[2k] — новая вершина ребра k, ends[2k + 1] — копия случайного более раннего конца
+    num_seed = len(seed_ends)
+    total = num_seed + 2 * m * num_new
+    ends = np.empty(total, dtype=np.int64)
+    ends[:num_seed] = seed_ends
+    positions = np.arange(num_seed, total)
+    new_node = m + 1 + (positions - num_seed) // (2 * m)
+    is_source = (positions - num_seed) % 2 == 0
+    ends[positions[is_source]] = new_node[is_source]
+    # Копировать можно только концы рёбер предыдущих вершин
+    first_of_node = num_seed + (new_node - m - 1) * 2 * m
+    pointer = np.arange(total)
+    targets = positions[~is_source]
+    pointer[targets] = (rng.random(len(targets)) * first_of_node[~is_source]).astype(np.int64)
+
+    unresolved = targets
+    while len(unresolved):
+        pointer[unresolved] = pointer[pointer[unresolved]]
+        unresolved = unresolved[pointer[unresolved] >= num_seed]
+        unresolved = unresolved[(pointer[unresolved] - num_seed) % 2 == 1]
+    ends[targets] = ends[pointer[targets]]
+
+    u, v = ends[0::2], ends[1::2]
+    return u, v, rng.integers(1, max_weight + 1, len(u))
@@ -0,0 +1,161 @@
+import hashlib
+import io
+
+import numpy as np
+
+from app.model.graph_cache import GraphCache
+
+CHUNK_BYTES = 16 * 1024 * 1024  # Файл читается порциями, поэтому расход памяти не зависит от его размера
+
+_NEWLINE = ord('\n')
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b' \t\r\n\v\f')] = True
+
+
+def _parse_line(line, line_number):
+    """Разбирает одну строку файла так же, как построчный разбор; возвращает [u, v, вес]."""
+    parts = line.split()
+    if len(parts) != 3:
+        raise ValueError(
+            f"Неверное количество элементов в строке {line_number}: {line.strip()}. Ожидается 3 целочисленных элемента в каждой строке.")
+    try:
+        return list(map(int, parts))
+    except ValueError:
+        raise ValueError(f"Некорректные данные в строке {line_number}: {line.strip()}. Ожидаются целые числа.")
+
+
+def _parse_lines(data, first_line_number):
+    """Построчный разбор порции — запасной путь, когда быстрый разбор не справился.
+
+    Принимает всё, что принимал построчный загрузчик (например, цифры и пробелы Unicode),
+    а при ошибке формата выбрасывает ValueError с номером и текстом неверной строки.
+    """
+    lines = data.decode('utf-8', errors='replace').split('\n')[:-1]
+    rows = [_parse_line(line, first_line_number + offset) for offset, line in enumerate(lines)]
+    return np.array(rows, dtype=np.int64).reshape(-1, 3), len(lines)
+
+
+def parse_chunk(data, first_line_number):
+    """Разбирает порцию целых строк «u v вес» в массив рёбер формы (k, 3).
+
+    Количество элементов в строках проверяется по байтам без цикла по строкам,
+    числа разбираются одним вызовом np.loadtxt. Если так разобрать порцию не удалось,
+    она разбирается построчно (_parse_lines): ошибка формата — ValueError с номером
+    и текстом первой неверной строки.
+    """
+    if not data.endswith(b'\n'):
+        data += b'\n'
+    raw = np.frombuffer(data, dtype=np.uint8)
+    newline = raw == _NEWLINE
+    space = _WHITESPACE[raw]
+    token_start = ~space
+    token_start[1:] &= space[:-1]
+    line_of_byte = np.cumsum(newline) - newline
+    counts = np.bincount(line_of_byte[token_start], minlength=int(newline.sum()))
+
+    if (counts == 3).all():
+        try:
+            return np.loadtxt(io.BytesIO(data), dtype=np.int64, comments=None, ndmin=2), len(counts)
+        except ValueError:
+            pass
+    return _parse_lines(data, first_line_number)
+
+
+def iter_edge_chunks(file_name, chunk_bytes=CHUNK_BYTES, hasher=None):
+    """Потоково читает файл графа и выдаёт массивы рёбер (k, 3) по порциям.
+
+    Порция обрезается по последнему переводу строки, остаток переносится в следующую.
+    Если передан hasher, через него пропускается всё содержимое файла.
+    """
+    line_number = 1
+    rest = b''
+    with open(file_name, 'rb') as file:
+        while True:
+            block = file.read(chunk_bytes)
+            if hasher is not None:
+                hasher.update(block)
+            if not block:
+                break
+            data = rest + block
+            cut = data.rfind(b'\n') + 1
+            data, rest = data[:cut], data[cut:]
+            if data:
+                edges, num_lines = parse_chunk(data, line_number)
+                line_number += num_lines
+                yield edges
+    if rest:
+        yield parse_chunk(rest, line_number)[0]
+
+
+def read_edge_list(file_name, chunk_bytes=CHUNK_BYTES):
+    """Читает граф из текстового файла со строками «u v вес» и проверяет формат.
+
+    Возвращает массивы (u, v, вес). При ошибке формата выбрасывает ValueError
+    с номером и текстом проблемной строки.
+    """
+    chunks = list(iter_edge_chunks(file_name, chunk_bytes))
+    edges = np.concatenate(chunks) if chunks else np.zeros((0, 3), dtype=np.int64)
+    return edges[:, 0], edges[:, 1], edges[:, 2]
+
+
+def load_edge_list(file_name, use_cache=True):
+    """Загружает рёбра графа, по возможности из двоичного кэша рядом с файлом.
+
+    Возвращает (u, v, вес, кэш). Если кэш актуален (совпадает хэш содержимого файла),
+    массивы отображаются в память без разбора текста. Иначе файл разбирается потоково,
+    рёбра сразу дописываются в кэш, и возвращаются уже его массивы. Если кэш записать
+    нельзя (например, каталог только для чтения), кэш равен None.
+    """
+    cache = GraphCache(file_name) if use_cache else None
+    if cache is not None and cache.is_valid():
+        return (*cache.load_edges(), cache)
+
+    writer = cache.open_writer() if cache is not None else None
+    if writer is None:
+        return (*read_edge_list(file_name), None)
+
+    hasher = hashlib.blake2b()
+    try:
+        for edges in iter_edge_chunks(file_name, hasher=hasher):
+            writer.write(edges)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit(hasher.hexdigest())
+    return (*cache.load_edges(), cache)
+
+
+def read_edge_changes(file_name):
+    """Читает пакет изменений рёбер для CSRGraph.apply_changes.
+
+    Строка «u v вес» задаёт новый вес ребра (или добавляет ребро), строка «u v -»
+    удаляет ребро. Вес — неотрицательное число, не обязательно целое: так задаются,
+    например, времена проезда с учётом пробок. Пустые строки пропускаются.
+    Возвращает (u, v, веса, удаляемые u, удаляемые v).
+    """
+    changed_u, changed_v, weights, removed_u, removed_v = [], [], [], [], []
+    with open(file_name, encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            parts = line.split()
+            if not parts:
+                continue
+            if len(parts) != 3:
+                raise ValueError(
+                    f"Неверное количество элементов в строке {line_number}: {line.strip()}. Ожидается «u v вес» или «u v -».")
+            try:
+                u, v = int(parts[0]), int(parts[1])
+                if parts[2] == '-':
+                    removed_u.append(u)
+                    removed_v.append(v)
+                    continue
+                weight = float(parts[2])
+            except ValueError:
+                raise ValueError(f"Некорректные данные в строке {line_number}: {line.strip()}. Ожидаются числа.")
+            if not weight >= 0:
+                raise ValueError(f"Некорректный вес в строке {line_number}: {line.strip()}. Вес не может быть отрицательным.")
+            changed_u.append(u)
+            changed_v.append(v)
+            weights.append(weight)
+    return (np.array(changed_u, dtype=np.int64), np.array(changed_v, dtype=np.int64),
+            np.array(weights, dtype=np.float64), np.array(removed_u, dtype=np.int64),
+            np.array(removed_v, dtype=np.int64))
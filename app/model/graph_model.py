@@ -1,14 +1,17 @@
-import networkx as nx
-import pyqtgraph as pg
-import random
 import math
-from PyQt5.QtWidgets import QApplication
+import tempfile
+from app.model.instrumentation import Instrumentation
+from app.model.island_model import IslandModel
+from app.model.snapshot_log import SnapshotLog
+from app.model.solve_cache import SolveCache, default_cache_directory
+from app.model.tour_solver import create_solver
 from app.view.window_view import GraphWindow
 
 class GraphModel:
     def __init__(self, controller):
-        self.graph = None
-        self.positions = {}
+        self.csr = None  # Граф в CSR-представлении
+        self.solver = None  # Решатель последнего запуска (для тёплого перезапуска после изменения рёбер)
+        self.positions = None  # Координаты вершин (массив n x 2 в порядке индексов CSR-графа)
         self.start_node = None
         self.end_nodes = set()
         self.controller = controller
@@ -19,19 +22,50 @@ class GraphModel:
         self.beta = None
         self.num_ants = None
         self.num_iterations = 20
+        self.stagnation_window = None  # Остановка, если лучший путь не улучшался столько итераций
+        self.min_branching = None  # Остановка при сходимости феромона (коэффициент ветвления)
+        self.time_limit = None  # Ограничение времени работы алгоритма в секундах
+        self.target_length = None  # Остановка, как только найден путь не длиннее
+        self.strategy = 'as'  # Стратегия обновления феромона (pheromone_update.STRATEGIES)
+        self.num_candidates = None  # Размер списков кандидатов (None — все соседи)
+        self.local_search_ants = 0  # Сколько лучших муравьёв итерации улучшать локальным поиском
+        self.max_backtracks = 0  # Сколько раз муравей может отступить из тупика
         self.best_path = None
         self.best_length = math.inf
         self.min_pheromone = 0.1
+        self.batch_ants = True  # Все муравьи итерации строят пути одновременно
+        self.num_workers = 1  # Количество процессов для построения путей
+        self.seed = None
+        self.num_islands = 1  # Колоний островной модели (1 — одна колония)
+        self.migration_interval = 10  # Итераций между обменами колоний
+        self.migration = 'best'  # Способ обмена (island_model.MIGRATIONS)
+        self.blend_rate = 0.1  # Доля чужого феромона при обмене смешиванием
+        self.closed_tour = False  # Возвращаться ли в начальную точку после обхода конечных
+        self.max_fps = 30  # Максимальная частота перерисовки во время работы алгоритма
+        self.edge_label_limit = 300  # Подписи рёбер скрываются, если их в видимой области больше
+        self.node_label_limit = 300  # То же для вершин; на графах больше — мелкие вершины
+        self.cache = SolveCache(default_cache_directory())  # Кэш результатов и производных данных графа
+        self.instrumentation = Instrumentation()  # Таймеры этапов и счётчики решателя и отрисовки
+        self.profiling = False  # Включать ли семплирующий профилировщик на время запуска
+        self.record_history = False  # Записывать ли снимки итераций для просмотра после запуска
+        self.snapshot_log = None  # Журнал, в который пишет текущий запуск
+        self.history = None  # Журнал последнего запуска, открытый для чтения
+        self._history_directory = None
 
     def setup_connections(self):
         """Связывает сигналы интерфейса с действиями контроллера."""
         self.view.start_node_combo.currentIndexChanged.connect(self.controller.update_start_node)
         self.view.set_end_nodes_button.clicked.connect(self.controller.update_end_nodes)
         self.view.set_param_button.clicked.connect(self.controller.set_parameters)
+        self.view.strategy_combo.currentIndexChanged.connect(self.controller.update_strategy)
         self.view.load_button.clicked.connect(self.controller.load_graph)
         self.view.start_button.clicked.connect(self.controller.start_algorithm)
         self.view.stop_button.clicked.connect(self.controller.stop_algorithm)
+        self.view.pause_button.clicked.connect(self.controller.pause_algorithm)
         self.view.reset_button.clicked.connect(self.controller.reset_graph)
+        self.view.changes_button.clicked.connect(self.controller.apply_edge_changes)
+        self.view.trace_button.clicked.connect(self.controller.export_trace)
+        self.view.history_slider.valueChanged.connect(self.controller.show_snapshot)
 
     def set_view(self):
         self.view = GraphWindow(self)
@@ -39,105 +73,101 @@ class GraphModel:
         return self.view
 
     def graph_to_view(self, nodes):
+        self.view.build_scene()
         self.view.update_start_node_combo(nodes)
-        self.view.update_canvas()
-
-    def initialize_pheromones(self):
-        """Инициализация феромонов для всех рёбер графа."""
-        for u, v in self.graph.edges:
-            self.graph[u][v]['pheromone'] = 1.0
-
-    def calculate_path_length(self, path):
-        """Вычисляет длину пути."""
-        return sum(self.graph[u][v]['weight'] for u, v in zip(path, path[1:]))
-
-    def generate_ant_path(self):
-        """Генерация пути для одного муравья."""
-        current_node = self.start_node
-        path = [current_node]
-        visited_nodes = {current_node}
-        end_node = next(iter(self.end_nodes))  # Предполагаем, что пока только одна конечная вершина
-
-        while current_node != end_node:
-            neighbors = list(self.graph.neighbors(current_node))
-            probabilities = self.calculate_probabilities(current_node, neighbors, visited_nodes)
-
-            if not probabilities:  # Если нет доступных узлов, тупик
-                return path, float('inf')
-
-            next_node = random.choices(neighbors, weights=probabilities)[0]
-            path.append(next_node)
-            visited_nodes.add(next_node)
-            current_node = next_node
-
-        path_length = self.calculate_path_length(path)
-        return path, path_length
-
-    def calculate_probabilities(self, current_node, neighbors, visited_nodes):
-        """Рассчитывает вероятности перехода к соседним узлам."""
-        probabilities = []
-        for neighbor in neighbors:
-            if neighbor in visited_nodes:
-                probabilities.append(0)
-            else:
-                pheromone = self.graph[current_node][neighbor]['pheromone']
-                distance = self.graph[current_node][neighbor]['weight']
-                eta = 1 / distance if distance > 0 else 1e-10  # Защита от деления на 0
-                probabilities.append((pheromone ** self.alpha) * (eta ** self.beta))
-
-        total = sum(probabilities)
-        if total == 0:
-            return []
-        return [p / total for p in probabilities]
-
-    def update_pheromones(self, all_paths):
-        """Обновляет феромоны на основе пройденных путей."""
-        # Шаг 1: Испарение феромонов
-        for u, v in self.graph.edges():
-            self.graph[u][v]['pheromone'] *= (1 - self.evaporation_rate)
-            if self.graph[u][v]['pheromone'] < self.min_pheromone:
-                self.graph[u][v]['pheromone'] = self.min_pheromone
-
-        # Шаг 2: Обновление феромонов
-        for path, path_length in all_paths:
-            if path_length == float('inf'):
-                continue
-            pheromone_contribution = self.pheromone_intensity / path_length
-            for u, v in zip(path, path[1:]):
-                self.graph[u][v]['pheromone'] += pheromone_contribution
-
-    def run_aco(self):
-        """Запуск муравьиного алгоритма."""
-        if self.graph is None or self.start_node is None or not self.end_nodes:
+
+    def set_graph(self, csr, positions):
+        """Задаёт граф (CSRGraph) и координаты его вершин."""
+        self.csr = csr
+        self.positions = positions
+        self.solver = None
+        self.best_path = None
+        self.best_length = math.inf
+        self.clear_history()
+
+    def solver_parameters(self):
+        """Параметры решателя из модели (имена совпадают с атрибутами ACOSolver)."""
+        return dict(alpha=self.alpha, beta=self.beta, evaporation_rate=self.evaporation_rate,
+                    pheromone_intensity=self.pheromone_intensity, num_ants=self.num_ants,
+                    num_iterations=self.num_iterations, min_pheromone=self.min_pheromone,
+                    batch_ants=self.batch_ants, num_workers=self.num_workers, seed=self.seed,
+                    stagnation_window=self.stagnation_window, min_branching=self.min_branching,
+                    time_limit=self.time_limit, target_length=self.target_length, strategy=self.strategy,
+                    num_candidates=self.num_candidates, local_search_ants=self.local_search_ants,
+                    max_backtracks=self.max_backtracks, cache=self.cache, instrumentation=self.instrumentation,
+                    snapshot_log=self.snapshot_log)
+
+    def create_solver(self, warm=False):
+        """Создаёт решатель с текущими параметрами модели (при num_islands > 1 — IslandModel).
+
+        При warm возвращается решатель прошлого запуска с обновлёнными параметрами, если он
+        подходит (тот же граф, вид маршрута и стратегия): его феромон и состояние стратегии
+        нужны для тёплого старта.
+        """
+        parameters = self.solver_parameters()
+        if self.num_islands > 1:
+            solver = IslandModel(self.csr, self.end_nodes, self.closed_tour, self.num_islands, self.migration_interval,
+                                 self.migration, self.blend_rate, **parameters)
+        else:
+            solver = create_solver(self.csr, self.end_nodes, self.closed_tour, **parameters)
+        previous = self.solver
+        if (warm and previous is not None and previous.csr is self.csr and type(previous) is type(solver)
+                and getattr(previous, 'closed', None) == getattr(solver, 'closed', None)
+                and previous.strategy.name == self.strategy):
+            del parameters['strategy']
+            for name, value in parameters.items():
+                setattr(previous, name, value)
+            solver = previous
+        self.solver = solver
+        return solver
+
+    def start_history(self):
+        """Готовит журнал снимков для нового запуска (во временном каталоге), если запись включена."""
+        self.clear_history()
+        if self.record_history:
+            self._history_directory = tempfile.TemporaryDirectory(prefix='aco-history-')
+            self.snapshot_log = SnapshotLog.create(self._history_directory.name, self.csr)
+
+    def finish_history(self):
+        """Закрывает журнал завершённого запуска и открывает его для просмотра; возвращает его или None."""
+        if self.snapshot_log is None:
+            return None
+        self.snapshot_log.close()
+        self.snapshot_log = None
+        self.history = SnapshotLog.open(self._history_directory.name)
+        return self.history if len(self.history) else None
+
+    def clear_history(self):
+        """Удаляет журнал снимков прошлого запуска."""
+        for log in (self.snapshot_log, self.history):
+            if log is not None:
+                log.close()
+        self.snapshot_log = self.history = None
+        if self._history_directory is not None:
+            self._history_directory.cleanup()
+            self._history_directory = None
+
+    def apply_edge_changes(self, u, v, weights, removed_u, removed_v):
+        """Применяет изменения рёбер к загруженному графу (CSRGraph.apply_changes) и сообщает о них решателю.
+
+        Снимки прошлого запуска относятся к прежнему графу и удаляются.
+        """
+        self.clear_history()
+        changes = self.csr.apply_changes(u, v, weights, removed_u, removed_v)
+        if self.solver is not None:
+            self.solver.graph_changed(changes)
+        return changes
+
+    def sync_view(self, pheromone=None, path=None):
+        """Перерисовывает представление по феромонам (по умолчанию текущим из CSR-графа).
+
+        path — лучший путь для подсветки (индексы вершин CSR-графа, пустой — убрать подсветку).
+        """
+        self.view.update_canvas(self.csr.pheromone if pheromone is None else pheromone, path)
+
+    def check_ready(self):
+        """Проверяет, можно ли запускать алгоритм, и сообщает об ошибке."""
+        if self.csr is None or self.start_node is None or not self.end_nodes:
             self.controller.show_error_message("Ошибка", "Граф, начальная или конечная вершина не заданы.")
-            return
-
-        self.initialize_pheromones()
-
-        for iteration in range(self.num_iterations):
-            all_paths = []
-            for _ in range(self.num_ants):
-                path, path_length = self.generate_ant_path()
-                all_paths.append((path, path_length))
-
-            # Определение лучшего пути в этой итерации
-            for path, path_length in all_paths:
-                if path_length < self.best_length:
-                    self.best_length = path_length
-                    self.best_path = path
-
-            # Обновление феромонов
-            self.update_pheromones(all_paths)
-
-            # Визуализация процесса
-            self.view.update_canvas()
-            QApplication.processEvents()
-
-        # Итоговая визуализация лучшего пути
-        if self.best_path:
-            for u, v in zip(self.best_path, self.best_path[1:]):
-                if self.graph.has_edge(u, v):
-                    self.graph[u][v]['pheromone'] += 2 * self.pheromone_intensity / self.best_length
-            self.view.update_canvas()
-            self.controller.model.view.status_bar.showMessage(
-                f"Лучший путь: {self.best_path}, длина: {self.best_length}")
+            return False
+        return True
@@ -0,0 +1,243 @@
+"""Инструменты профилирования: таймеры этапов, счётчики, семплирующий профилировщик и трасса.
+
+Решатель (ACOSolver) и окно (GraphWindow) записывают сюда время этапов итерации,
+отрисовки и счётчики построения путей. Собранное можно посмотреть сводкой (summary),
+в панели статистики окна или выгрузить трассой в формате Chrome Trace Event
+(chrome://tracing, https://ui.perfetto.dev).
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+MAX_EVENTS = 200000  # Старые события трассы отбрасываются, сводка при этом не теряется
+PROFILE_INTERVAL = 0.005  # Интервал семплирования профилировщика в секундах
+
+
+class Instrumentation:
+    """Потокобезопасный сборщик таймеров, счётчиков и событий трассы.
+
+    Этап (phase) — именованный интервал времени: в сводке по каждому имени копятся
+    суммарное и наибольшее время и число вызовов, в трассу попадает событие с началом
+    и длительностью. Время, которое нельзя выделить в один интервал (например, расчёт
+    вероятностей, размазанный по шагам построения путей), добавляется через add_time
+    только в сводку.
+    """
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.timers = {}  # Имя -> [суммарное время, число вызовов, наибольшее время]
+        self.counters = Counter()
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+        self.tracked_threads = set()
+        self.profiler = None
+
+    def reset(self):
+        """Очищает таймеры, счётчики, трассу и список рабочих потоков (профилировщик продолжает работу).
+
+        Вызывается перед новым запуском: его потоки отметятся заново (track_current_thread).
+        """
+        with self._lock:
+            self._origin = time.perf_counter()
+            self.timers = {}
+            self.counters = Counter()
+            self.events.clear()
+            self.tracked_threads = set()
+            if self.profiler is not None:
+                self.profiler.clear(self._origin)
+
+    @contextmanager
+    def phase(self, name, category='solver', **args):
+        """Контекстный менеджер: замеряет время блока как этап name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, started, time.perf_counter() - started, category, **args)
+
+    def add_phase(self, name, started, duration, category='solver', **args):
+        """Добавляет этап, начавшийся в started (time.perf_counter) и длившийся duration секунд."""
+        thread = threading.current_thread()
+        with self._lock:
+            self._add_time(name, duration)
+            self.thread_names[thread.ident] = thread.name
+            self.events.append((name, category, started, duration, thread.ident, args))
+
+    def add_time(self, name, duration, calls=1):
+        """Добавляет время в сводку без события трассы."""
+        with self._lock:
+            self._add_time(name, duration, calls)
+
+    def _add_time(self, name, duration, calls=1):
+        timer = self.timers.setdefault(name, [0.0, 0, 0.0])
+        timer[0] += duration
+        timer[1] += calls
+        timer[2] = max(timer[2], duration)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def add_counters(self, counters):
+        """Прибавляет словарь счётчиков; значения с суффиксом _time идут в таймеры сводки."""
+        with self._lock:
+            for name, value in counters.items():
+                if name.endswith('_time'):
+                    self._add_time(name[:-len('_time')], value)
+                else:
+                    self.counters[name] += value
+            # Текущие значения счётчиков попадают в трассу графиком
+            self.events.append(('counters', 'counter', time.perf_counter(), None, None, dict(self.counters)))
+
+    def track_current_thread(self):
+        """Отмечает текущий поток как рабочий: профилировщик семплирует только такие потоки."""
+        thread = threading.current_thread()
+        with self._lock:
+            self.tracked_threads.add(thread.ident)
+            self.thread_names[thread.ident] = thread.name
+
+    def tracked(self):
+        """Копия множества рабочих потоков (для семплирования из другого потока)."""
+        with self._lock:
+            return set(self.tracked_threads)
+
+    def start_profiler(self, interval=PROFILE_INTERVAL):
+        """Включает семплирующий профилировщик (SamplingProfiler) в фоновом потоке."""
+        if self.profiler is None:
+            self.profiler = SamplingProfiler(self, interval)
+        self.profiler.start()
+
+    def stop_profiler(self):
+        """Останавливает профилировщик; собранные семплы остаются в сводке и трассе."""
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    def summary(self, top=10):
+        """Сводка: этапы (суммарное, среднее и наибольшее время, вызовы), счётчики и горячие функции."""
+        with self._lock:
+            phases = {name: {'total': total, 'calls': calls, 'mean': total / calls if calls else 0.0, 'max': longest}
+                      for name, (total, calls, longest) in self.timers.items()}
+            counters = dict(self.counters)
+        summary = {'phases': phases, 'counters': counters}
+        if self.profiler is not None:
+            summary['profile'] = self.profiler.top(top)
+        return summary
+
+    def chrome_trace(self):
+        """Трасса в формате Chrome Trace Event (словарь для json.dump); время — в микросекундах."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+            origin = self._origin
+        trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                 for tid, name in thread_names.items()]
+        for name, category, started, duration, tid, args in events:
+            ts = (started - origin) * 1e6
+            if duration is None:
+                trace.append({'name': name, 'cat': category, 'ph': 'C', 'ts': ts, 'pid': pid, 'args': args})
+            else:
+                trace.append({'name': name, 'cat': category, 'ph': 'X', 'ts': ts, 'dur': duration * 1e6,
+                              'pid': pid, 'tid': tid, 'args': args})
+        result = {'traceEvents': trace, 'displayTimeUnit': 'ms', 'otherData': self.summary()}
+        if self.profiler is not None:
+            result['stackFrames'], result['samples'] = self.profiler.trace_samples(origin, pid)
+        return result
+
+    def export_chrome_trace(self, file_name):
+        """Сохраняет трассу (chrome_trace) в JSON-файл."""
+        with open(file_name, 'w', encoding='utf-8') as file:
+            json.dump(self.chrome_trace(), file, ensure_ascii=False)
+
+
+class SamplingProfiler:
+    """Семплирующий профилировщик: раз в interval секунд снимает стеки рабочих потоков.
+
+    Рабочие потоки отмечаются Instrumentation.track_current_thread; если таких нет,
+    семплируются все потоки, кроме самого профилировщика. Снимки копятся как счётчики
+    функций (в сводке — функции, чаще всего оказывавшиеся на вершине стека) и как
+    семплы трассы Chrome со стеками. Вызовы NumPy видны как строка Python, из которой они
+    сделаны. Семплы пишет поток профилировщика, а читают сводка и трасса из других потоков,
+    поэтому данные семплов меняются и копируются только под self._lock.
+    """
+
+    def __init__(self, instrumentation, interval=PROFILE_INTERVAL, max_samples=MAX_EVENTS):
+        self.instrumentation = instrumentation
+        self.interval = interval
+        self.samples = deque(maxlen=max_samples)  # (время, поток, номер стека)
+        self.frames = {}  # (номер родителя, имя кадра) -> номер стека
+        self.leaf_counts = Counter()
+        self.total_samples = 0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='SamplingProfiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def clear(self, origin):
+        with self._lock:
+            self.samples.clear()
+            self.leaf_counts = Counter()
+            self.total_samples = 0
+            self._origin = origin
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            tracked = self.instrumentation.tracked()
+            now = time.perf_counter()
+            for tid, frame in sys._current_frames().items():
+                if tid == own or (tracked and tid not in tracked):
+                    continue
+                self._record(now, tid, frame)
+
+    def _record(self, now, tid, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        with self._lock:
+            stack = 0
+            for name in reversed(names):
+                stack = self.frames.setdefault((stack, name), len(self.frames) + 1)
+            self.samples.append((now, tid, stack))
+            self.leaf_counts[names[0]] += 1
+            self.total_samples += 1
+
+    def top(self, count=10):
+        """Самые частые вершины стека: [(кадр, доля семплов)]."""
+        with self._lock:
+            leaf_counts = self.leaf_counts.copy()
+            total = self.total_samples
+        if not total:
+            return []
+        return [(name, hits / total) for name, hits in leaf_counts.most_common(count)]
+
+    def trace_samples(self, origin, pid):
+        """Стеки и семплы в формате трассы Chrome (stackFrames, samples)."""
+        with self._lock:
+            frames = list(self.frames.items())
+            recorded = list(self.samples)
+        stack_frames = {str(number): {'name': name, **({'parent': str(parent)} if parent else {})}
+                        for (parent, name), number in frames}
+        samples = [{'cat': 'sample', 'name': 'cpu', 'ts': (ts - origin) * 1e6, 'pid': pid, 'tid': tid,
+                    'sf': str(stack), 'weight': 1} for ts, tid, stack in recorded]
+        return stack_frames, samples
@@ -0,0 +1,394 @@
+"""Островная модель: несколько независимых колоний с периодическим обменом решениями.
+
+Колонии (острова) работают с разными alpha, beta и коэффициентом испарения, каждая со
+своим зерном, в отдельных процессах. Каждые migration_interval итераций колонии
+обмениваются по кольцу: колония i получает лучший путь колонии i - 1 и, при
+migration='blend', подмешивает к своему феромону её феромон. Итог — лучшее решение
+среди всех колоний. Так поиск реже застревает в локальном оптимуме одной колонии и
+загружает несколько ядер почти без накладных расходов: процессы общаются только
+между эпохами.
+"""
+import copy
+import math
+import multiprocessing
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.model.pheromone_update import make_strategy
+from app.model.tour_solver import create_solver
+
+MIGRATIONS = ('best', 'blend')
+# Ошибки колоний, которые передаются из процессов тем же типом (остальные — RuntimeError)
+FORWARDED_ERRORS = {error.__name__: error for error in (ValueError, KeyError)}
+# Множители (alpha, beta, коэффициент испарения) колоний по порядку; колония 0 — с исходными параметрами
+ISLAND_VARIATIONS = (
+    (1.0, 1.0, 1.0),
+    (1.0, 2.0, 0.5),
+    (2.0, 1.0, 1.0),
+    (0.5, 2.0, 1.0),
+    (1.0, 0.5, 0.5),
+    (2.0, 2.0, 0.5),
+    (0.5, 1.0, 1.0),
+    (1.0, 1.0, 0.25),
+)
+
+
+class IslandGroup:
+    """Колонии одного процесса: решатели на собственных копиях графа (CSRGraph.colony_copy)."""
+
+    def __init__(self, csr, end_nodes, closed_tour, configs):
+        self.solvers = [create_solver(csr.colony_copy(), end_nodes, closed_tour, **config) for config in configs]
+
+    def start(self, start_node, end_nodes):
+        for solver in self.solvers:
+            solver.start(start_node, end_nodes)
+
+    def epoch(self, iterations, migrants, blend_rate, send_pheromone):
+        """Принимает мигрантов (по колонии: (решение, длина, феромон) или None) и делает до
+        iterations итераций каждой колонией. Возвращает состояния колоний для обмена."""
+        states = []
+        for solver, migrant in zip(self.solvers, migrants):
+            if solver.stop_reason is None:
+                if migrant is not None:
+                    solver.accept_migrants(*migrant, blend_rate)
+                for _ in range(iterations):
+                    if solver.is_done():
+                        break
+                    solver.step()
+                solver.is_done()
+            best, best_length, pheromone = solver.migrants()
+            states.append(SimpleNamespace(
+                iteration=solver.iteration, best=best, best_length=best_length, stop_reason=solver.stop_reason,
+                best_path=solver.best_path, pheromone=pheromone.copy() if send_pheromone else None))
+        return states
+
+    def pheromone(self, island):
+        """Феромон на рёбрах графа колонии island (для отображения)."""
+        return self.solvers[island].csr.pheromone
+
+    def finish(self):
+        return [solver.finish() for solver in self.solvers]
+
+    def submit(self, method, *args):
+        self._result = getattr(self, method)(*args)
+
+    def result(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+def _island_process(connection, csr, end_nodes, closed_tour, configs):
+    """Процесс с группой колоний: выполняет методы IslandGroup по командам из connection."""
+    group = IslandGroup(csr, end_nodes, closed_tour, configs)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        method, args = message
+        try:
+            connection.send(('ok', getattr(group, method)(*args)))
+        except Exception as e:
+            connection.send((type(e).__name__, e.args[0] if isinstance(e, KeyError) else str(e)))
+    connection.close()
+
+
+class RemoteIslandGroup:
+    """IslandGroup в отдельном процессе: submit отправляет команду, result ждёт ответа."""
+
+    def __init__(self, csr, end_nodes, closed_tour, configs):
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_island_process, daemon=True,
+                                               args=(child, csr, end_nodes, closed_tour, configs))
+        self.process.start()
+        child.close()
+
+    def submit(self, method, *args):
+        self.connection.send((method, args))
+
+    def result(self):
+        try:
+            kind, value = self.connection.recv()
+        except EOFError:
+            raise RuntimeError("Процесс колоний завершился аварийно.") from None
+        if kind == 'ok':
+            return value
+        if kind in FORWARDED_ERRORS:
+            raise FORWARDED_ERRORS[kind](value)
+        raise RuntimeError(f"{kind}: {value}")
+
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.connection.close()
+
+
+class IslandModel:
+    """Несколько колоний (ACOSolver или TourSolver) с обменом каждые migration_interval итераций.
+
+    Интерфейс как у решателей: run() или start() / step() / is_done() / finish(); один
+    step — эпоха из migration_interval итераций всех колоний и обмен после неё. Параметры
+    решателя (alpha, beta, num_iterations, strategy, ...) задают колонию 0, у остальных alpha,
+    beta и испарение умножаются на ISLAND_VARIATIONS по кругу, а зерно — seed + номер колонии.
+    Колонии распределяются по num_workers процессам (при 1 — работают в текущем); результат
+    от числа процессов не зависит. Внутри колонии пути строятся в одном процессе.
+
+    Запуск останавливается, когда остановились все колонии (каждая — по своим условиям
+    остановки) или одна из них нашла путь не длиннее target_length. В csr.pheromone после
+    каждой эпохи копируется феромон колонии с лучшим путём — для отображения. Тёплый старт
+    не поддерживается: колонии каждый раз начинают заново.
+    """
+
+    def __init__(self, csr, end_nodes, closed_tour=False, num_islands=4, migration_interval=10, migration='best',
+                 blend_rate=0.1, num_workers=1, strategy='as', cache=None, instrumentation=None, snapshot_log=None,
+                 **parameters):
+        if migration not in MIGRATIONS:
+            raise ValueError(f"Неизвестный способ обмена: {migration}. Допустимые: {', '.join(MIGRATIONS)}.")
+        self.csr = csr
+        self.end_nodes = end_nodes
+        self.closed = closed_tour
+        self.num_islands = num_islands
+        self.migration_interval = migration_interval
+        self.migration = migration
+        self.blend_rate = blend_rate
+        self.num_workers = num_workers
+        self.strategy = make_strategy(strategy) if isinstance(strategy, str) else strategy
+        self.cache = cache  # Не используется колониями: у каждого процесса свои данные графа
+        self.instrumentation = instrumentation
+        self.snapshot_log = snapshot_log  # Снимки пишутся после эпох (феромон лучшей колонии)
+        self.seed = self.time_limit = None
+        self._parameter_names = list(parameters)
+        # Параметры колонии 0 — атрибуты модели, как у решателя (их читают SolveCache и GraphModel)
+        for name, value in parameters.items():
+            setattr(self, name, value)
+        self.iteration = 0
+        self.best_path = None
+        self.best_length = math.inf
+        self.best_island = None
+        self.stop_reason = None
+        self.warm_start = False
+        self.telemetry = []
+        self._groups = []
+        self._assignment = []
+        self._states = None
+        self._results = None
+        self._started_at = None
+
+    def island_configs(self):
+        """Параметры решателей колоний."""
+        configs = []
+        for island in range(self.num_islands):
+            alpha, beta, evaporation = ISLAND_VARIATIONS[island % len(ISLAND_VARIATIONS)]
+            config = {name: getattr(self, name) for name in self._parameter_names}
+            config.update(alpha=self.alpha * alpha, beta=self.beta * beta,
+                          evaporation_rate=self.evaporation_rate * evaporation,
+                          seed=self.seed + island if self.seed is not None else None,
+                          strategy=copy.deepcopy(self.strategy), num_workers=1)
+            configs.append(config)
+        return configs
+
+    def start(self, start_node, end_nodes, warm=False):
+        """Запускает процессы колоний и готовит колонии к запуску (warm не поддерживается)."""
+        started = time.perf_counter()
+        self.close()
+        self.iteration = 0
+        self.best_path = None
+        self.best_length = math.inf
+        self.best_island = None
+        self.stop_reason = None
+        self.telemetry = []
+        self._states = None
+        self._results = None
+        self._started_at = started
+        configs = self.island_configs()
+        num_groups = max(min(self.num_workers, self.num_islands), 1)
+        self._assignment = [list(range(group, self.num_islands, num_groups)) for group in range(num_groups)]
+        group_type = IslandGroup if num_groups == 1 else RemoteIslandGroup
+        for islands in self._assignment:
+            self._groups.append(group_type(self.csr, end_nodes, self.closed, [configs[i] for i in islands]))
+        try:
+            self._call_all('start', lambda islands: (start_node, end_nodes))
+        except Exception:
+            self.close()
+            raise
+        if self.instrumentation is not None:
+            self.instrumentation.track_current_thread()
+            self.instrumentation.add_phase('start', started, time.perf_counter() - started)
+
+    def _call_all(self, method, arguments):
+        """Вызывает метод во всех группах одновременно; arguments(колонии группы) -> аргументы.
+
+        Ответы забираются у всех групп и при ошибке в одной из них, чтобы следующие вызовы
+        не получили чужой ответ.
+        """
+        for group, islands in zip(self._groups, self._assignment):
+            group.submit(method, *arguments(islands))
+        results = []
+        error = None
+        for group in self._groups:
+            try:
+                results.append(group.result())
+            except (*FORWARDED_ERRORS.values(), RuntimeError) as e:
+                error = error or e
+                results.append(None)
+        if error is not None:
+            raise error
+        return results
+
+    def migrants(self):
+        """Мигранты по кольцу: колония i получает лучший путь (и феромон) колонии i - 1."""
+        if self._states is None or self.num_islands < 2:
+            return [None] * self.num_islands
+        migrants = []
+        for island in range(self.num_islands):
+            source = self._states[island - 1]
+            if self.migration == 'blend':
+                migrants.append((source.best, source.best_length, source.pheromone))
+            elif source.best is not None and source.best_length < self._states[island].best_length:
+                migrants.append((source.best, source.best_length, None))
+            else:
+                migrants.append(None)
+        return migrants
+
+    def step(self):
+        """Эпоха: migration_interval итераций всех колоний после обмена по итогам прошлой эпохи."""
+        started = time.perf_counter()
+        migrants = self.migrants()
+        previous = sum(state.iteration for state in self._states) if self._states is not None else 0
+        send_pheromone = self.migration == 'blend' and self.num_islands > 1
+        replies = self._call_all('epoch', lambda islands: (self.migration_interval, [migrants[i] for i in islands],
+                                                           self.blend_rate, send_pheromone))
+        states = [None] * self.num_islands
+        for islands, group_states in zip(self._assignment, replies):
+            for island, state in zip(islands, group_states):
+                states[island] = state
+        self._states = states
+        computed = time.perf_counter()
+
+        self.iteration = max(state.iteration for state in states)
+        best = min(range(self.num_islands), key=lambda island: states[island].best_length)
+        if states[best].best_length < self.best_length:
+            self.best_length = float(states[best].best_length)
+            self.best_path = states[best].best_path
+            self.best_island = best
+        if self.best_island is not None:
+            self.csr.pheromone[:] = self._island_pheromone(self.best_island)
+        self.telemetry.append({
+            'iteration': self.iteration,
+            'best_length': self.best_length if math.isfinite(self.best_length) else None,
+            'island_best': [state.best_length if math.isfinite(state.best_length) else None for state in states],
+            'elapsed': time.perf_counter() - self._started_at,
+        })
+        if self.snapshot_log is not None:
+            self.snapshot_log.record(self.iteration, self.csr.pheromone, self.best_path, self.best_length)
+        if self.instrumentation is not None:
+            self.instrumentation.add_phase('islands', started, computed - started, epoch=len(self.telemetry))
+            self.instrumentation.add_phase('migration', computed, time.perf_counter() - computed)
+            self.instrumentation.add_counters({'iterations': sum(state.iteration for state in states) - previous})
+
+    def _island_pheromone(self, island):
+        group = next(index for index, islands in enumerate(self._assignment) if island in islands)
+        self._groups[group].submit('pheromone', self._assignment[group].index(island))
+        return self._groups[group].result()
+
+    def is_done(self):
+        """Все колонии остановились или одна из них достигла target_length."""
+        if self._states is None:
+            return False
+        reasons = [state.stop_reason for state in self._states]
+        if 'target' in reasons:
+            self.stop_reason = 'target'
+        elif all(reasons):
+            self.stop_reason = reasons[self.best_island if self.best_island is not None else 0]
+        return self.stop_reason is not None
+
+    def graph_changed(self, changes):
+        """Колонии строятся заново при каждом запуске, поэтому обновлять нечего."""
+
+    def finish(self):
+        """Завершение колоний и остановка процессов; возвращает результат лучшей колонии."""
+        try:
+            if self._groups and self._results is None:
+                results = [None] * self.num_islands
+                for islands, group_results in zip(self._assignment, self._call_all('finish', lambda islands: ())):
+                    for island, result in zip(islands, group_results):
+                        results[island] = result
+                self._results = results
+                if self.best_island is not None:
+                    self.csr.pheromone[:] = self._island_pheromone(self.best_island)
+        finally:
+            self.close()
+        return self.result()
+
+    def close(self):
+        for group in self._groups:
+            group.close()
+        self._groups = []
+
+    def run(self, start_node, end_nodes, callback=None, warm=False):
+        """Полный запуск; callback(model) вызывается после каждой эпохи."""
+        self.start(start_node, end_nodes, warm)
+        try:
+            while not self.is_done():
+                self.step()
+                if callback is not None:
+                    callback(self)
+        finally:
+            result = self.finish()
+        return result
+
+    def result(self):
+        """Результат лучшей колонии; convergence — лучшая длина среди колоний по итерациям,
+        stage_times — сумма по колониям, в islands — итоги каждой колонии."""
+        results = self._results or []
+        best = results[self.best_island] if self.best_island is not None and results else {}
+        convergence = _combined_convergence([result['convergence'] for result in results])
+        stage_times = {}
+        for result in results:
+            for stage, elapsed in result['stage_times'].items():
+                stage_times[stage] = stage_times.get(stage, 0.0) + elapsed
+        configs = self.island_configs()
+        result = {
+            'best_path': best.get('best_path'),
+            'best_length': best.get('best_length'),
+            'iterations': self.iteration,
+            'convergence': convergence,
+            'stop_reason': self.stop_reason,
+            'warm_start': False,
+            'telemetry': self.telemetry,
+            'stage_times': stage_times,
+            'elapsed': time.perf_counter() - self._started_at if self._started_at is not None else 0.0,
+            'best_island': self.best_island,
+            'islands': [{'alpha': config['alpha'], 'beta': config['beta'],
+                         'evaporation_rate': config['evaporation_rate'], 'seed': config['seed'],
+                         'best_length': result['best_length'], 'iterations': result['iterations'],
+                         'stop_reason': result['stop_reason']} for config, result in zip(configs, results)],
+        }
+        if self.closed or len(self.end_nodes) > 1:
+            result['tour'] = best.get('tour')
+        return result
+
+
+def _combined_convergence(curves):
+    """Поточечный минимум кривых сходимости (None — путь не найден); короткие кривые
+    продолжаются последним значением."""
+    if not curves:
+        return []
+    size = max(len(curve) for curve in curves)
+    values = np.full((len(curves), size), np.inf)
+    for row, curve in zip(values, curves):
+        finite = [math.inf if length is None else length for length in curve]
+        if finite:
+            row[:len(finite)] = finite
+            row[len(finite):] = finite[-1]
+    combined = values.min(axis=0)
+    return [float(length) if math.isfinite(length) else None for length in combined]
@@ -0,0 +1,174 @@
+import os
+
+import numpy as np
+
+SPRING_LAYOUT_MAX_NODES = 500  # До этого размера используется nx.spring_layout
+COORDS_SUFFIX = '.coords'  # Файл «вершина x y» рядом с файлом графа задаёт координаты явно
+
+
+def read_coordinates(file_name, nodes):
+    """Читает координаты вершин из файла «<граф>.coords» (строки «вершина x y»).
+
+    Возвращает массив n x 2 в порядке nodes или None, если файла нет.
+    Выбрасывает ValueError, если файл неполон или некорректен.
+    """
+    coords_name = os.path.splitext(file_name)[0] + COORDS_SUFFIX
+    if not os.path.exists(coords_name):
+        return None
+    data = np.loadtxt(coords_name, ndmin=2)
+    if data.shape[1] != 3:
+        raise ValueError(f"Файл координат {coords_name}: ожидается 3 столбца «вершина x y».")
+    ids = data[:, 0].astype(np.int64)
+    order = np.argsort(ids)
+    ids, xy = ids[order], data[order, 1:]
+    found = np.searchsorted(ids, nodes)
+    found = np.minimum(found, len(ids) - 1)
+    if len(ids) == 0 or not np.array_equal(ids[found], nodes):
+        raise ValueError(f"Файл координат {coords_name}: заданы координаты не для всех вершин графа.")
+    return xy[found]
+
+
+def normalize_positions(positions):
+    """Центрирует координаты и масштабирует их в квадрат [-1, 1] (как nx.spring_layout)."""
+    positions = positions - positions.mean(axis=0)
+    extent = np.abs(positions).max() if len(positions) else 0
+    return positions / extent if extent > 0 else positions
+
+
+def spring_layout(csr, seed=None):
+    """Раскладка nx.spring_layout для небольших графов."""
+    import networkx as nx
+
+    layout = nx.spring_layout(csr.to_networkx(), seed=seed)
+    return np.array([layout[node] for node in csr.nodes.tolist()])
+
+
+def bfs_distances(csr, source):
+    """Расстояния в рёбрах от source до всех вершин; недостижимые получают max + 1."""
+    distance = np.full(csr.num_nodes, -1, dtype=np.int64)
+    distance[source] = 0
+    frontier = np.array([source])
+    level = 0
+    while len(frontier):
+        level += 1
+        first = csr.indptr[frontier]
+        degree = csr.indptr[frontier + 1] - first
+        offsets = np.cumsum(degree) - degree
+        half = np.arange(degree.sum()) - np.repeat(offsets - first, degree)
+        neighbors = csr.indices[half]
+        frontier = np.unique(neighbors[distance[neighbors] < 0])
+        distance[frontier] = level
+    distance[distance < 0] = distance.max() + 1
+    return distance
+
+
+def pivot_mds(csr, num_pivots=30, seed=None):
+    """Начальная раскладка PivotMDS: классическое MDS по расстояниям до нескольких опорных вершин.
+
+    Опорные вершины выбираются по принципу «самая далёкая от уже выбранных»,
+    стоимость — num_pivots обходов в ширину и разложение матрицы num_pivots x num_pivots.
+    """
+    rng = np.random.default_rng(seed)
+    n = csr.num_nodes
+    num_pivots = min(num_pivots, n)
+    distances = np.empty((n, num_pivots))
+    nearest = np.full(n, np.inf)
+    pivot = int(rng.integers(n))
+    for column in range(num_pivots):
+        distances[:, column] = bfs_distances(csr, pivot)
+        nearest = np.minimum(nearest, distances[:, column])
+        pivot = int(np.argmax(nearest))
+
+    # Двойное центрирование квадратов расстояний
+    squared = distances ** 2
+    centered = squared - squared.mean(axis=0) - squared.mean(axis=1)[:, None] + squared.mean()
+    centered *= -0.5
+    _, vectors = np.linalg.eigh(centered.T @ centered)
+    positions = centered @ vectors[:, -2:]
+    # Вершины с одинаковыми расстояниями до опорных совпали бы — немного раздвигаем их
+    positions += rng.normal(scale=1e-3 * (np.ptp(positions) or 1.0), size=positions.shape)
+    return positions
+
+
+def _repulsion_kernel(grid_size):
+    """Фурье-образ ядра отталкивания r / |r|^2 на сетке с дополнением нулями до 2G x 2G."""
+    offsets = np.fft.fftfreq(2 * grid_size, 1.0 / (2 * grid_size))
+    dx, dy = np.meshgrid(offsets, offsets, indexing='ij')
+    r2 = dx ** 2 + dy ** 2
+    r2[0, 0] = np.inf  # Ячейка не отталкивает сама себя
+    return np.fft.rfft2(dx / r2), np.fft.rfft2(dy / r2)
+
+
+def force_layout(csr, iterations=100, seed=None, grid_size=128, report_every=10):
+    """Силовая раскладка Фрюхтермана–Рейнгольда для больших графов.
+
+    Генератор: сначала выдаёт начальную раскладку PivotMDS, затем каждые report_every
+    итераций — уточнённые координаты (n x 2), последними выдаются окончательные.
+    Притяжение считается по рёбрам за O(m),
+    а отталкивание всех вершин — по сетке grid_size x grid_size: плотность вершин
+    сворачивается с ядром r / |r|^2 через БПФ (метод «частица–сетка»), поэтому
+    итерация стоит O(n + m + G^2 log G) вместо O(n^2).
+    """
+    n = csr.num_nodes
+    if n < 3:
+        yield normalize_positions(np.random.default_rng(seed).random((n, 2)))
+        return
+    positions = pivot_mds(csr, seed=seed)
+    positions = (positions - positions.min(axis=0)) / np.ptp(positions, axis=0).max()
+    yield normalize_positions(positions)
+
+    kernel_x, kernel_y = _repulsion_kernel(grid_size)
+    k = 1.0 / np.sqrt(n)  # Оптимальное расстояние между вершинами в единичном квадрате
+    temperature = 0.02  # Начальная раскладка уже близка к итоговой, поэтому сильно не встряхиваем
+    cooling = (0.005 / temperature) ** (1.0 / iterations)
+    u, v = csr.edge_u, csr.edge_v
+
+    for iteration in range(1, iterations + 1):
+        # Отталкивание: плотность вершин на сетке, свёртка с ядром, значение поля в ячейке вершины
+        low = positions.min(axis=0)
+        cell = max((positions.max(axis=0) - low).max(), 1e-9) / (grid_size - 1)
+        cells = np.rint((positions - low) / cell).astype(np.int64)
+        density = np.bincount(cells[:, 0] * grid_size + cells[:, 1], minlength=grid_size * grid_size)
+        padded = np.zeros((2 * grid_size, 2 * grid_size))
+        padded[:grid_size, :grid_size] = density.reshape(grid_size, grid_size)
+        spectrum = np.fft.rfft2(padded)
+        shape = padded.shape
+        field_x = np.fft.irfft2(spectrum * kernel_x, shape)[:grid_size, :grid_size]
+        field_y = np.fft.irfft2(spectrum * kernel_y, shape)[:grid_size, :grid_size]
+        scale = k * k / cell
+        displacement = np.column_stack([field_x[cells[:, 0], cells[:, 1]],
+                                        field_y[cells[:, 0], cells[:, 1]]]) * scale
+
+        # Притяжение вдоль рёбер: сила d^2 / k
+        delta = positions[v] - positions[u]
+        distance = np.sqrt((delta ** 2).sum(axis=1))
+        pull = delta * (distance / k)[:, None]
+        for axis in range(2):
+            displacement[:, axis] += np.bincount(u, weights=pull[:, axis], minlength=n)
+            displacement[:, axis] -= np.bincount(v, weights=pull[:, axis], minlength=n)
+
+        # Смещение ограничено текущей «температурой»
+        length = np.sqrt((displacement ** 2).sum(axis=1))
+        step = np.minimum(length, temperature) / np.maximum(length, 1e-12)
+        positions += displacement * step[:, None]
+        temperature *= cooling
+
+        if iteration % report_every == 0 or iteration == iterations:
+            yield normalize_positions(positions)
+
+
+def compute_layout(csr, file_name=None, seed=None):
+    """Выбирает способ раскладки по размеру графа и выдаёт координаты по мере расчёта.
+
+    Если рядом с файлом графа есть файл координат, используются они; небольшие
+    графы раскладываются nx.spring_layout, большие — force_layout.
+    """
+    if file_name is not None:
+        positions = read_coordinates(file_name, csr.nodes)
+        if positions is not None:
+            yield normalize_positions(positions)
+            return
+    if csr.num_nodes <= SPRING_LAYOUT_MAX_NODES:
+        yield spring_layout(csr, seed)
+    else:
+        yield from force_layout(csr, seed=seed)
@@ -0,0 +1,122 @@
+"""Локальный поиск: улучшение путей и маршрутов, построенных муравьями.
+
+Применяется решателями после построения путей итерации к нескольким лучшим
+муравьям, до обновления феромона: улучшенные пути откладывают феромон вместо
+исходных.
+"""
+import numpy as np
+
+IMPROVEMENT_EPS = 1e-9  # Минимальный выигрыш, при котором изменение принимается
+
+
+def shortcut_path(csr, path):
+    """Удаляет петли-объезды: если вершины пути i и j > i + 1 соединены ребром, которое
+    короче участка пути между ними, участок заменяется этим ребром.
+
+    Путь просматривается слева направо; из каждой вершины берётся сокращение с
+    наибольшим выигрышем. Возвращает новый путь (массив индексов вершин).
+    """
+    path = np.asarray(path, dtype=np.int64)
+    if len(path) < 3:
+        return path
+    position = np.full(csr.num_nodes, -1, dtype=np.int64)
+    position[path] = np.arange(len(path))
+    prefix = np.concatenate([[0.0], np.cumsum(csr.edge_weight[csr.path_edges(path)])])
+
+    kept = [0]
+    i = 0
+    while i < len(path) - 1:
+        neighbors, edge_ids = csr.neighbors(path[i])
+        j = position[neighbors]
+        gain = prefix[np.maximum(j, 0)] - prefix[i] - csr.edge_weight[edge_ids]
+        gain[j <= i + 1] = -np.inf
+        best = int(np.argmax(gain)) if len(gain) else -1
+        i = int(j[best]) if best >= 0 and gain[best] > IMPROVEMENT_EPS else i + 1
+        kept.append(i)
+    return path[kept]
+
+
+def two_opt(tour, distances, closed=False):
+    """2-opt для маршрута по матрице расстояний: разворот участков, пока это укорачивает маршрут.
+
+    Первая вершина маршрута (начальная точка) не сдвигается; у замкнутого маршрута
+    последняя вершина — снова начальная. Для открытого маршрута разворачиваться может
+    и хвост (у последней вершины нет следующей).
+    """
+    tour = np.array(tour, dtype=np.int64)
+    n = len(tour)
+    last = n - 1 if closed else n  # Разворачиваемый участок — tour[i:j + 1], j < last
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, last - 1):
+            j = np.arange(i + 1, last)
+            before, first = tour[i - 1], tour[i]
+            ends = tour[j]
+            has_next = j + 1 < n
+            following = tour[np.minimum(j + 1, n - 1)]
+            delta = distances[before, ends] - distances[before, first]
+            delta += np.where(has_next, distances[first, following] - distances[ends, following], 0.0)
+            best = int(np.argmin(delta))
+            if delta[best] < -IMPROVEMENT_EPS:
+                tour[i:j[best] + 1] = tour[i:j[best] + 1][::-1]
+                improved = True
+    return tour
+
+
+def or_opt(tour, distances, closed=False, max_segment=3):
+    """Or-opt: перенос участков из 1..max_segment вершин (возможно, развёрнутых) на лучшее место.
+
+    Начальная вершина, как и в two_opt, остаётся на месте.
+    """
+    tour = np.array(tour, dtype=np.int64)
+    n = len(tour)
+    last = n - 1 if closed else n  # Переносимые вершины — tour[1:last]
+    improved = True
+    while improved:
+        improved = False
+        for size in range(1, max_segment + 1):
+            for i in range(1, last - size + 1):
+                segment = tour[i:i + size]
+                before = tour[i - 1]
+                after = tour[i + size] if i + size < n else -1
+                removal = distances[before, segment[0]]
+                if after >= 0:
+                    removal += distances[segment[-1], after] - distances[before, after]
+
+                rest = np.concatenate([tour[:i], tour[i + size:]])
+                # Вставка между rest[p] и rest[p + 1]; у открытого маршрута — и после последней вершины
+                left = rest if not closed else rest[:-1]
+                right = np.append(rest[1:], -1) if not closed else rest[1:]
+                has_right = right >= 0
+                right_safe = np.where(has_right, right, 0)
+                base = np.where(has_right, distances[left, right_safe], 0.0)
+                forward = distances[left, segment[0]] + np.where(has_right, distances[segment[-1], right_safe], 0.0)
+                backward = distances[left, segment[-1]] + np.where(has_right, distances[segment[0], right_safe], 0.0)
+                cost = np.minimum(forward, backward) - base
+                cost[i - 1] = np.inf  # Исходное место участка
+                p = int(np.argmin(cost))
+                if removal - cost[p] > IMPROVEMENT_EPS:
+                    moved = segment if forward[p] <= backward[p] else segment[::-1]
+                    tour = np.concatenate([rest[:p + 1], moved, rest[p + 1:]])
+                    improved = True
+                    break
+            if improved:
+                break
+    return tour
+
+
+def improve_tour(tour, distances, closed=False):
+    """2-opt и Or-opt по очереди, пока маршрут укорачивается."""
+    length = tour_length(tour, distances)
+    while True:
+        tour = or_opt(two_opt(tour, distances, closed), distances, closed)
+        improved_length = tour_length(tour, distances)
+        if improved_length >= length - IMPROVEMENT_EPS:
+            return tour
+        length = improved_length
+
+
+def tour_length(tour, distances):
+    tour = np.asarray(tour)
+    return float(distances[tour[:-1], tour[1:]].sum())
@@ -0,0 +1,172 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.model.ant_batch import LocalUpdate, construct_paths
+
+ANTS_PER_TASK = 256  # Размер порции муравьёв с собственным потоком случайных чисел
+
+# Массивы CSR-графа, которые процессы читают из разделяемой памяти без копирования
+SHARED_FIELDS = ('indptr', 'indices', 'half_edge_ids', 'half_weights')
+
+_worker_graph = None
+_worker_blocks = []
+
+
+def share_array(array):
+    """Копирует массив в новый блок разделяемой памяти.
+
+    Возвращает (блок, описание для attach_array, массив поверх блока). Блок освобождает
+    создавший его процесс: block.close() и block.unlink().
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[:] = array
+    return block, (block.name, array.shape, array.dtype.str), shared
+
+
+def attach_array(name, shape, dtype):
+    """Подключается к существующему блоку разделяемой памяти и возвращает массив поверх него."""
+    block = shared_memory.SharedMemory(name=name)
+    _worker_blocks.append(block)
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _init_worker(specs, num_nodes):
+    """Инициализация процесса пула: подключение массивов графа из разделяемой памяти."""
+    global _worker_graph
+    arrays = {field: attach_array(*spec) for field, spec in specs.items()}
+    candidates = {field: arrays.pop('candidate_' + field) for field in SHARED_FIELDS if 'candidate_' + field in arrays}
+    _worker_graph = SimpleNamespace(num_nodes=num_nodes, **arrays)
+    _worker_graph.candidates = SimpleNamespace(num_nodes=num_nodes, **candidates) if candidates else None
+
+
+def _construct_task(seed, num_ants, start, end, exploitation, local_update, max_backtracks):
+    """Строит пути порции муравьёв в процессе пула и возвращает их в компактном виде
+    вместе со счётчиками построения (см. construct_paths).
+
+    local_update — параметры (alpha, decay, initial) локального обновления или None;
+    феромон и эвристика для него берутся из разделяемой памяти.
+    """
+    rng = np.random.default_rng(seed)
+    if local_update is not None:
+        local_update = LocalUpdate(_worker_graph.pheromone, _worker_graph.eta_beta, *local_update)
+    counters = {}
+    paths = construct_paths(_worker_graph, _worker_graph.attractiveness, start, end, num_ants, rng,
+                            _worker_graph.candidates, exploitation, local_update, max_backtracks, counters)
+    return (*pack_paths(paths), counters)
+
+
+def pack_paths(paths):
+    """Упаковывает пути в (склеенные вершины int32, длины путей в вершинах, длины путей)."""
+    nodes = np.concatenate([path for path, _ in paths]).astype(np.int32)
+    sizes = np.array([len(path) for path, _ in paths], dtype=np.int64)
+    lengths = np.array([length for _, length in paths], dtype=np.float64)
+    return nodes, sizes, lengths
+
+
+def unpack_paths(nodes, sizes, lengths):
+    """Обратное преобразование к pack_paths."""
+    return list(zip(np.split(nodes, np.cumsum(sizes)[:-1]), lengths.tolist()))
+
+
+class ParallelColony:
+    """Построение путей муравьёв пулом процессов.
+
+    Массивы графа и привлекательность рёбер (pheromone^alpha * eta^beta, пересчитывается
+    родителем на каждой итерации) лежат в multiprocessing.shared_memory, процессы читают
+    их без копирования и возвращают только упакованные пути. Муравьи делятся на порции
+    по ANTS_PER_TASK, и у каждой порции свой поток случайных чисел, зависящий лишь от
+    зерна, номера итерации и номера порции, поэтому результат не зависит от числа процессов.
+    При num_workers == 1 порции строятся в текущем процессе без пула.
+
+    candidates — списки кандидатов (CSRGraph.candidate_lists), они тоже разделяются между
+    процессами. При local_update в разделяемую память на каждой итерации копируются
+    также феромон и эвристика — они нужны для локального обновления ACS.
+    """
+
+    def __init__(self, csr, num_workers=1, candidates=None, local_update=False):
+        self.csr = csr
+        self.num_workers = num_workers
+        self.candidates = candidates
+        self.pool = None
+        self._blocks = []
+        self.pheromone = self.eta_beta = None  # Только для локального обновления в пуле процессов
+        if num_workers > 1:
+            specs = {}
+            for field in SHARED_FIELDS:
+                specs[field] = self._share(getattr(csr, field))[0]
+                if candidates is not None:
+                    specs['candidate_' + field] = self._share(getattr(candidates, field))[0]
+            specs['attractiveness'], self.attractiveness = self._share(np.zeros(csr.num_edges))
+            if local_update:
+                specs['pheromone'], self.pheromone = self._share(np.zeros_like(csr.pheromone))
+                specs['eta_beta'], self.eta_beta = self._share(np.zeros(csr.num_edges))
+            self.pool = ProcessPoolExecutor(num_workers, initializer=_init_worker,
+                                            initargs=(specs, csr.num_nodes))
+        else:
+            self.attractiveness = np.zeros(csr.num_edges)
+
+    def _share(self, array):
+        """Копирует массив в новый блок разделяемой памяти (share_array)."""
+        block, spec, shared = share_array(array)
+        self._blocks.append(block)
+        return spec, shared
+
+    def construct_paths(self, attractiveness, start, end, num_ants, seed_sequence, iteration, exploitation=0.0,
+                        local_update=None, max_backtracks=0, counters=None):
+        """Строит пути num_ants муравьёв; возвращает список (путь, длина) в порядке порций.
+
+        Каждая порция начинает с одинакового состояния феромонов: локальные обновления
+        одной порции не видны другим, итоговое обновление применяет решатель.
+        В counters суммируются счётчики всех порций; время расчёта вероятностей
+        при нескольких процессах — суммарное процессорное, а не настенное.
+        """
+        self.attractiveness[:] = attractiveness
+        sizes = [min(ANTS_PER_TASK, num_ants - first) for first in range(0, num_ants, ANTS_PER_TASK)]
+        seeds = [np.random.SeedSequence(seed_sequence.entropy, spawn_key=(iteration, chunk))
+                 for chunk in range(len(sizes))]
+
+        if self.pool is None:
+            all_paths = []
+            for seed, size in zip(seeds, sizes):
+                rng = np.random.default_rng(seed)
+                all_paths.extend(construct_paths(self.csr, self.attractiveness, start, end, size, rng,
+                                                 self.candidates, exploitation, local_update, max_backtracks,
+                                                 counters))
+            return all_paths
+
+        if local_update is not None:
+            self.pheromone[:] = local_update.pheromone
+            self.eta_beta[:] = local_update.eta_beta
+            local_update = (local_update.alpha, local_update.decay, local_update.initial)
+        futures = [self.pool.submit(_construct_task, seed, size, start, end, exploitation, local_update, max_backtracks)
+                   for seed, size in zip(seeds, sizes)]
+        all_paths = []
+        for future in futures:
+            nodes, sizes, lengths, task_counters = future.result()
+            all_paths.extend(unpack_paths(nodes, sizes, lengths))
+            if counters is not None:
+                for name, value in task_counters.items():
+                    counters[name] = counters.get(name, 0) + value
+        return all_paths
+
+    def close(self):
+        """Останавливает пул и освобождает разделяемую память."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        # Массивы ссылаются на разделяемую память и должны быть освобождены первыми
+        self.attractiveness = self.pheromone = self.eta_beta = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,226 @@
+"""Стратегии обновления феромона муравьиного алгоритма.
+
+Стратегия решает, какие муравьи откладывают феромон и сколько, как испаряется
+и ограничивается феромон, и задаёт правило выбора ребра (вероятность q0 жадного
+выбора, локальное обновление ACS). Решатели (ACOSolver, TourSolver) передают ей
+массив феромонов по номерам рёбер и пути муравьёв в виде массивов номеров рёбер,
+поэтому одни и те же стратегии работают и с графом дорог, и с матрицей терминалов.
+"""
+import inspect
+
+import numpy as np
+
+from app.model.ant_batch import LocalUpdate
+
+
+def evaporate(pheromone, rate, floor=0.0):
+    """Испарение феромона с нижней границей floor."""
+    pheromone *= (1 - rate)
+    np.maximum(pheromone, floor, out=pheromone)
+
+
+def deposit(pheromone, paths, amounts):
+    """Откладывает amounts[i] феромона на каждое ребро пути paths[i]."""
+    if not len(paths):
+        return
+    edges = np.concatenate(paths)
+    contribution = np.repeat(amounts, [len(path) for path in paths])
+    pheromone += np.bincount(edges, weights=contribution, minlength=len(pheromone))
+
+
+class AntSystem:
+    """Муравьиная система: феромон I / L откладывают все муравьи, дошедшие до цели.
+
+    exploitation — вероятность q0 выбрать ребро с наибольшей привлекательностью
+    вместо рулетки (псевдослучайное правило ACS), по умолчанию выключено.
+    """
+
+    name = 'as'
+    uses_local_update = False  # Нужны ли при построении путей феромон и эвристика (ACS)
+    default_evaporation_rate = 1.3  # Коэффициент испарения по умолчанию (CLI, сервис, окно)
+    max_evaporation_rate = None  # Наибольший допустимый коэффициент испарения (None — не ограничен)
+
+    def __init__(self, exploitation=0.0):
+        self.exploitation = exploitation
+
+    @classmethod
+    def check_evaporation_rate(cls, rate):
+        """Проверяет коэффициент испарения для стратегии; ошибка — ValueError."""
+        if rate <= 0:
+            raise ValueError("Коэффициент испарения должен быть положительным.")
+        if cls.max_evaporation_rate is not None and rate > cls.max_evaporation_rate:
+            raise ValueError(f"Для стратегии {cls.name} коэффициент испарения должен быть в интервале "
+                             f"(0, {cls.max_evaporation_rate:g}], например {cls.default_evaporation_rate:g}.")
+
+    def parameters(self):
+        """Параметры конструктора стратегии (без состояния запуска), например для ключа кэша."""
+        names = inspect.signature(type(self).__init__).parameters
+        return {name: getattr(self, name) for name in names if name != 'self'}
+
+    def start(self, solver, warm=False):
+        """Сброс состояния стратегии перед запуском.
+
+        При тёплом старте (warm) феромон предыдущего запуска сохраняется, и стратегия
+        сохраняет связанное с ним состояние.
+        """
+
+    def local_update(self, solver, pheromone, eta_beta):
+        """Параметры локального обновления при построении путей (LocalUpdate) или None."""
+        return None
+
+    def after_construction(self, solver, pheromone, edges):
+        """Вызывается после построения путей итерации со всеми пройденными рёбрами."""
+
+    def update(self, solver, pheromone, paths, lengths, best_edges, best_length):
+        """Обновляет феромон после итерации.
+
+        paths и lengths — рёбра и длины путей муравьёв, дошедших до цели в этой итерации,
+        best_edges и best_length — лучший путь за весь запуск (None, пока его нет).
+        """
+        evaporate(pheromone, solver.evaporation_rate, solver.min_pheromone)
+        deposit(pheromone, paths, solver.pheromone_intensity / lengths)
+
+
+class ElitistAntSystem(AntSystem):
+    """Элитная муравьиная система: к вкладу всех муравьёв добавляется elite_weight
+    вкладов лучшего пути за запуск (по умолчанию — по числу муравьёв)."""
+
+    name = 'elitist'
+
+    def __init__(self, elite_weight=None, exploitation=0.0):
+        super().__init__(exploitation)
+        self.elite_weight = elite_weight
+
+    def update(self, solver, pheromone, paths, lengths, best_edges, best_length):
+        super().update(solver, pheromone, paths, lengths, best_edges, best_length)
+        if best_edges is not None:
+            weight = self.elite_weight if self.elite_weight is not None else solver.num_ants
+            pheromone[best_edges] += weight * solver.pheromone_intensity / best_length
+
+
+class RankBasedAntSystem(AntSystem):
+    """Ранговая муравьиная система: откладывают только num_ranked - 1 лучших муравьёв итерации
+    с весами num_ranked - r и лучший путь за запуск с весом num_ranked."""
+
+    name = 'rank'
+
+    def __init__(self, num_ranked=6, exploitation=0.0):
+        super().__init__(exploitation)
+        self.num_ranked = num_ranked
+
+    def update(self, solver, pheromone, paths, lengths, best_edges, best_length):
+        evaporate(pheromone, solver.evaporation_rate, solver.min_pheromone)
+        ranked = np.argsort(lengths, kind='stable')[:self.num_ranked - 1]
+        weights = self.num_ranked - 1 - np.arange(len(ranked))
+        deposit(pheromone, [paths[i] for i in ranked], weights * solver.pheromone_intensity / lengths[ranked])
+        if best_edges is not None:
+            pheromone[best_edges] += self.num_ranked * solver.pheromone_intensity / best_length
+
+
+class MaxMinAntSystem(AntSystem):
+    """MAX-MIN Ant System: откладывает только лучший муравей, феромон ограничен [tau_min, tau_max].
+
+    tau_max = I / (rho L*), где L* — лучшая длина за запуск; tau_min выводится из tau_max так,
+    чтобы при сходимости лучший путь строился с вероятностью p_best. Когда находится первый
+    путь, феромон на всех рёбрах поднимается до tau_max. Обычно откладывает лучший муравей
+    итерации, а каждую global_period-ю итерацию — лучший путь за запуск.
+    """
+
+    name = 'mmas'
+    default_evaporation_rate = 0.02
+    max_evaporation_rate = 1.0
+
+    def __init__(self, p_best=0.05, global_period=5, exploitation=0.0):
+        super().__init__(exploitation)
+        self.p_best = p_best
+        self.global_period = global_period
+        self.tau_max = None
+
+    def start(self, solver, warm=False):
+        self.check_evaporation_rate(solver.evaporation_rate)
+        if not warm:
+            self.tau_max = None
+
+    def bounds(self, solver, best_edges, best_length):
+        """Границы феромона (tau_min, tau_max) для текущей лучшей длины."""
+        tau_max = solver.pheromone_intensity / (solver.evaporation_rate * best_length)
+        root = self.p_best ** (1.0 / (len(best_edges) + 1))
+        choices = max(solver.mean_choices, 1.0 + 1e-9)
+        tau_min = tau_max * (1 - root) / ((choices - 1) * root)
+        return min(tau_min, tau_max), tau_max
+
+    def update(self, solver, pheromone, paths, lengths, best_edges, best_length):
+        if best_edges is None:
+            evaporate(pheromone, solver.evaporation_rate, solver.min_pheromone)
+            return
+        tau_min, tau_max = self.bounds(solver, best_edges, best_length)
+        if self.tau_max is None:
+            pheromone.fill(tau_max)
+        self.tau_max = tau_max
+
+        evaporate(pheromone, solver.evaporation_rate)
+        if len(paths) and (solver.iteration + 1) % self.global_period:
+            best = int(np.argmin(lengths))
+            pheromone[paths[best]] += solver.pheromone_intensity / lengths[best]
+        else:
+            pheromone[best_edges] += solver.pheromone_intensity / best_length
+        np.clip(pheromone, tau_min, tau_max, out=pheromone)
+
+
+class AntColonySystem(AntSystem):
+    """Ant Colony System: жадный выбор с вероятностью q0, локальное и глобальное обновления.
+
+    Во время построения пройденное ребро сдвигается к начальному уровню tau0
+    с коэффициентом local_decay; после итерации испаряется и пополняется только
+    лучший путь за запуск: tau = (1 - rho) tau + rho I / L*. Уровень tau0 = I / (k L*)
+    (k — число рёбер лучшего пути) задаётся, когда находится первый путь.
+    """
+
+    name = 'acs'
+    uses_local_update = True
+    default_evaporation_rate = 0.1
+    max_evaporation_rate = 1.0
+
+    def __init__(self, exploitation=0.9, local_decay=0.1):
+        super().__init__(exploitation)
+        self.local_decay = local_decay
+        self.initial = None
+
+    def start(self, solver, warm=False):
+        self.check_evaporation_rate(solver.evaporation_rate)
+        if not warm:
+            self.initial = None
+
+    def local_update(self, solver, pheromone, eta_beta):
+        if self.initial is None:
+            return None
+        return LocalUpdate(pheromone, eta_beta, solver.alpha, self.local_decay, self.initial)
+
+    def after_construction(self, solver, pheromone, edges):
+        # Каждое из count прохождений ребра сдвигает его феромон к tau0 — применяем все сразу
+        if self.initial is None or not len(edges):
+            return
+        count = np.bincount(edges, minlength=len(pheromone))
+        touched = np.flatnonzero(count)
+        keep = (1 - self.local_decay) ** count[touched]
+        pheromone[touched] = pheromone[touched] * keep + self.initial * (1 - keep)
+
+    def update(self, solver, pheromone, paths, lengths, best_edges, best_length):
+        if best_edges is None:
+            return
+        if self.initial is None:
+            self.initial = solver.pheromone_intensity / (max(len(best_edges), 1) * best_length)
+            pheromone.fill(self.initial)
+        rate = solver.evaporation_rate
+        pheromone[best_edges] = (1 - rate) * pheromone[best_edges] + rate * solver.pheromone_intensity / best_length
+
+
+STRATEGIES = {strategy.name: strategy for strategy in
+              (AntSystem, ElitistAntSystem, RankBasedAntSystem, MaxMinAntSystem, AntColonySystem)}
+
+
+def make_strategy(name, **options):
+    """Создаёт стратегию по имени из STRATEGIES; параметры со значением None не передаются."""
+    if name not in STRATEGIES:
+        raise ValueError(f"Неизвестная стратегия обновления феромона: {name}.")
+    return STRATEGIES[name](**{key: value for key, value in options.items() if value is not None})
@@ -0,0 +1,133 @@
+import heapq
+
+import numpy as np
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as _scipy_dijkstra
+except ImportError:  # SciPy необязателен: без него работает реализация на heapq
+    _scipy_dijkstra = None
+
+
+def shortest_path_trees(csr, sources, targets=None):
+    """Деревья кратчайших путей (алгоритм Дейкстры) из каждой вершины sources.
+
+    Возвращает (расстояния, предшественники) — массивы len(sources) x n
+    (float64 и int32, -1 у недостижимых вершин и у самих источников). Если передан
+    targets, обход из каждого источника останавливается, как только все целевые
+    вершины получили окончательные расстояния (только для реализации на heapq).
+    Веса рёбер должны быть неотрицательными.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    if _scipy_dijkstra is not None:
+        matrix = csr_matrix((csr.half_weights, csr.indices, csr.indptr), shape=(csr.num_nodes, csr.num_nodes))
+        distances, predecessors = _scipy_dijkstra(matrix, directed=True, indices=sources, return_predecessors=True)
+        predecessors = predecessors.astype(np.int32)
+        predecessors[predecessors < 0] = -1
+        return distances, predecessors
+
+    indptr = csr.indptr.tolist()
+    indices = csr.indices.tolist()
+    weights = csr.half_weights.tolist()
+    wanted = set(np.asarray(targets).tolist()) if targets is not None else None
+    distances = np.full((len(sources), csr.num_nodes), np.inf)
+    predecessors = np.full((len(sources), csr.num_nodes), -1, dtype=np.int32)
+
+    for row, source in enumerate(sources.tolist()):
+        distance = {source: 0.0}
+        predecessor = {}
+        settled = set()
+        remaining = set(wanted) if wanted is not None else None
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            if remaining is not None:
+                remaining.discard(node)
+                if not remaining:
+                    break
+            for position in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[position]
+                candidate = d + weights[position]
+                if candidate < distance.get(neighbor, np.inf):
+                    distance[neighbor] = candidate
+                    predecessor[neighbor] = node
+                    heapq.heappush(heap, (candidate, neighbor))
+        nodes = np.fromiter(settled, dtype=np.int64, count=len(settled))
+        distances[row, nodes] = [distance[node] for node in nodes.tolist()]
+        if predecessor:
+            reached = [node for node in predecessor if node in settled]
+            predecessors[row, reached] = [predecessor[node] for node in reached]
+    return distances, predecessors
+
+
+def trace_path(predecessors, source, target):
+    """Восстанавливает путь source -> target по строке предшественников из дерева с корнем source."""
+    path = [target]
+    while path[-1] != source:
+        previous = int(predecessors[path[-1]])
+        if previous < 0:
+            return None
+        path.append(previous)
+    return path[::-1]
+
+
+class TerminalGraph:
+    """Полный граф кратчайших расстояний между терминалами (начальной и конечными вершинами).
+
+    Хранит матрицу расстояний k x k и деревья кратчайших путей из каждого терминала,
+    по которым маршрут между терминалами разворачивается в путь по исходному графу.
+    Память под деревья — k x n чисел int32 и k x n расстояний float64 (они нужны,
+    чтобы после изменения весов пересчитывать только затронутые деревья).
+    Готовые деревья (например, из SolveCache.terminal_trees) можно передать в trees.
+    """
+
+    def __init__(self, csr, terminals, trees=None):
+        self.csr = csr
+        self.terminals = np.asarray(terminals, dtype=np.int64)
+        if trees is None:
+            trees = shortest_path_trees(csr, self.terminals, self.terminals)
+        self.tree_distances, self.predecessors = trees
+        self.distances = self.tree_distances[:, self.terminals]
+        self._legs = {}
+
+    def update(self, changes):
+        """Учитывает изменения рёбер (результат CSRGraph.apply_changes).
+
+        Дерево терминала пересчитывается, только если изменение может его испортить:
+        подешевевшее или добавленное ребро сокращает расстояние до одного из своих концов,
+        либо подорожавшее или удалённое ребро входит в дерево. Остальные деревья и
+        расстояния остаются верными. Возвращает номера пересчитанных терминалов.
+        """
+        a, b, weight = changes.u, changes.v, changes.new_weight
+        cheaper = weight < changes.old_weight
+        distances = self.tree_distances
+        improves = cheaper & ((distances[:, a] + weight < distances[:, b]) | (distances[:, b] + weight < distances[:, a]))
+        in_tree = ~cheaper & ((self.predecessors[:, b] == a) | (self.predecessors[:, a] == b))
+        rows = np.flatnonzero((improves | in_tree).any(axis=1))
+        if len(rows):
+            distances, predecessors = shortest_path_trees(self.csr, self.terminals[rows], self.terminals)
+            self.tree_distances[rows] = distances
+            self.predecessors[rows] = predecessors
+            self.distances[rows] = distances[:, self.terminals]
+            stale = set(rows.tolist())
+            self._legs = {key: path for key, path in self._legs.items() if key[0] not in stale}
+        return rows
+
+    def leg(self, i, j):
+        """Кратчайший путь (индексы вершин исходного графа) от терминала i к терминалу j."""
+        key = (i, j) if i <= j else (j, i)
+        if key not in self._legs:
+            self._legs[key] = trace_path(self.predecessors[key[0]], int(self.terminals[key[0]]),
+                                         int(self.terminals[key[1]]))
+        path = self._legs[key]
+        return path if i <= j else path[::-1]
+
+    def expand(self, tour):
+        """Разворачивает маршрут по терминалам в путь по исходному графу."""
+        path = [int(self.terminals[tour[0]])]
+        for i, j in zip(tour, tour[1:]):
+            path.extend(self.leg(int(i), int(j))[1:])
+        return path
@@ -0,0 +1,148 @@
+"""Журнал снимков феромона и лучшего пути по итерациям — для просмотра хода запуска.
+
+Снимки пишутся в каталог по мере работы решателя и читаются через np.memmap, поэтому
+длинный запуск можно прокрутить в окне, не держа историю в памяти и не запуская решатель
+заново. Феромон снимка сжимается до uint8 в линейной шкале между его наименьшим и
+наибольшим значениями (погрешность — 1/510 диапазона, на отображении с EDGE_LEVELS уровнями
+она не видна): строка снимка занимает по байту на ребро, вчетверо меньше float32.
+
+Файлы каталога:
+    meta.json     — версия формата, число рёбер и хэш графа (CSRGraph.content_hash);
+    index.bin     — по записи INDEX_DTYPE на снимок;
+    pheromone.u8  — строки сжатого феромона (снимки x рёбра);
+    paths.i32     — лучшие пути (индексы вершин CSR-графа) подряд.
+"""
+import json
+import math
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+LEVELS = 255  # Наибольший код сжатого феромона
+INDEX_DTYPE = np.dtype([('iteration', '<i8'), ('best_length', '<f8'), ('low', '<f4'), ('high', '<f4'),
+                        ('path_offset', '<i8'), ('path_size', '<i8')])
+FILES = {'index': 'index.bin', 'pheromone': 'pheromone.u8', 'paths': 'paths.i32'}
+
+
+def quantize(pheromone):
+    """Сжимает феромон до uint8; возвращает (коды, наименьшее, наибольшее значение)."""
+    pheromone = np.asarray(pheromone, dtype=np.float32)
+    if not len(pheromone):
+        return np.zeros(0, dtype=np.uint8), 0.0, 0.0
+    low, high = float(pheromone.min()), float(pheromone.max())
+    if high <= low:
+        return np.zeros(len(pheromone), dtype=np.uint8), low, high
+    codes = np.rint((pheromone - low) * (LEVELS / (high - low)))
+    return codes.astype(np.uint8), low, high
+
+
+def dequantize(codes, low, high):
+    """Восстанавливает феромон (float32) из кодов quantize."""
+    return (low + codes * np.float32((high - low) / LEVELS)).astype(np.float32)
+
+
+class SnapshotLog:
+    """Запись (create) или чтение (open) журнала снимков в каталоге directory.
+
+    Решатель добавляет снимок после каждой every-й итерации (append); запись идёт через
+    буферизованные файлы, в памяти остаётся только текущий снимок. Открытый для чтения
+    журнал отображает файлы в память (np.memmap): snapshot(i) читает с диска одну строку.
+    """
+
+    def __init__(self, directory, num_edges, graph_hash=None, every=1, writable=False):
+        self.directory = directory
+        self.num_edges = num_edges
+        self.graph_hash = graph_hash
+        self.every = every
+        self.writable = writable
+        self._files = None
+        self._path_offset = 0
+        self._count = 0
+        self.index = self.pheromone = self.paths = None
+
+    @classmethod
+    def create(cls, directory, csr, every=1):
+        """Новый журнал для графа csr (существующие файлы журнала в directory перезаписываются)."""
+        os.makedirs(directory, exist_ok=True)
+        log = cls(directory, csr.num_edges, csr.content_hash(), every, writable=True)
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as file:
+            json.dump({'version': SNAPSHOT_VERSION, 'num_edges': csr.num_edges, 'graph_hash': log.graph_hash,
+                       'every': every}, file)
+        log._files = {name: open(os.path.join(directory, file_name), 'wb') for name, file_name in FILES.items()}
+        return log
+
+    @classmethod
+    def open(cls, directory):
+        """Открывает журнал для чтения. Ошибки формата — ValueError."""
+        try:
+            with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Не удалось прочитать журнал снимков {directory}: {e}") from None
+        if meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия журнала снимков: {meta.get('version')}.")
+        log = cls(directory, meta['num_edges'], meta['graph_hash'], meta['every'])
+        log.index = log._map('index', INDEX_DTYPE)
+        count = len(log.index)
+        log.pheromone = log._map('pheromone', np.uint8)[:count * log.num_edges].reshape(count, log.num_edges)
+        log.paths = log._map('paths', np.int32)
+        return log
+
+    def _map(self, name, dtype):
+        path = os.path.join(self.directory, FILES[name])
+        size = os.path.getsize(path) // np.dtype(dtype).itemsize
+        if size == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(size,))
+
+    def record(self, iteration, pheromone, best_path, best_length):
+        """Добавляет снимок после итерации iteration, если она кратна every."""
+        if iteration % self.every == 0:
+            self.append(iteration, pheromone, best_path, best_length)
+
+    def append(self, iteration, pheromone, best_path, best_length):
+        if len(pheromone) != self.num_edges:
+            raise ValueError("Число рёбер снимка не совпадает с журналом.")
+        codes, low, high = quantize(pheromone)
+        path = np.asarray(best_path if best_path is not None else [], dtype=np.int32)
+        entry = np.zeros(1, dtype=INDEX_DTYPE)
+        entry[0] = (iteration, best_length, low, high, self._path_offset, len(path))
+        self._files['pheromone'].write(codes.tobytes())
+        self._files['paths'].write(path.tobytes())
+        self._files['index'].write(entry.tobytes())
+        self._path_offset += len(path)
+        self._count += 1
+
+    def flush(self):
+        for file in (self._files or {}).values():
+            file.flush()
+
+    def close(self):
+        """Закрывает файлы журнала (записи) и отображения в память (чтения)."""
+        for file in (self._files or {}).values():
+            file.close()
+        self._files = None
+        self.index = self.pheromone = self.paths = None
+
+    def __len__(self):
+        return self._count if self.writable else len(self.index)
+
+    def snapshot(self, number):
+        """Снимок number: итерация, феромон (float32), лучший путь (индексы вершин или None) и его длина."""
+        entry = self.index[number]
+        offset, size = int(entry['path_offset']), int(entry['path_size'])
+        best_length = float(entry['best_length'])
+        return SimpleNamespace(
+            iteration=int(entry['iteration']),
+            pheromone=dequantize(self.pheromone[number], entry['low'], entry['high']),
+            best_path=np.array(self.paths[offset:offset + size]) if size else None,
+            best_length=best_length if math.isfinite(best_length) else None,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
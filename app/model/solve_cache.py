@@ -0,0 +1,252 @@
+"""Кэш результатов запусков и дорогих производных данных графа.
+
+Ключ — хэш содержимого графа (CSRGraph.content_hash) вместе с параметрами, от которых
+зависит результат: начальная и конечные вершины, параметры решателя и стратегии, зерно.
+Кэшируются результаты запусков (с итоговым феромоном для отображения), эвристика eta^beta
+и деревья кратчайших путей между терминалами (TerminalGraph). Записи хранятся в двух
+уровнях: LRU в памяти и каталог на диске, из которого при превышении размера удаляются
+давно не использованные записи.
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+CACHE_VERSION = 2
+DEFAULT_MEMORY_BYTES = 256 * 2 ** 20
+DEFAULT_DISK_BYTES = 1024 * 2 ** 20
+
+# Атрибуты решателя, от которых зависит результат. Число процессов не входит:
+# результат от него не зависит (см. ParallelColony)
+SOLVER_PARAMETERS = ('alpha', 'beta', 'evaporation_rate', 'pheromone_intensity', 'num_ants', 'num_iterations',
+                     'min_pheromone', 'batch_ants', 'seed', 'stagnation_window', 'min_branching', 'target_length',
+                     'num_candidates', 'local_search_ants', 'max_backtracks')
+# Параметры островной модели (IslandModel); у одиночных решателей их нет
+ISLAND_PARAMETERS = ('num_islands', 'migration_interval', 'migration', 'blend_rate')
+
+
+def default_cache_directory():
+    """Каталог кэша по умолчанию: $XDG_CACHE_HOME/aco-routes или ~/.cache/aco-routes."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'aco-routes')
+
+
+def make_key(*parts):
+    """Ключ записи: хэш от частей, сериализованных в JSON."""
+    text = json.dumps([CACHE_VERSION, *parts], sort_keys=True, default=_plain)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=20).hexdigest()
+
+
+def solve_key(solver, start_node, end_nodes):
+    """Ключ результата запуска solver или None, если результат не воспроизводим.
+
+    Без зерна каждый запуск даёт свой результат, а с ограничением времени результат
+    зависит от скорости машины, поэтому такие запуски не кэшируются.
+    """
+    if solver.seed is None or solver.time_limit is not None:
+        return None
+    parameters = {name: getattr(solver, name, None) for name in SOLVER_PARAMETERS}
+    parameters.update({name: getattr(solver, name) for name in ISLAND_PARAMETERS if hasattr(solver, name)})
+    return make_key('solve', solver.csr.content_hash(), type(solver).__name__, getattr(solver, 'closed', None),
+                    start_node, list(end_nodes), parameters, solver.strategy.name, solver.strategy.parameters())
+
+
+class SolveCache:
+    """Двухуровневый кэш: LRU в памяти (не больше memory_bytes) и каталог directory на диске.
+
+    Запись — результат (словарь, пригодный для JSON) и/или набор массивов NumPy; на диске
+    это <ключ>.json и <ключ>.npz. Найденная на диске запись поднимается в память, а время
+    доступа к её файлам обновляется; когда каталог превышает disk_bytes, удаляются файлы
+    с самым давним доступом. Без directory кэш работает только в памяти. Ошибки записи
+    на диск не мешают работе: запись просто остаётся только в памяти.
+    """
+
+    def __init__(self, directory=None, memory_bytes=DEFAULT_MEMORY_BYTES, disk_bytes=DEFAULT_DISK_BYTES):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()  # Ключ -> (результат, массивы, размер)
+        self._memory_used = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Возвращает (результат, массивы) или None. Массивы — копии, их можно изменять."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            result, arrays, _ = entry
+            return result, {name: array.copy() for name, array in arrays.items()} if arrays is not None else None
+        entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, *entry)
+        result, arrays = entry
+        return result, {name: array.copy() for name, array in arrays.items()} if arrays is not None else None
+
+    def put(self, key, result=None, arrays=None):
+        """Сохраняет запись в памяти и на диске."""
+        arrays = {name: np.array(array) for name, array in arrays.items()} if arrays is not None else None
+        self._remember(key, result, arrays)
+        self._store(key, result, arrays)
+
+    def clear(self):
+        """Очищает оба уровня кэша."""
+        self._memory.clear()
+        self._memory_used = 0
+        for name in self._disk_files():
+            _remove(os.path.join(self.directory, name))
+
+    def _remember(self, key, result, arrays):
+        size = _entry_size(result, arrays)
+        if key in self._memory:
+            self._memory_used -= self._memory.pop(key)[2]
+        if size > self.memory_bytes:
+            return
+        self._memory[key] = (result, arrays, size)
+        self._memory_used += size
+        while self._memory_used > self.memory_bytes:
+            self._memory_used -= self._memory.popitem(last=False)[1][2]
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        names = [key + '.json', key + '.npz']
+        paths = [os.path.join(self.directory, name) for name in names]
+        if not any(os.path.exists(path) for path in paths):
+            return None
+        try:
+            result = arrays = None
+            if os.path.exists(paths[0]):
+                with open(paths[0], 'r', encoding='utf-8') as file:
+                    result = json.load(file)
+            if os.path.exists(paths[1]):
+                with np.load(paths[1]) as data:
+                    arrays = {name: data[name] for name in data.files}
+            for path in paths:
+                if os.path.exists(path):
+                    os.utime(path)  # Отметка недавнего использования для вытеснения
+        except (OSError, ValueError):
+            return None
+        return result, arrays
+
+    def _store(self, key, result, arrays):
+        if self.directory is None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if result is not None:
+                temp_name = os.path.join(self.directory, key + '.json.tmp')
+                with open(temp_name, 'w', encoding='utf-8') as file:
+                    json.dump(result, file, default=_plain)
+                os.replace(temp_name, os.path.join(self.directory, key + '.json'))
+            if arrays is not None:
+                temp_name = os.path.join(self.directory, key + '.tmp.npz')
+                np.savez(temp_name, **arrays)
+                os.replace(temp_name, os.path.join(self.directory, key + '.npz'))
+        except OSError:
+            return
+        self._evict_disk()
+
+    def _disk_files(self):
+        if self.directory is None or not os.path.isdir(self.directory):
+            return []
+        return [name for name in os.listdir(self.directory) if name.endswith(('.json', '.npz'))]
+
+    def _evict_disk(self):
+        """Удаляет записи с самым давним доступом, пока каталог больше disk_bytes."""
+        files = []
+        for name in self._disk_files():
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            _remove(os.path.join(self.directory, name))
+            total -= size
+
+    # Производные данные графа
+
+    def set_heuristic(self, csr, beta):
+        """csr.set_heuristic(beta) через кэш."""
+        key = make_key('heuristic', csr.content_hash(), beta)
+        entry = self.get(key)
+        if entry is not None and len(entry[1]['eta_beta']) == csr.num_edges:
+            csr.beta = beta
+            csr.eta_beta = entry[1]['eta_beta']
+            return
+        csr.set_heuristic(beta)
+        self.put(key, arrays={'eta_beta': csr.eta_beta})
+
+    def terminal_trees(self, csr, terminals, build):
+        """Деревья кратчайших путей из терминалов: (расстояния, предшественники) из кэша
+        или от build(), результат которого сохраняется."""
+        key = make_key('terminals', csr.content_hash(), np.asarray(terminals).tolist())
+        entry = self.get(key)
+        if entry is not None:
+            return entry[1]['tree_distances'], entry[1]['predecessors']
+        distances, predecessors = build()
+        self.put(key, arrays={'tree_distances': distances, 'predecessors': predecessors})
+        return distances, predecessors
+
+    # Результаты запусков
+
+    def lookup(self, solver, start_node, end_nodes):
+        """Результат такого же запуска из кэша или None.
+
+        При попадании в граф решателя возвращается итоговый феромон того запуска,
+        чтобы представление показало его так же, как после настоящего запуска.
+        """
+        key = solve_key(solver, start_node, end_nodes)
+        entry = self.get(key) if key is not None else None
+        if entry is None or entry[0] is None:
+            return None
+        result, arrays = entry
+        if arrays is not None and len(arrays['pheromone']) == solver.csr.num_edges:
+            solver.csr.pheromone[:] = arrays['pheromone']
+        return {**result, 'cached': True}
+
+    def store(self, solver, start_node, end_nodes, result):
+        """Сохраняет результат завершённого запуска вместе с итоговым феромоном."""
+        key = solve_key(solver, start_node, end_nodes)
+        if key is not None:
+            self.put(key, result, {'pheromone': solver.csr.pheromone})
+
+    def run(self, solver, start_node, end_nodes, callback=None):
+        """solver.run() с кэшем: повторный запуск с теми же графом и параметрами берётся из кэша."""
+        result = self.lookup(solver, start_node, end_nodes)
+        if result is not None:
+            return result
+        result = solver.run(start_node, end_nodes, callback)
+        self.store(solver, start_node, end_nodes, result)
+        return {**result, 'cached': False}
+
+
+def _entry_size(result, arrays):
+    size = len(json.dumps(result, default=_plain)) if result is not None else 0
+    return size + (sum(array.nbytes for array in arrays.values()) if arrays is not None else 0)
+
+
+def _plain(value):
+    """Числа и массивы NumPy для json.dumps."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Значение типа {type(value).__name__} не сериализуется в JSON.")
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,174 @@
+import time
+
+import numpy as np
+
+from app.model.aco_solver import BRANCHING_LAMBDA, ACOSolver
+from app.model.ant_batch import construct_tours
+from app.model.local_search import improve_tour, tour_length
+from app.model.shortest_paths import TerminalGraph, shortest_path_trees
+
+
+class TourSolver(ACOSolver):
+    """Маршрут из начальной вершины через все конечные (задача коммивояжёра).
+
+    Муравьи работают не с исходным графом, а с полным графом терминалов
+    (начальная и конечные вершины), рёбра которого — кратчайшие расстояния,
+    заранее посчитанные алгоритмом Дейкстры. Феромон хранится в матрице k x k.
+    Маршрут открытый (заканчивается в последней посещённой вершине) или,
+    при closed, замкнутый с возвратом в начальную вершину. Феромоны на рёбрах
+    исходного графа ведутся только для отображения: на них откладывается лучший
+    маршрут каждой итерации.
+    """
+
+    def __init__(self, csr, alpha, beta, evaporation_rate, pheromone_intensity, num_ants, closed=False, **parameters):
+        super().__init__(csr, alpha, beta, evaporation_rate, pheromone_intensity, num_ants, **parameters)
+        self.closed = closed
+        self.terminal_graph = None
+        self.pheromone = None
+        self.eta_beta = None
+        self.best_tour = None
+
+    def start(self, start_node, end_nodes, warm=False):
+        """Подготовка к запуску: расстояния между терминалами, матрицы феромонов и эвристики.
+
+        При тёплом старте с теми же терминалами сохраняются граф терминалов (обновлённый
+        в graph_changed) и матрица феромонов, а лучший маршрут прошлого запуска становится
+        начальным рекордом с длиной по новым расстояниям.
+        """
+        started = time.perf_counter()
+        terminals = [self.csr.node_index(start_node)] + [self.csr.node_index(node) for node in end_nodes]
+        warm = (warm and self.terminal_graph is not None
+                and np.array_equal(self.terminal_graph.terminals, terminals))
+        if not warm:
+            trees = None
+            if self.cache is not None:
+                trees = self.cache.terminal_trees(self.csr, terminals,
+                                                  lambda: shortest_path_trees(self.csr, terminals, terminals))
+            self.terminal_graph = TerminalGraph(self.csr, terminals, trees)
+        distances = self.terminal_graph.distances
+        unreachable = [node for node, distance in zip(end_nodes, distances[0, 1:]) if np.isinf(distance)]
+        if unreachable:
+            raise ValueError(f"Вершины {unreachable} недостижимы из начальной точки {start_node}.")
+
+        eta = np.full(distances.shape, 1e-10)  # Защита от деления на 0
+        np.divide(1.0, distances, out=eta, where=distances > 0)
+        self.eta_beta = eta ** self.beta
+        if not warm:
+            self.pheromone = np.ones(distances.shape)
+        self.mean_choices = max(len(distances) / 2, 1.0)
+        self.csr.reset_pheromones(self.min_pheromone)
+        previous = self.best_tour if warm else None
+        self.best_tour = None
+        self.reset_run(warm)
+        if previous is not None:
+            self.best_tour = previous
+            self.best_length = tour_length(previous, distances)
+            self.best_path = np.array(self.terminal_graph.expand(previous))
+        self.instrument_start(started)
+
+    def graph_changed(self, changes):
+        """Пересчитывает только те кратчайшие расстояния между терминалами, которые могли измениться."""
+        super().graph_changed(changes)
+        if self.terminal_graph is not None:
+            self.terminal_graph.update(changes)
+
+    def migrants(self):
+        """Лучший маршрут (в индексах терминалов), его длина и матрица феромонов."""
+        return self.best_tour, self.best_length, self.pheromone
+
+    def accept_migrants(self, best_tour, best_length, pheromone=None, blend_rate=0.0):
+        """Как ACOSolver.accept_migrants, но для маршрутов и матрицы феромонов терминалов."""
+        if pheromone is not None:
+            self.pheromone *= 1 - blend_rate
+            self.pheromone += blend_rate * pheromone
+        if best_tour is not None and best_length < self.best_length:
+            self.best_tour = np.asarray(best_tour)
+            self.best_length = float(best_length)
+            self.best_path = np.array(self.terminal_graph.expand(self.best_tour))
+            self.pheromone.reshape(-1)[self.tour_edges(self.best_tour)[0]] += self.pheromone_intensity / best_length
+
+    def step(self):
+        """Одна итерация: построение маршрутов всеми муравьями, локальный поиск и обновление феромонов."""
+        started = time.perf_counter()
+        attractiveness = self.pheromone ** self.alpha * self.eta_beta
+        pheromone = self.pheromone.reshape(-1)
+        local_update = self.strategy.local_update(self, pheromone, self.eta_beta.reshape(-1))
+        tours, lengths = construct_tours(attractiveness, self.terminal_graph.distances, self.num_ants, self.rng,
+                                         self.closed, self.strategy.exploitation, local_update)
+        if local_update is not None:
+            self.strategy.after_construction(self, pheromone, self.tour_edges(tours).ravel())
+        constructed = time.perf_counter()
+
+        if self.local_search_ants > 0:
+            self.improve_tours(tours, lengths)
+        searched = time.perf_counter()
+
+        # Определение лучшего маршрута в этой итерации
+        best = int(np.argmin(lengths))
+        if lengths[best] < self.best_length:
+            self.best_length = float(lengths[best])
+            self.best_tour = tours[best]
+            self.best_path = np.array(self.terminal_graph.expand(self.best_tour))
+
+        self.update_pheromones(tours, lengths)
+        self.show_tour(tours[best], lengths[best])
+        stage_times = (constructed - started, searched - constructed, time.perf_counter() - searched)
+        # Каждый из num_ants муравьёв делает k - 1 шагов, на каждом оценивая все k терминалов
+        moves = self.num_ants * (len(self.terminal_graph.terminals) - 1)
+        self.instrument_iteration(started, stage_times,
+                                  {'steps': moves, 'edges_scored': moves * len(self.terminal_graph.terminals)})
+        self.record_iteration(lengths, stage_times)
+
+    def improve_tours(self, tours, lengths):
+        """2-opt и Or-opt (local_search.improve_tour) для local_search_ants лучших маршрутов итерации.
+
+        Маршруты и длины заменяются на месте.
+        """
+        distances = self.terminal_graph.distances
+        for ant in np.argsort(lengths, kind='stable')[:self.local_search_ants]:
+            tours[ant] = improve_tour(tours[ant], distances, self.closed)
+            lengths[ant] = tour_length(tours[ant], distances)
+
+    def branching_factor(self):
+        """Средний λ-коэффициент ветвления по всем терминалам (матрица феромонов без диагонали)."""
+        k = len(self.pheromone)
+        if k < 3:
+            return float(k - 1)
+        off_diagonal = self.pheromone[~np.eye(k, dtype=bool)].reshape(k, k - 1)
+        low = off_diagonal.min(axis=1, keepdims=True)
+        high = off_diagonal.max(axis=1, keepdims=True)
+        return float((off_diagonal >= low + BRANCHING_LAMBDA * (high - low)).sum(axis=1).mean())
+
+    def tour_edges(self, tours):
+        """Рёбра маршрутов как индексы развёрнутой матрицы k x k, в обоих направлениях."""
+        k = len(self.pheromone)
+        tours = np.atleast_2d(tours)
+        forward = tours[:, :-1] * k + tours[:, 1:]
+        backward = tours[:, 1:] * k + tours[:, :-1]
+        return np.concatenate([forward, backward], axis=1)
+
+    def update_pheromones(self, tours, lengths):
+        """Обновление феромона на рёбрах графа терминалов (симметрично) согласно стратегии."""
+        best_edges = self.tour_edges(self.best_tour)[0] if self.best_tour is not None else None
+        self.strategy.update(self, self.pheromone.reshape(-1), list(self.tour_edges(tours)), lengths, best_edges,
+                             self.best_length)
+
+    def show_tour(self, tour, length):
+        """Отображение на исходном графе: испарение и отложение феромона вдоль лучшего маршрута итерации."""
+        pheromone = self.csr.pheromone
+        pheromone *= (1 - self.evaporation_rate)
+        np.maximum(pheromone, self.min_pheromone, out=pheromone)
+        np.add.at(pheromone, self.csr.path_edges(self.terminal_graph.expand(tour)), self.pheromone_intensity / length)
+
+    def result(self):
+        result = super().result()
+        result['tour'] = (self.csr.nodes[self.terminal_graph.terminals[self.best_tour]].tolist()
+                          if self.best_tour is not None else None)
+        return result
+
+
+def create_solver(csr, end_nodes, closed_tour=False, **parameters):
+    """Создаёт решатель: путь до единственной конечной вершины или обход всех конечных вершин."""
+    if closed_tour or len(end_nodes) > 1:
+        return TourSolver(csr, closed=closed_tour, **parameters)
+    return ACOSolver(csr, **parameters)
@@ -0,0 +1,487 @@
+"""Сервис маршрутов: граф загружается один раз, запросы принимаются по HTTP/JSON.
+
+Запуск:
+    python -m app.service "Graph's_files/graph10.txt" --port 8080 --workers 4
+Запрос маршрута (end — одна вершина или список, parameters и deadline необязательны):
+    curl -d '{"start": 0, "end": 9, "parameters": {"seed": 1}, "deadline": 2}' localhost:8080/route
+Несколько маршрутов одним запросом — POST /routes с {"queries": [...]}, состояние — GET /health.
+Вместо TCP-порта можно слушать Unix-сокет (--socket).
+
+Массивы графа лежат в разделяемой памяти и читаются процессами пула без копирования.
+Запросы копятся в очереди и раздаются процессам пакетами: очередь делится поровну между
+свободными процессами (пакет не больше batch_size, ожидание не дольше batch_wait секунд),
+так что одиночные запросы идут в свободные процессы сразу, а пакеты набираются, пока
+процессы заняты; одинаковые запросы с зерном внутри пакета решаются один раз.
+У каждого запроса свой срок (deadline): время в очереди вычитается из него, а остаток
+становится ограничением времени решателя.
+"""
+import argparse
+import json
+import math
+import os
+import queue
+import signal
+import socketserver
+import sys
+import threading
+import time
+from concurrent import futures
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.cli import non_negative, parse_arguments, positive
+from app.model.csr_graph import CSRGraph
+from app.model.graph_loader import load_edge_list
+from app.model.parallel_colony import attach_array, share_array
+from app.model.pheromone_update import STRATEGIES
+from app.model.solve_cache import SolveCache
+from app.model.tour_solver import create_solver
+
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_BATCH_WAIT = 0.005  # Секунды, которые диспетчер ждёт, пока пакет наполнится
+DEFAULT_MAX_QUEUE = 1000
+WORKER_CACHE_BYTES = 64 * 2 ** 20  # Кэш эвристик, деревьев терминалов и результатов в каждом процессе
+RESPONSE_GRACE = 5.0  # Сколько ждать ответа сверх срока запроса, прежде чем вернуть 504
+
+
+def _integer(value):
+    """Приведение параметра запроса к целому: дробные значения и логические — ошибка."""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"Не целое число: {value}.")
+    return int(value)
+
+
+def _number(value):
+    """Приведение параметра запроса к конечному числу: логические значения, NaN и бесконечность — ошибка."""
+    if isinstance(value, bool):
+        raise ValueError(f"Не число: {value}.")
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"Не конечное число: {value}.")
+    return value
+
+
+# Параметры решателя, которые можно задать в запросе: имя -> (приведение, проверка, сообщение об ошибке)
+QUERY_PARAMETERS = {
+    'alpha': (_number, lambda value: value > 0, "положительным числом"),
+    'beta': (_number, lambda value: value > 0, "положительным числом"),
+    'evaporation_rate': (_number, lambda value: value > 0, "положительным числом"),
+    'pheromone_intensity': (_number, lambda value: value > 0, "положительным числом"),
+    'num_ants': (_integer, lambda value: value > 0, "положительным целым"),
+    'num_iterations': (_integer, lambda value: value > 0, "положительным целым"),
+    'stagnation_window': (_integer, lambda value: value > 0, "положительным целым"),
+    'min_branching': (_number, lambda value: value > 0, "положительным числом"),
+    'target_length': (_number, lambda value: value > 0, "положительным числом"),
+    'num_candidates': (_integer, lambda value: value > 0, "положительным целым"),
+    'local_search_ants': (_integer, lambda value: value >= 0, "неотрицательным целым"),
+    'max_backtracks': (_integer, lambda value: value >= 0, "неотрицательным целым"),
+    'seed': (_integer, lambda value: value >= 0, "неотрицательным целым"),
+    'strategy': (str, lambda value: value in STRATEGIES, "одной из стратегий: " + ", ".join(STRATEGIES)),
+}
+# Параметры, которые можно отключить значением null
+NULLABLE_PARAMETERS = ('stagnation_window', 'min_branching', 'target_length', 'num_candidates', 'seed')
+
+_service_graph = None
+_service_cache = None
+
+
+def _set_worker_graph(csr):
+    """Инициализация исполнителя запросов: граф и кэш производных данных процесса.
+
+    Хэш графа считается здесь один раз: копии для запросов (colony_copy) его наследуют.
+    """
+    global _service_graph, _service_cache
+    csr.content_hash()
+    _service_graph = csr
+    _service_cache = SolveCache(None, WORKER_CACHE_BYTES)
+
+
+def _init_service_worker(specs):
+    """Инициализация процесса пула: граф из разделяемой памяти."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)  # Обработчик сервиса наследуется при fork
+    _set_worker_graph(CSRGraph.from_structure({field: attach_array(*spec) for field, spec in specs.items()}))
+
+
+def solve_query(query):
+    """Решает один запрос на графе процесса; возвращает ответ (словарь) для JSON.
+
+    Срок, истёкший до начала решения, — TimeoutError; остаток срока — ограничение
+    времени решателя, и тогда в ответ попадает лучший путь, найденный к этому моменту.
+    """
+    started = time.time()
+    parameters = dict(query['parameters'])
+    if query['deadline'] is not None:
+        remaining = query['deadline'] - started
+        if remaining <= 0:
+            raise TimeoutError(f"Срок запроса истёк в очереди ({started - query['received']:.3f} с).")
+        parameters['time_limit'] = remaining
+    csr = _service_graph.colony_copy()  # Свой феромон, структура графа общая
+    solver = create_solver(csr, query['end'], query['closed'], num_workers=1, cache=_service_cache, **parameters)
+    result = _service_cache.run(solver, query['start'], query['end'])
+    finished = time.time()
+    response = {key: result[key] for key in ('best_path', 'best_length', 'iterations', 'stop_reason', 'cached')}
+    if 'tour' in result:
+        response['tour'] = result['tour']
+    response['timings'] = {'queued': started - query['received'], 'solve': finished - started}
+    return response
+
+
+def solve_batch(queries):
+    """Решает пакет запросов; одинаковые запросы с зерном решаются один раз.
+
+    Возвращает по запросу ответ или исключение (исключения передаются из процесса пула
+    значениями, чтобы ошибка одного запроса не затрагивала остальные).
+    """
+    results = []
+    solved = {}
+    for query in queries:
+        key = None
+        if query['parameters'].get('seed') is not None:
+            key = json.dumps([query['start'], query['end'], query['closed'], query['parameters']], sort_keys=True)
+        if key in solved:
+            results.append(solved[key])
+            continue
+        try:
+            result = solve_query(query)
+        except (KeyError, ValueError, TimeoutError) as e:
+            result = e
+        # Истёкший срок — свойство самого запроса, а не ответ для его копий
+        if key is not None and not isinstance(result, TimeoutError):
+            solved[key] = result
+        results.append(result)
+    return results
+
+
+def parse_query(data, defaults, deadline=None):
+    """Проверяет запрос из JSON и возвращает его в виде, пригодном для solve_query.
+
+    data — {'start', 'end' (вершина или список), 'closed', 'parameters', 'deadline'}; параметры
+    берутся из defaults и переопределяются parameters запроса. Если запрос выбирает стратегию,
+    не задавая испарение, а испарение по умолчанию ей не подходит, берётся её собственное.
+    Ошибки — ValueError.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Запрос должен быть объектом JSON.")
+    if 'start' not in data or 'end' not in data:
+        raise ValueError("В запросе нужны поля start и end.")
+    end = data['end'] if isinstance(data['end'], list) else [data['end']]
+    try:
+        start = _integer(data['start'])
+        end = [_integer(node) for node in end]
+    except (TypeError, ValueError):
+        raise ValueError("Вершины start и end задаются целыми числами.") from None
+    if not end:
+        raise ValueError("Не заданы конечные вершины.")
+    parameters = dict(defaults)
+    overrides = data.get('parameters') or {}
+    if not isinstance(overrides, dict):
+        raise ValueError("Поле parameters должно быть объектом JSON.")
+    for name, value in overrides.items():
+        if name not in QUERY_PARAMETERS:
+            raise ValueError(f"Неизвестный параметр: {name}.")
+        cast, check, requirement = QUERY_PARAMETERS[name]
+        if value is None and name in NULLABLE_PARAMETERS:
+            parameters[name] = None
+            continue
+        try:
+            value = cast(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Параметр {name} должен быть {requirement}.") from None
+        if not check(value):
+            raise ValueError(f"Параметр {name} должен быть {requirement}.")
+        parameters[name] = value
+    strategy = STRATEGIES[parameters.get('strategy', 'as')]
+    if 'strategy' in overrides and 'evaporation_rate' not in overrides:
+        try:
+            strategy.check_evaporation_rate(parameters.get('evaporation_rate', 0))
+        except ValueError:
+            parameters['evaporation_rate'] = strategy.default_evaporation_rate
+    if 'evaporation_rate' in parameters:
+        strategy.check_evaporation_rate(parameters['evaporation_rate'])
+    timeout = data.get('deadline', deadline)
+    if timeout is not None:
+        try:
+            timeout = _number(timeout)
+        except (TypeError, ValueError):
+            raise ValueError("Срок deadline задаётся конечным числом секунд.") from None
+        if not timeout > 0:
+            raise ValueError("Срок deadline должен быть положительным.")
+    received = time.time()
+    return {'start': start, 'end': end, 'closed': bool(data.get('closed', False)), 'parameters': parameters,
+            'received': received, 'deadline': received + timeout if timeout is not None else None}
+
+
+class RoutingService:
+    """Очередь запросов маршрутов, пакетный диспетчер и пул исполнителей на одном графе.
+
+    submit() ставит запрос (parse_query) в очередь и возвращает Future с ответом. Поток
+    диспетчера забирает запросы пакетами и отдаёт их исполнителям: при num_workers > 1 —
+    процессам пула, которые читают граф из разделяемой памяти, при 1 — потоку текущего
+    процесса. В работе не больше num_workers пакетов сразу. Очередь делится поровну между
+    свободными исполнителями: при свободных исполнителях пакеты маленькие и работа
+    расходится по всем, а пока все заняты, запросы копятся и уходят следующим пакетом.
+    Переполнение очереди — queue.Full.
+    """
+
+    def __init__(self, csr, num_workers=1, batch_size=DEFAULT_BATCH_SIZE, batch_wait=DEFAULT_BATCH_WAIT,
+                 max_queue=DEFAULT_MAX_QUEUE):
+        self.csr = csr
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue = queue.Queue(max_queue)
+        self.served = 0
+        self.batches = 0
+        self._blocks = []
+        if num_workers > 1:
+            specs = {}
+            for field, array in csr.structure_arrays().items():
+                block, specs[field], _ = share_array(array)
+                self._blocks.append(block)
+            self.pool = ProcessPoolExecutor(num_workers, initializer=_init_service_worker, initargs=(specs,))
+        else:
+            self.pool = ThreadPoolExecutor(1, initializer=_set_worker_graph, initargs=(csr,))
+        self._slots = threading.Semaphore(num_workers)
+        self._busy = 0  # Пакетов в работе
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._dispatcher = threading.Thread(target=self._dispatch, name='RoutingDispatcher', daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, query):
+        """Ставит запрос в очередь; возвращает Future с ответом solve_query."""
+        future = Future()
+        self.queue.put_nowait((query, future))
+        return future
+
+    def _dispatch(self):
+        while not self._closed.is_set():
+            try:
+                first = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._slots.acquire()
+            with self._lock:
+                free = self.num_workers - self._busy  # Вместе с занятым сейчас местом
+                self._busy += 1
+            batch = [first]
+            collect_until = time.perf_counter() + self.batch_wait
+            while len(batch) < self.batch_size:
+                # Своя доля очереди: остальное достанется другим свободным исполнителям
+                if len(batch) >= math.ceil((len(batch) + self.queue.qsize()) / free):
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=max(collect_until - time.perf_counter(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                task = self.pool.submit(solve_batch, [query for query, _ in batch])
+            except RuntimeError as e:  # Пул уже остановлен
+                self._release_slot()
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            task.add_done_callback(lambda task, batch=batch: self._deliver(task, batch))
+
+    def _release_slot(self):
+        with self._lock:
+            self._busy -= 1
+        self._slots.release()
+
+    def _deliver(self, task, batch):
+        self._release_slot()
+        try:
+            results = task.result()
+        except Exception as e:  # Процесс пула завершился аварийно
+            results = [RuntimeError(f"Ошибка исполнителя: {e}")] * len(batch)
+        with self._lock:
+            self.served += len(batch)
+            self.batches += 1
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                # Одинаковые запросы пакета получают один ответ — у каждого своя копия
+                future.set_result({**result, 'timings': {**result['timings'], 'batch_size': len(batch)}})
+
+    def status(self):
+        return {'status': 'ok', 'num_nodes': self.csr.num_nodes, 'num_edges': self.csr.num_edges,
+                'workers': self.num_workers, 'queued': self.queue.qsize(), 'served': self.served,
+                'batches': self.batches}
+
+    def close(self):
+        """Останавливает диспетчер и пул и освобождает разделяемую память."""
+        self._closed.set()
+        self._dispatcher.join()
+        self.pool.shutdown(cancel_futures=True)
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RouteRequestHandler(BaseHTTPRequestHandler):
+    """POST /route, POST /routes и GET /health; тела запросов и ответов — JSON."""
+
+    server_version = 'ACORoutes/1.0'
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, self.server.service.status())
+        else:
+            self.send_json(404, {'error': f"Неизвестный путь: {self.path}."})
+
+    def do_POST(self):
+        if self.path not in ('/route', '/routes'):
+            self.send_json(404, {'error': f"Неизвестный путь: {self.path}."})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(length) or b'null')
+        except (ValueError, UnicodeDecodeError):
+            self.send_json(400, {'error': "Тело запроса — не JSON."})
+            return
+        if self.path == '/route':
+            error, query, future = self.enqueue(data)
+            self.send_json(*(error or self.wait(query, future)))
+            return
+        if not isinstance(data, dict) or not isinstance(data.get('queries'), list):
+            self.send_json(400, {'error': "Нужно поле queries со списком запросов."})
+            return
+        # Запросы списка ставятся в очередь сразу все и решаются параллельно
+        pending = [self.enqueue(query) for query in data['queries']]
+        responses = [error or self.wait(query, future) for error, query, future in pending]
+        self.send_json(200, {'results': [{'status': status, **body} for status, body in responses]})
+
+    def enqueue(self, data):
+        """Проверяет и ставит запрос в очередь: (None, запрос, Future) или ((код, тело ошибки), None, None)."""
+        try:
+            query = parse_query(data, self.server.defaults, self.server.deadline)
+            return None, query, self.server.service.submit(query)
+        except ValueError as e:
+            return (400, {'error': str(e)}), None, None
+        except queue.Full:
+            return (503, {'error': "Очередь запросов переполнена."}), None, None
+
+    def wait(self, query, future):
+        """Ждёт ответа на поставленный запрос: (код, тело)."""
+        timeout = query['deadline'] - time.time() + RESPONSE_GRACE if query['deadline'] is not None else None
+        try:
+            result = future.result(timeout=max(timeout, 0) if timeout is not None else None)
+        except (TimeoutError, futures.TimeoutError) as e:  # И истёкший в очереди срок, и ожидание сверх срока
+            return 504, {'error': str(e) or "Срок запроса истёк."}
+        except KeyError as e:
+            return 400, {'error': e.args[0]}
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        except RuntimeError as e:
+            return 500, {'error': str(e)}
+        result['timings']['total'] = time.time() - query['received']
+        return 200, result
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # У Unix-сокета нет адреса клиента
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP-сервер на Unix-сокете (каждое соединение — в своём потоке)."""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = 'localhost', 0
+
+
+def make_server(service, defaults, host='127.0.0.1', port=8080, socket_path=None, deadline=None, quiet=False):
+    """HTTP-сервер для service на host:port или, если задан socket_path, на Unix-сокете."""
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, RouteRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), RouteRequestHandler)
+    server.service = service
+    server.defaults = defaults
+    server.deadline = deadline
+    server.quiet = quiet
+    return server
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Сервис поиска маршрутов муравьиным алгоритмом (HTTP/JSON).")
+    parser.add_argument('graph', help="файл графа")
+    parser.add_argument('--host', default='127.0.0.1', help="адрес для входящих соединений")
+    parser.add_argument('--port', type=positive(int), default=8080, help="порт")
+    parser.add_argument('--socket', help="слушать Unix-сокет вместо TCP-порта")
+    parser.add_argument('--workers', type=positive(int), default=1, help="количество процессов-исполнителей")
+    parser.add_argument('--batch-size', type=positive(int), default=DEFAULT_BATCH_SIZE,
+                        help="наибольшее число запросов в пакете")
+    parser.add_argument('--batch-wait', type=positive(float), default=DEFAULT_BATCH_WAIT,
+                        help="сколько секунд ждать наполнения пакета")
+    parser.add_argument('--max-queue', type=positive(int), default=DEFAULT_MAX_QUEUE,
+                        help="наибольшая длина очереди (сверх неё — ответ 503)")
+    parser.add_argument('--deadline', type=positive(float), help="срок запроса в секундах по умолчанию")
+    parser.add_argument('--alpha', type=positive(float), default=2.0, help="вес феромонов")
+    parser.add_argument('--beta', type=positive(float), default=1.0, help="вес расстояния")
+    parser.add_argument('--evaporation-rate', type=positive(float),
+                        help="коэффициент испарения (по умолчанию свой у каждой стратегии)")
+    parser.add_argument('--pheromone-intensity', type=positive(float), default=1.0, help="интенсивность феромонов")
+    parser.add_argument('--ants', type=positive(int), default=10, help="количество муравьёв")
+    parser.add_argument('--iterations', type=positive(int), default=20, help="количество итераций")
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='as', help="стратегия обновления феромона")
+    parser.add_argument('--backtracks', type=non_negative, default=0, help="сколько раз муравей может отступить из тупика")
+    parser.add_argument('--quiet', action='store_true', help="не выводить журнал запросов")
+    return parser
+
+
+def main(argv=None):
+    args = parse_arguments(build_parser(), argv)
+    u, v, weights, _ = load_edge_list(args.graph)
+    csr = CSRGraph.from_edges(u, v, weights)
+    defaults = {'alpha': args.alpha, 'beta': args.beta, 'evaporation_rate': args.evaporation_rate,
+                'pheromone_intensity': args.pheromone_intensity, 'num_ants': args.ants,
+                'num_iterations': args.iterations, 'strategy': args.strategy, 'max_backtracks': args.backtracks}
+    with RoutingService(csr, args.workers, args.batch_size, args.batch_wait, args.max_queue) as service:
+        server = make_server(service, defaults, args.host, args.port, args.socket, args.deadline, args.quiet)
+        address = args.socket or f"http://{args.host}:{server.server_port}"
+        print(f"Граф {args.graph}: {csr.num_nodes} вершин, {csr.num_edges} рёбер. Сервис слушает {address}.",
+              file=sys.stderr)
+        # Остановка по SIGTERM, как по Ctrl+C: с освобождением разделяемой памяти и сокета
+        signal.signal(signal.SIGTERM, _interrupt)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if args.socket:
+                os.remove(args.socket)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,42 @@
-import sys
-import networkx as nx
+import numpy as np
 import pyqtgraph as pg
 from PyQt5.QtGui import QIcon
-from PyQt5.QtWidgets import QLabel,QStatusBar,QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QFileDialog, QLineEdit, QFormLayout, QGroupBox
-from PyQt5.QtCore import QTimer, QSize
+from PyQt5.QtWidgets import QLabel,QStatusBar, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QLineEdit, QFormLayout, QGroupBox, QCheckBox, QSlider
+from PyQt5.QtCore import QSize, Qt
+
+EDGE_LEVELS = 8  # Количество уровней толщины рёбер
+MAX_EDGE_WIDTH = 8
+PATH_COLOR = '#2f80ed'  # Цвет подсветки лучшего пути
+# Названия стратегий обновления феромона (ключи pheromone_update.STRATEGIES) в выпадающем списке
+STRATEGY_TITLES = {
+    'as': "Муравьиная система (AS)",
+    'elitist': "Элитная (EAS)",
+    'rank': "Ранговая (ASrank)",
+    'mmas': "MAX-MIN (MMAS)",
+    'acs': "Ant Colony System (ACS)",
+}
+# Способы обмена между колониями островной модели (ключи island_model.MIGRATIONS)
+MIGRATION_TITLES = {
+    'best': "Лучшими путями",
+    'blend': "Смешиванием феромона",
+}
+# Этапы и счётчики Instrumentation, показываемые в панели статистики
+STATS_PHASES = {
+    'construction': "построение",
+    'probability': "вероятности",
+    'local_search': "лок. поиск",
+    'update': "феромон",
+    'islands': "колонии",
+    'migration': "обмен",
+    'redraw': "отрисовка",
+}
+STATS_COUNTERS = {
+    'iterations': "итераций",
+    'steps': "шагов",
+    'edges_scored': "рёбер оценено",
+    'dead_ends': "тупиков",
+    'lost_ants': "потеряно муравьёв",
+}
 
 class GraphWindow(QWidget):
     def __init__(self, model):
@@ -18,13 +51,28 @@ class GraphWindow(QWidget):
         icon = QIcon()
         icon.addFile('ant_picture.png', QSize(64, 64))
         self.setWindowIcon(icon)
-        # Таймер отображения
+        # Таймер отображения и панель статистики (Instrumentation модели)
         self.time_label = QLabel("00:00:000", self)
-        self.layout.addWidget(self.time_label)
+        self.stats_label = QLabel(self)
+        self.stats_label.setWordWrap(True)
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.time_label)
+        header_layout.addWidget(self.stats_label, 1)
+        self.layout.addLayout(header_layout)
         # Создаем виджет для графика с использованием pyqtgraph
         self.plot_widget = pg.PlotWidget()
         self.layout.addWidget(self.plot_widget)
         self.plot_widget.setBackground('w')
+        self.plot_widget.getViewBox().sigRangeChanged.connect(self.update_labels)
+        self.node_item = None  # Графические элементы создаются в build_scene
+        # Просмотр истории запуска (снимки SnapshotLog): доступен после запуска с записью истории
+        self.history_slider = QSlider(Qt.Horizontal, self)
+        self.history_label = QLabel(self)
+        history_layout = QHBoxLayout()
+        history_layout.addWidget(self.history_slider, 1)
+        history_layout.addWidget(self.history_label)
+        self.layout.addLayout(history_layout)
+        self.set_history_length(0)
         # Создаем статус-бар
         self.status_bar = QStatusBar(self)
         self.layout.addWidget(self.status_bar)
@@ -63,12 +111,56 @@ class GraphWindow(QWidget):
         self.alpha_input = QLineEdit("2", self)
         self.beta_input = QLineEdit("1", self)
         self.num_ants_input = QLineEdit("10", self)
+        self.num_iterations_input = QLineEdit("20", self)
+        self.stagnation_window_input = QLineEdit(self)
+        self.stagnation_window_input.setPlaceholderText("не ограничено")
+        self.time_limit_input = QLineEdit(self)
+        self.time_limit_input.setPlaceholderText("не ограничено")
+        self.strategy_combo = QComboBox(self)
+        for name, title in STRATEGY_TITLES.items():
+            self.strategy_combo.addItem(title, name)
+        self.num_candidates_input = QLineEdit(self)
+        self.num_candidates_input.setPlaceholderText("все соседи")
+        self.local_search_input = QLineEdit("0", self)
+        self.max_backtracks_input = QLineEdit("0", self)
+        self.seed_input = QLineEdit(self)
+        self.seed_input.setPlaceholderText("случайное")
+        self.num_workers_input = QLineEdit("1", self)
+        self.num_islands_input = QLineEdit("1", self)
+        self.migration_interval_input = QLineEdit("10", self)
+        self.migration_combo = QComboBox(self)
+        for name, title in MIGRATION_TITLES.items():
+            self.migration_combo.addItem(title, name)
+        self.max_fps_input = QLineEdit("30", self)
+        self.edge_label_limit_input = QLineEdit(str(self.model.edge_label_limit), self)
+        self.node_label_limit_input = QLineEdit(str(self.model.node_label_limit), self)
+        self.closed_tour_checkbox = QCheckBox("Возвращаться в начальную точку", self)
+        self.profile_checkbox = QCheckBox("Семплирующий профилировщик", self)
+        self.history_checkbox = QCheckBox("Записывать историю итераций", self)
 
         controls_layout.addRow("Коэффициент испарения:", self.evaporation_rate_input)
         controls_layout.addRow("Интенсивность феромонов:", self.pheromone_intensity_input)
         controls_layout.addRow("Вес феромонов (alpha):", self.alpha_input)
         controls_layout.addRow("Вес расстояния (beta):", self.beta_input)
         controls_layout.addRow("Количество муравьёв:", self.num_ants_input)
+        controls_layout.addRow("Максимум итераций:", self.num_iterations_input)
+        controls_layout.addRow("Остановка без улучшения (итераций):", self.stagnation_window_input)
+        controls_layout.addRow("Ограничение времени (с):", self.time_limit_input)
+        controls_layout.addRow("Обновление феромона:", self.strategy_combo)
+        controls_layout.addRow("Кандидатов на шаге:", self.num_candidates_input)
+        controls_layout.addRow("Локальный поиск (лучших муравьёв):", self.local_search_input)
+        controls_layout.addRow("Возвратов из тупика:", self.max_backtracks_input)
+        controls_layout.addRow("Зерно генератора:", self.seed_input)
+        controls_layout.addRow("Количество процессов:", self.num_workers_input)
+        controls_layout.addRow("Колоний (островов):", self.num_islands_input)
+        controls_layout.addRow("Обмен между колониями (итераций):", self.migration_interval_input)
+        controls_layout.addRow("Обмен между колониями:", self.migration_combo)
+        controls_layout.addRow("Частота обновления (кадр/с):", self.max_fps_input)
+        controls_layout.addRow("Подписи рёбер (не больше в области):", self.edge_label_limit_input)
+        controls_layout.addRow("Подписи вершин (не больше в области):", self.node_label_limit_input)
+        controls_layout.addRow("Маршрут:", self.closed_tour_checkbox)
+        controls_layout.addRow("Профилирование:", self.profile_checkbox)
+        controls_layout.addRow("История:", self.history_checkbox)
 
         controls_group = QGroupBox("Настройки алгоритма")
         controls_group.setLayout(controls_layout)
@@ -86,12 +178,21 @@ class GraphWindow(QWidget):
         self.start_button = QPushButton('Запуск')
         buttons_layout.addWidget(self.start_button)
 
+        self.pause_button = QPushButton('Пауза')
+        buttons_layout.addWidget(self.pause_button)
+
         self.stop_button = QPushButton('Остановка')
         buttons_layout.addWidget(self.stop_button)
 
         self.reset_button = QPushButton('Сброс')
         buttons_layout.addWidget(self.reset_button)
 
+        self.changes_button = QPushButton('Изменить рёбра')
+        buttons_layout.addWidget(self.changes_button)
+
+        self.trace_button = QPushButton('Экспорт трассы')
+        buttons_layout.addWidget(self.trace_button)
+
         self.layout.addLayout(buttons_layout)
 
     def update_start_node_combo(self, nodes):
@@ -100,44 +201,167 @@ class GraphWindow(QWidget):
         for node in nodes:
             self.start_node_combo.addItem(str(node))
 
-    def update_canvas(self):
-        """Очищает и перерисовывает граф на виджете pyqtgraph."""
+    def set_history_length(self, count):
+        """Настраивает ползунок истории на count снимков (0 — истории нет) и ставит его на последний."""
+        self.history_slider.blockSignals(True)
+        self.history_slider.setRange(0, max(count - 1, 0))
+        self.history_slider.setValue(max(count - 1, 0))
+        self.history_slider.blockSignals(False)
+        self.history_slider.setEnabled(count > 0)
+        self.history_label.setText(f"Снимков: {count}" if count else "История не записана")
+
+    def update_stats(self, summary):
+        """Показывает сводку Instrumentation.summary: время этапов, счётчики и самую горячую функцию."""
+        phases = summary['phases']
+        parts = [f"{title}: {phases[name]['total'] * 1000:.0f} мс" for name, title in STATS_PHASES.items()
+                 if name in phases]
+        parts += [f"{title}: {summary['counters'][name]}" for name, title in STATS_COUNTERS.items()
+                  if summary['counters'].get(name)]
+        profile = summary.get('profile')
+        if profile:
+            frame, share = profile[0]
+            parts.append(f"горячее место: {frame} ({share:.0%})")
+        self.stats_label.setText(", ".join(parts))
+
+    def build_scene(self):
+        """Создаёт графические элементы для загруженного графа (один раз на граф).
+
+        Рёбра рисуются небольшим числом линий с connect='pairs' — по одной на уровень
+        феромона (EDGE_LEVELS уровней толщины/цвета), лучший путь — одной ломаной поверх них,
+        все вершины — одним ScatterPlotItem.
+        """
         self.plot_widget.clear()
-        pos = self.model.positions  # Получаем позиции из модели
-        edges = self.model.graph.edges(data=True)
-
-        # Отрисовка рёбер с учетом феромонов
-        for u, v, data in edges:
-            pheromone = data['pheromone']
-            weight = data['weight']
-            line = pg.PlotCurveItem(
-                [pos[u][0], pos[v][0]], [pos[u][1], pos[v][1]],
-                pen=pg.mkPen(color=(200, 200, 200), width=pheromone * 5)  # Толщина линии пропорциональна феромонам
-            )
-            self.plot_widget.addItem(line)
-
-            # Добавляем текст для расстояния
-            mid_x = (pos[u][0] + pos[v][0]) / 2
-            mid_y = (pos[u][1] + pos[v][1]) / 2
-            text_item = pg.TextItem(f"{weight}", anchor=(0.5, 0.5), color='black')
-            text_item.setFont(pg.QtGui.QFont("Arial", 10))
-            text_item.setPos(mid_x, mid_y)
-            self.plot_widget.addItem(text_item)
-
-        # Отрисовка узлов
-        for node in self.model.graph.nodes:
-            x, y = pos[node]
-            color = '#eb5757'  # Красный для всех узлов, кроме стартового и конечного
-            if node == self.model.start_node:
-                color = '#6fcf97'  # Зеленый для стартового узла
-            elif node in self.model.end_nodes:  # Проверяем, является ли узел конечной точкой
-                color = '#f2994a'
-
-            scatter = pg.ScatterPlotItem([x], [y], symbol='o', size=30, brush=color)
-            self.plot_widget.addItem(scatter)
-
-            # Текст внутри узлов
-            text = pg.TextItem(str(node), anchor=(0.5, 0.5), color='white')
-            text.setFont(pg.QtGui.QFont("Arial", 14, pg.QtGui.QFont.Bold))
-            text.setPos(x, y)
-            self.plot_widget.addItem(text)
+        csr = self.model.csr
+        self.edge_levels = np.full(csr.num_edges, -1)
+        self.edge_items = []
+        for level in range(EDGE_LEVELS):
+            share = level / (EDGE_LEVELS - 1)
+            gray = int(200 - 140 * share)  # Чем больше феромона, тем толще и темнее ребро
+            item = pg.PlotCurveItem(connect='pairs', pen=pg.mkPen(color=(gray, gray, gray),
+                                                                   width=1 + (MAX_EDGE_WIDTH - 1) * share))
+            self.edge_items.append(item)
+            self.plot_widget.addItem(item)
+        self.path_item = pg.PlotCurveItem(pen=pg.mkPen(color=PATH_COLOR, width=MAX_EDGE_WIDTH / 2))
+        self.plot_widget.addItem(self.path_item)
+        self.path_nodes = np.zeros(0, dtype=int)
+
+        # На больших графах вершины рисуются мелко, иначе они закрывают рёбра
+        node_size = 30 if csr.num_nodes <= self.model.node_label_limit else 6
+        self.node_item = pg.ScatterPlotItem(symbol='o', size=node_size, pen=None)
+        self.plot_widget.addItem(self.node_item)
+        self.node_key = None
+        self.edge_labels = []
+        self.node_labels = []
+        self.set_positions(self.model.positions)
+        self.update_canvas(csr.pheromone)
+
+    def set_positions(self, positions):
+        """Задаёт координаты вершин (массив n x 2 в порядке индексов CSR-графа)."""
+        csr = self.model.csr
+        self.node_positions = positions
+        self.edge_x = np.column_stack([positions[csr.edge_u, 0], positions[csr.edge_v, 0]])
+        self.edge_y = np.column_stack([positions[csr.edge_u, 1], positions[csr.edge_v, 1]])
+        self.edge_mid_x = self.edge_x.mean(axis=1)  # Места подписей рёбер
+        self.edge_mid_y = self.edge_y.mean(axis=1)
+        for level, item in enumerate(self.edge_items):
+            mask = self.edge_levels == level
+            item.setData(self.edge_x[mask].ravel(), self.edge_y[mask].ravel())
+        self.node_item.setData(pos=positions)
+        self.set_path(self.path_nodes)
+        self.node_key = None
+        self.update_nodes()
+        self.update_labels()
+
+    def update_canvas(self, pheromone=None, path=None):
+        """Обновляет толщину рёбер по феромонам (если переданы), подсветку лучшего пути
+        (если передан; пустой — убрать подсветку) и цвета начальной/конечных вершин.
+
+        Подписи здесь не трогаются: они зависят только от видимой области, координат и
+        весов (update_labels). Время перерисовки записывается в Instrumentation модели этапом redraw.
+        """
+        if self.node_item is None:
+            return
+        with self.model.instrumentation.phase('redraw', 'view'):
+            if pheromone is not None:
+                self.update_edges(pheromone)
+            if path is not None:
+                self.set_path(path)
+            self.update_nodes()
+
+    def set_path(self, path):
+        """Подсвечивает лучший путь: индексы вершин CSR-графа по порядку (пустой — без подсветки)."""
+        self.path_nodes = np.asarray(path, dtype=int)
+        points = self.node_positions[self.path_nodes]
+        self.path_item.setData(points[:, 0], points[:, 1])
+
+    def update_edges(self, pheromone):
+        """Распределяет рёбра по уровням феромона; перестраивает только изменившиеся уровни."""
+        top = pheromone.max() if len(pheromone) else 0
+        if top > 0:
+            levels = np.rint(pheromone / top * (EDGE_LEVELS - 1)).astype(int)
+        else:
+            levels = np.zeros(len(pheromone), dtype=int)
+        changed = np.unique(np.concatenate([levels[levels != self.edge_levels],
+                                            self.edge_levels[levels != self.edge_levels]]))
+        self.edge_levels = levels
+        for level in changed[changed >= 0]:
+            mask = levels == level
+            self.edge_items[level].setData(self.edge_x[mask].ravel(), self.edge_y[mask].ravel())
+
+    def update_nodes(self):
+        """Перекрашивает вершины, если изменились начальная или конечные точки."""
+        key = (self.model.start_node, tuple(sorted(self.model.end_nodes)))
+        if key == self.node_key:
+            return
+        self.node_key = key
+        csr = self.model.csr
+        colors = np.full(csr.num_nodes, '#eb5757', dtype=object)  # Красный для всех узлов, кроме стартового и конечного
+        end_nodes = [node for node in self.model.end_nodes if csr.has_node(node)]
+        if end_nodes:
+            colors[np.searchsorted(csr.nodes, end_nodes)] = '#f2994a'
+        if self.model.start_node is not None and csr.has_node(self.model.start_node):
+            colors[csr.node_index(self.model.start_node)] = '#6fcf97'  # Зеленый для стартового узла
+        self.node_item.setBrush([pg.mkBrush(color) for color in colors])
+
+    def update_labels(self):
+        """Подписи весов рёбер и номеров вершин в видимой области.
+
+        Подписи показываются, только если в видимую область попадает не больше
+        edge_label_limit рёбер (node_label_limit вершин) модели, поэтому на больших графах
+        они появляются лишь при достаточном приближении. Вызывается при изменении видимой
+        области, координат, весов рёбер и пределов.
+        """
+        if self.node_item is None:
+            return
+        (x_min, x_max), (y_min, y_max) = self.plot_widget.getViewBox().viewRange()
+        csr = self.model.csr
+
+        mid_x, mid_y = self.edge_mid_x, self.edge_mid_y
+        visible = np.flatnonzero((mid_x >= x_min) & (mid_x <= x_max) & (mid_y >= y_min) & (mid_y <= y_max))
+        if len(visible) > self.model.edge_label_limit:
+            visible = visible[:0]
+        weights = csr.edge_weight[visible]
+        self.place_labels(self.edge_labels, mid_x[visible], mid_y[visible],
+                          [f"{weight:g}" for weight in weights.tolist()], 'black', pg.QtGui.QFont("Arial", 10))
+
+        x, y = self.node_positions[:, 0], self.node_positions[:, 1]
+        visible = np.flatnonzero((x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max))
+        if len(visible) > self.model.node_label_limit:
+            visible = visible[:0]
+        self.place_labels(self.node_labels, x[visible], y[visible],
+                          [str(node) for node in csr.nodes[visible].tolist()], 'white',
+                          pg.QtGui.QFont("Arial", 14, pg.QtGui.QFont.Bold))
+
+    def place_labels(self, pool, xs, ys, texts, color, font):
+        """Размещает подписи, переиспользуя элементы из pool; лишние скрываются."""
+        while len(pool) < len(texts):
+            label = pg.TextItem(anchor=(0.5, 0.5), color=color)
+            label.setFont(font)
+            self.plot_widget.addItem(label)
+            pool.append(label)
+        for label, x, y, text in zip(pool, xs.tolist(), ys.tolist(), texts):
+            label.setText(text)
+            label.setPos(x, y)
+            label.show()
+        for label in pool[len(texts):]:
+            label.hide()
@@ -0,0 +1,88 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from app.model.csr_graph import CSRGraph
+from app.model.graph_generators import grid_graph
+
+
+def test_from_edges_keeps_last_duplicate_like_networkx():
+    u = [5, 1, 9, 1, 5]
+    v = [1, 9, 5, 5, 1]
+    weights = [10, 2, 7, 3, 4]
+    csr = CSRGraph.from_edges(u, v, weights)
+
+    graph = nx.Graph()
+    graph.add_weighted_edges_from(zip(u, v, weights))
+    assert csr.nodes.tolist() == [1, 5, 9]
+    assert csr.num_edges == graph.number_of_edges()
+    for a, b, weight in graph.edges(data='weight'):
+        ids = csr.edge_ids([csr.node_index(a)], [csr.node_index(b)])
+        assert csr.edge_weight[ids[0]] == weight
+
+
+def test_adjacency_is_symmetric_and_sorted():
+    csr = CSRGraph.from_edges(*grid_graph(4, seed=1))
+    for i in range(csr.num_nodes):
+        neighbors, edge_ids = csr.neighbors(i)
+        assert np.all(np.diff(neighbors) > 0)
+        for j, edge in zip(neighbors, edge_ids):
+            assert {int(csr.edge_u[edge]), int(csr.edge_v[edge])} == {i, int(j)}
+            assert csr.edge_ids([j], [i])[0] == edge
+
+
+def test_apply_changes_updates_weights_in_place():
+    csr = CSRGraph.from_edges([0, 1, 2], [1, 2, 3], [4, 5, 6])
+    csr.set_heuristic(2.0)
+    edge_u, old_hash = csr.edge_u, csr.content_hash()
+    changes = csr.apply_changes([2], [1], [1.0])
+
+    assert changes.edge_map is None
+    assert changes.old_weight.tolist() == [5.0] and changes.new_weight.tolist() == [1.0]
+    assert csr.edge_u is edge_u  # Только веса — смежность не перестраивается
+    assert csr.path_length([0, 1, 2, 3]) == 11.0
+    assert csr.eta_beta[csr.edge_ids([1], [2])[0]] == pytest.approx(1.0)
+    assert csr.content_hash() != old_hash
+
+
+def test_apply_changes_adds_and_removes_edges():
+    csr = CSRGraph.from_edges([0, 1, 2], [1, 2, 3], [4, 5, 6])
+    csr.pheromone[:] = [1.0, 2.0, 3.0]
+    changes = csr.apply_changes([0], [3], [1.0], removed_u=[1], removed_v=[2])
+
+    assert changes.edge_map.tolist() == [0, -1, 1]
+    assert csr.num_edges == 3
+    assert csr.edge_ids([1], [2])[0] == -1
+    assert csr.path_length([0, 3]) == 1.0
+    # Феромон окрестности изменений выравнивается до прежнего среднего
+    assert np.allclose(csr.pheromone, 2.0)
+
+
+def test_apply_changes_rejects_unknown_nodes_and_conflicts():
+    csr = CSRGraph.from_edges([0, 1], [1, 2], [1, 1])
+    with pytest.raises(ValueError, match="Вершина 7"):
+        csr.apply_changes([0], [7], [1.0])
+    with pytest.raises(ValueError, match="нет в графе"):
+        csr.apply_changes([], [], [], removed_u=[0], removed_v=[2])
+    with pytest.raises(ValueError):
+        csr.apply_changes([0], [1], [2.0], removed_u=[1], removed_v=[0])
+    with pytest.raises(ValueError):
+        csr.apply_changes([0], [1], [-1.0])
+
+
+def test_refresh_candidate_lists_matches_rebuild():
+    csr = CSRGraph.from_edges(*grid_graph(6, seed=2))
+    candidates = csr.candidate_lists(2)
+    rng = np.random.default_rng(0)
+    picked = rng.choice(csr.num_edges, 10, replace=False)
+    changes = csr.apply_changes(csr.nodes[csr.edge_u[picked]], csr.nodes[csr.edge_v[picked]],
+                                rng.integers(1, 100, len(picked)))
+    csr.refresh_candidate_lists(candidates, changes.nodes)
+
+    rebuilt = csr.candidate_lists(2)
+    assert np.array_equal(candidates.indptr, rebuilt.indptr)
+    assert np.array_equal(candidates.half_weights, rebuilt.half_weights)
+    # При равных весах порядок кандидатов может различаться, поэтому сравниваются множества
+    for i in range(csr.num_nodes):
+        first, last = rebuilt.indptr[i], rebuilt.indptr[i + 1]
+        assert set(candidates.half_edge_ids[first:last]) == set(rebuilt.half_edge_ids[first:last])
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.model.graph_cache import GraphCache
+from app.model.graph_loader import load_edge_list, parse_chunk, read_edge_list
+
+
+def write_graph(tmp_path, text, name='graph.txt'):
+    path = tmp_path / name
+    path.write_bytes(text.encode('utf-8'))
+    return str(path)
+
+
+def test_parse_chunk_fast_path():
+    edges, num_lines = parse_chunk(b'0 1 10\n1 2 5\n', 1)
+    assert num_lines == 2
+    assert edges.tolist() == [[0, 1, 10], [1, 2, 5]]
+
+
+def test_parse_chunk_falls_back_for_unicode_digits_and_spaces():
+    # Арабско-индийские цифры и неразрывный пробел принимал и построчный загрузчик
+    data = '0 1 10\n١ ٢ 5\n'.encode('utf-8')
+    edges, num_lines = parse_chunk(data, 1)
+    assert num_lines == 2
+    assert edges.tolist() == [[0, 1, 10], [1, 2, 5]]
+
+
+@pytest.mark.parametrize('chunk_bytes', [1, 7, 64, 1 << 20])
+def test_read_edge_list_reports_line_numbers(tmp_path, chunk_bytes):
+    path = write_graph(tmp_path, '0 1 10\n1 2 5\n2 3\n3 4 1\n')
+    with pytest.raises(ValueError, match="строке 3: 2 3"):
+        read_edge_list(path, chunk_bytes)
+
+    path = write_graph(tmp_path, '0 1 10\n1 2 5\n2 3 1\n3 x 1\n')
+    with pytest.raises(ValueError, match="строке 4: 3 x 1"):
+        read_edge_list(path, chunk_bytes)
+
+
+@pytest.mark.parametrize('chunk_bytes', [1, 5, 1 << 20])
+def test_read_edge_list_without_trailing_newline(tmp_path, chunk_bytes):
+    path = write_graph(tmp_path, '0 1 10\r\n1 2 5\r\n2 3 7')
+    u, v, weights = read_edge_list(path, chunk_bytes)
+    assert u.tolist() == [0, 1, 2] and v.tolist() == [1, 2, 3] and weights.tolist() == [10, 5, 7]
+
+
+def test_load_edge_list_uses_and_invalidates_cache(tmp_path):
+    path = write_graph(tmp_path, '0 1 10\n1 2 5\n')
+    u, v, weights, cache = load_edge_list(path)
+    assert cache is not None and cache.is_valid()
+    assert isinstance(u.base, np.memmap)
+    cache.save_positions(np.array([0, 1, 2]), np.zeros((3, 2)))
+
+    # Новое содержимое файла делает кэш и сохранённые координаты недействительными
+    write_graph(tmp_path, '0 1 10\n1 2 16\n')
+    assert not GraphCache(path).is_valid()
+    u, v, weights, cache = load_edge_list(path)
+    assert weights.tolist() == [10, 16]
+    assert cache.load_positions(np.array([0, 1, 2])) is None
+
+
+def test_cache_survives_rewrite_with_same_content(tmp_path):
+    path = write_graph(tmp_path, '0 1 10\n1 2 5\n')
+    content_hash = load_edge_list(path)[3].content_hash()
+    os.utime(path, ns=(1, 1))  # Та же запись с новым временем изменения — хэш совпадает
+    cache = GraphCache(path)
+    assert cache.is_valid() and cache.content_hash() == content_hash
+    assert cache._read_meta()['mtime_ns'] == 1
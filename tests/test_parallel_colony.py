@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from app.model.aco_solver import ACOSolver
+from app.model.csr_graph import CSRGraph
+from app.model.graph_generators import grid_graph
+from app.model.parallel_colony import ANTS_PER_TASK, ParallelColony
+
+
+def solve(num_workers, strategy='as', evaporation_rate=0.5):
+    csr = CSRGraph.from_edges(*grid_graph(6, seed=5))
+    solver = ACOSolver(csr, alpha=1.0, beta=2.0, evaporation_rate=evaporation_rate, pheromone_intensity=10.0,
+                       num_ants=2 * ANTS_PER_TASK + 10, num_iterations=4, num_workers=num_workers, seed=7,
+                       strategy=strategy, num_candidates=3, max_backtracks=2)
+    result = solver.run(0, [35])
+    return result, csr.pheromone
+
+
+@pytest.mark.parametrize('strategy, evaporation_rate', [('as', 0.5), ('acs', 0.1)])
+def test_seeded_results_do_not_depend_on_number_of_workers(strategy, evaporation_rate):
+    expected, expected_pheromone = solve(1, strategy, evaporation_rate)
+    assert expected['best_path'] is not None
+    for num_workers in (2, 4):
+        result, pheromone = solve(num_workers, strategy, evaporation_rate)
+        assert result['best_path'] == expected['best_path']
+        assert result['best_length'] == expected['best_length']
+        assert result['convergence'] == expected['convergence']
+        assert np.array_equal(pheromone, expected_pheromone)
+
+
+def test_construct_paths_is_ordered_by_portion():
+    csr = CSRGraph.from_edges(*grid_graph(4, seed=6))
+    attractiveness = np.ones(csr.num_edges)
+    seed = np.random.SeedSequence(11)
+    num_ants = ANTS_PER_TASK + 3
+    with ParallelColony(csr) as colony:
+        single = colony.construct_paths(attractiveness, 0, 15, num_ants, seed, iteration=2)
+    with ParallelColony(csr, num_workers=2) as colony:
+        pooled = colony.construct_paths(attractiveness, 0, 15, num_ants, seed, iteration=2)
+        other = colony.construct_paths(attractiveness, 0, 15, num_ants, seed, iteration=3)
+        assert colony.pool is not None
+    assert len(single) == num_ants
+    assert [(list(path), length) for path, length in single] == [(list(path), length) for path, length in pooled]
+    assert [list(path) for path, _ in other] != [list(path) for path, _ in pooled]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from app.model.aco_solver import ACOSolver
+from app.model.csr_graph import CSRGraph
+from app.model.graph_generators import grid_graph
+from app.model.pheromone_update import STRATEGIES, MaxMinAntSystem, make_strategy
+
+
+def make_solver(csr, strategy, **parameters):
+    options = dict(alpha=1.0, beta=2.0, evaporation_rate=STRATEGIES[strategy].default_evaporation_rate,
+                   pheromone_intensity=10.0, num_ants=10, num_iterations=15, seed=3, strategy=strategy)
+    options.update(parameters)
+    return ACOSolver(csr, **options)
+
+
+@pytest.mark.parametrize('name', sorted(STRATEGIES))
+def test_default_evaporation_rate_is_valid(name):
+    STRATEGIES[name].check_evaporation_rate(STRATEGIES[name].default_evaporation_rate)
+
+
+@pytest.mark.parametrize('name, rate', [('as', 0), ('as', -1.0), ('mmas', 1.3), ('acs', 1.01), ('acs', 0)])
+def test_check_evaporation_rate_rejects(name, rate):
+    with pytest.raises(ValueError):
+        STRATEGIES[name].check_evaporation_rate(rate)
+
+
+@pytest.mark.parametrize('name', ['mmas', 'acs'])
+def test_bounded_strategies_refuse_to_start_with_large_rate(name):
+    csr = CSRGraph.from_edges([0, 1], [1, 2], [1, 1])
+    with pytest.raises(ValueError, match=name):
+        make_solver(csr, name, evaporation_rate=1.3).run(0, [2])
+
+
+def test_make_strategy():
+    strategy = make_strategy('mmas', p_best=0.1, global_period=None)
+    assert strategy.parameters() == {'p_best': 0.1, 'global_period': 5, 'exploitation': 0.0}
+    with pytest.raises(ValueError):
+        make_strategy('unknown')
+
+
+def test_max_min_keeps_pheromone_within_bounds():
+    csr = CSRGraph.from_edges(*grid_graph(5, seed=4))
+    solver = make_solver(csr, 'mmas', num_iterations=10)
+    solver.start(0, [24])
+    while not solver.is_done():
+        solver.step()
+        if solver.best_path is not None:
+            best_edges = csr.path_edges(solver.best_path)
+            tau_min, tau_max = solver.strategy.bounds(solver, best_edges, solver.best_length)
+            assert 0 < tau_min <= tau_max
+            assert csr.pheromone.min() >= np.float32(tau_min) * (1 - 1e-6)
+            assert csr.pheromone.max() <= np.float32(tau_max) * (1 + 1e-6)
+    solver.finish()
+    assert isinstance(solver.strategy, MaxMinAntSystem) and solver.strategy.tau_max is not None
+
+
+@pytest.mark.parametrize('name', sorted(STRATEGIES))
+@pytest.mark.parametrize('num_candidates', [None, 2])
+def test_strategies_find_shortest_path(name, num_candidates):
+    # Кратчайший путь 0-2-5-9 длины 9 проходит по рёбрам из двух самых коротких у своих вершин
+    u = [0, 0, 0, 1, 1, 2, 2, 3, 4, 5, 5, 6, 7, 8]
+    v = [1, 2, 3, 4, 5, 5, 6, 6, 7, 8, 9, 9, 9, 9]
+    weights = [10, 5, 15, 3, 4, 2, 9, 6, 8, 7, 2, 5, 10, 3]
+    result = make_solver(CSRGraph.from_edges(u, v, weights), name, num_candidates=num_candidates).run(0, [9])
+    assert result['best_path'] == [0, 2, 5, 9]
+    assert result['best_length'] == 9.0
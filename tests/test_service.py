@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from app.model.csr_graph import CSRGraph
+from app.service import _set_worker_graph, parse_query, solve_batch
+
+DEFAULTS = {'alpha': 1.0, 'beta': 2.0, 'evaporation_rate': 1.3, 'pheromone_intensity': 10.0, 'num_ants': 10,
+            'num_iterations': 10}
+
+
+def test_parse_query_defaults_and_overrides():
+    query = parse_query({'start': 0, 'end': 9, 'parameters': {'num_ants': 20.0, 'seed': 1, 'alpha': 2}}, DEFAULTS)
+    assert query['start'] == 0 and query['end'] == [9] and query['closed'] is False
+    assert query['parameters'] == {**DEFAULTS, 'num_ants': 20, 'seed': 1, 'alpha': 2.0}
+    assert query['deadline'] is None
+
+    query = parse_query({'start': 0, 'end': [3, 9], 'closed': True, 'parameters': {'seed': None}}, DEFAULTS)
+    assert query['end'] == [3, 9] and query['closed'] and query['parameters']['seed'] is None
+
+
+@pytest.mark.parametrize('parameters', [
+    {'num_ants': 2.5}, {'num_ants': True}, {'num_ants': 0}, {'num_ants': 'x'}, {'alpha': True},
+    {'alpha': float('inf')}, {'alpha': float('nan')}, {'beta': -1}, {'local_search_ants': -1}, {'seed': -1},
+    {'num_ants': None}, {'strategy': 'unknown'}, {'unknown': 1}, {'evaporation_rate': 1.3, 'strategy': 'mmas'},
+])
+def test_parse_query_rejects_bad_parameters(parameters):
+    with pytest.raises(ValueError):
+        parse_query({'start': 0, 'end': 9, 'parameters': parameters}, DEFAULTS)
+
+
+@pytest.mark.parametrize('data', [
+    [], {'start': 0}, {'start': 0, 'end': []}, {'start': True, 'end': 9}, {'start': 0.5, 'end': 9},
+    {'start': 0, 'end': [9, 'x']}, {'start': 0, 'end': 9, 'parameters': [1]},
+    {'start': 0, 'end': 9, 'deadline': 0}, {'start': 0, 'end': 9, 'deadline': float('inf')},
+    {'start': 0, 'end': 9, 'deadline': False},
+])
+def test_parse_query_rejects_bad_fields(data):
+    with pytest.raises(ValueError):
+        parse_query(data, DEFAULTS)
+
+
+def test_strategy_without_evaporation_rate_gets_its_own_default():
+    query = parse_query({'start': 0, 'end': 9, 'parameters': {'strategy': 'mmas'}}, DEFAULTS)
+    assert query['parameters']['evaporation_rate'] == 0.02
+    query = parse_query({'start': 0, 'end': 9, 'parameters': {'strategy': 'mmas', 'evaporation_rate': 0.5}},
+                        DEFAULTS)
+    assert query['parameters']['evaporation_rate'] == 0.5
+    query = parse_query({'start': 0, 'end': 9, 'parameters': {'strategy': 'elitist'}}, DEFAULTS)
+    assert query['parameters']['evaporation_rate'] == 1.3
+
+
+def test_deadline_from_query_or_service_default():
+    before = time.time()
+    query = parse_query({'start': 0, 'end': 9, 'deadline': 2}, DEFAULTS, deadline=10)
+    assert before + 2 <= query['deadline'] <= time.time() + 2
+    query = parse_query({'start': 0, 'end': 9}, DEFAULTS, deadline=10)
+    assert before + 10 <= query['deadline'] <= time.time() + 10
+
+
+def test_solve_batch_answers_each_query():
+    _set_worker_graph(CSRGraph.from_edges([0, 1, 2, 0], [1, 2, 3, 3], [1, 1, 1, 5]))
+    good = parse_query({'start': 0, 'end': 3, 'parameters': {'seed': 1}}, DEFAULTS)
+    missing = parse_query({'start': 0, 'end': 7, 'parameters': {'seed': 1}}, DEFAULTS)
+    expired = dict(good, deadline=time.time() - 1)
+    timeout, first, repeated, error = solve_batch([expired, good, good, missing])
+    assert isinstance(timeout, TimeoutError)
+    assert first['best_path'] == [0, 1, 2, 3] and first['best_length'] == 3.0
+    assert repeated['best_path'] == first['best_path']
+    assert isinstance(error, KeyError)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from app.model.aco_solver import ACOSolver
+from app.model.csr_graph import CSRGraph
+from app.model.graph_generators import grid_graph
+from app.model.snapshot_log import LEVELS, SnapshotLog, dequantize, quantize
+
+
+def test_quantize_round_trip_error_is_within_half_a_level():
+    pheromone = np.random.default_rng(0).uniform(0.1, 20.0, 1000).astype(np.float32)
+    codes, low, high = quantize(pheromone)
+    restored = dequantize(codes, low, high)
+    assert codes.dtype == np.uint8
+    assert np.abs(restored - pheromone).max() <= (high - low) / (2 * LEVELS) * 1.001
+
+
+def test_quantize_constant_and_empty():
+    codes, low, high = quantize(np.full(5, 2.5))
+    assert np.array_equal(dequantize(codes, low, high), np.full(5, 2.5, dtype=np.float32))
+    assert len(quantize(np.zeros(0))[0]) == 0
+
+
+def test_log_round_trip(tmp_path):
+    csr = CSRGraph.from_edges([0, 1, 2], [1, 2, 3], [1, 2, 3])
+    with SnapshotLog.create(str(tmp_path), csr, every=2) as log:
+        for iteration in range(1, 6):
+            path = [0, 1, 2, 3] if iteration >= 2 else None
+            log.record(iteration, np.array([iteration, 1.0, 0.5]), path, 6.0 if path else float('inf'))
+        assert len(log) == 2
+
+    with SnapshotLog.open(str(tmp_path)) as log:
+        assert len(log) == 2
+        assert log.graph_hash == csr.content_hash() and log.every == 2
+        first, second = log.snapshot(0), log.snapshot(1)
+    assert (first.iteration, second.iteration) == (2, 4)
+    assert first.best_path.tolist() == [0, 1, 2, 3] and first.best_length == 6.0
+    assert np.allclose(second.pheromone, [4.0, 1.0, 0.5], atol=3.5 / LEVELS)
+
+
+def test_log_without_path_and_wrong_size(tmp_path):
+    csr = CSRGraph.from_edges([0], [1], [1])
+    with SnapshotLog.create(str(tmp_path), csr) as log:
+        log.append(1, np.ones(1), None, float('inf'))
+        with pytest.raises(ValueError):
+            log.append(2, np.ones(2), None, float('inf'))
+    with SnapshotLog.open(str(tmp_path)) as log:
+        snapshot = log.snapshot(0)
+    assert snapshot.best_path is None and snapshot.best_length is None
+
+
+def test_open_rejects_missing_log(tmp_path):
+    with pytest.raises(ValueError):
+        SnapshotLog.open(str(tmp_path / 'missing'))
+    (tmp_path / 'meta.json').write_text('{"version": 99}')
+    with pytest.raises(ValueError, match="версия"):
+        SnapshotLog.open(str(tmp_path))
+
+
+def test_solver_records_every_iteration(tmp_path):
+    csr = CSRGraph.from_edges(*grid_graph(4, seed=8))
+    with SnapshotLog.create(str(tmp_path), csr) as log:
+        solver = ACOSolver(csr, alpha=1.0, beta=2.0, evaporation_rate=0.5, pheromone_intensity=10.0, num_ants=10,
+                           num_iterations=6, seed=2, snapshot_log=log)
+        result = solver.run(0, [15])
+    with SnapshotLog.open(str(tmp_path)) as log:
+        assert len(log) == result['iterations']
+        last = log.snapshot(len(log) - 1)
+        assert last.best_length == result['best_length']
+        assert csr.nodes[last.best_path].tolist() == result['best_path']
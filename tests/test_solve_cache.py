@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+
+from app.model.aco_solver import ACOSolver
+from app.model.csr_graph import CSRGraph
+from app.model.solve_cache import SolveCache, make_key, solve_key
+
+
+def make_solver(csr, **parameters):
+    options = dict(alpha=1.0, beta=2.0, evaporation_rate=0.5, pheromone_intensity=10.0, num_ants=5,
+                   num_iterations=5, seed=1)
+    options.update(parameters)
+    return ACOSolver(csr, **options)
+
+
+def line_graph():
+    return CSRGraph.from_edges([0, 1, 2, 0], [1, 2, 3, 3], [1, 1, 1, 5])
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = SolveCache(None, memory_bytes=3 * 80)
+    for name in 'abc':
+        cache.put(name, arrays={'x': np.zeros(10)})
+    cache.get('a')
+    cache.put('d', arrays={'x': np.zeros(10)})
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None and cache.get('d') is not None
+
+
+def test_get_returns_copies():
+    cache = SolveCache(None)
+    cache.put('key', {'value': 1}, {'x': np.zeros(3)})
+    cache.get('key')[1]['x'][:] = 5
+    assert cache.get('key')[1]['x'].tolist() == [0, 0, 0]
+
+
+def test_disk_entries_survive_and_are_evicted_by_access_time(tmp_path):
+    directory = str(tmp_path)
+    first = SolveCache(directory, disk_bytes=2500)
+    first.put('old', arrays={'x': np.zeros(100)})
+    first.put('new', arrays={'x': np.ones(100)})
+    os.utime(tmp_path / 'old.npz', ns=(1, 1))
+
+    second = SolveCache(directory, disk_bytes=2500)
+    assert second.get('new')[1]['x'].tolist() == [1.0] * 100
+    second.put('third', arrays={'x': np.zeros(100)})  # Каталог переполнен: уходит самая давняя запись
+    assert not (tmp_path / 'old.npz').exists()
+    assert SolveCache(directory).get('old') is None
+    assert SolveCache(directory).get('third') is not None
+
+
+def test_solve_key_depends_on_graph_and_parameters():
+    csr = line_graph()
+    key = solve_key(make_solver(csr), 0, [3])
+    assert key == solve_key(make_solver(line_graph()), 0, [3])
+    assert key != solve_key(make_solver(csr, alpha=2.0), 0, [3])
+    assert key != solve_key(make_solver(csr, strategy='mmas', evaporation_rate=0.02), 0, [3])
+    assert key != solve_key(make_solver(csr), 0, [2])
+    assert solve_key(make_solver(csr, seed=None), 0, [3]) is None
+    assert solve_key(make_solver(csr, time_limit=1.0), 0, [3]) is None
+
+    csr.apply_changes([0], [3], [2.0])
+    assert key != solve_key(make_solver(csr), 0, [3])
+
+
+def test_run_serves_repeated_solves_and_restores_pheromone():
+    cache = SolveCache(None)
+    solved = line_graph()
+    first = cache.run(make_solver(solved), 0, [3])
+    assert not first['cached']
+
+    csr = line_graph()
+    second = cache.run(make_solver(csr), 0, [3])
+    assert second['cached']
+    assert second['best_path'] == first['best_path'] == [0, 1, 2, 3]
+    assert np.array_equal(csr.pheromone, solved.pheromone)
+
+    csr.apply_changes([1], [2], [10.0])  # Изменённый граф — другой ключ, решается заново
+    third = cache.run(make_solver(csr), 0, [3])
+    assert not third['cached'] and third['best_path'] == [0, 3]
+
+
+def test_heuristic_is_cached_per_graph_content():
+    cache = SolveCache(None)
+    csr = line_graph()
+    cache.set_heuristic(csr, 2.0)
+    assert cache.get(make_key('heuristic', csr.content_hash(), 2.0)) is not None
+
+    csr.apply_changes([0], [1], [2.0])
+    cache.set_heuristic(csr, 2.0)
+    assert csr.eta_beta[csr.edge_ids([0], [1])[0]] == 0.25